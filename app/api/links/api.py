@@ -1,18 +1,30 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Path, status
+from fastapi import APIRouter, Depends, Path, Response, status
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.api.links.models import LIST_LINK_SERVICE, UserOnListStatus
-from app.api.links.schemas import ParentInformation
+from app.api.links.models import (
+    LIST_LINK_SERVICE,
+    PARENTS_ROSTER_SERVICE,
+    UserOnListStatus,
+)
+from app.api.links.schemas import (
+    PARENT_INFORMATIONS,
+    ParentInformation,
+    PositionSchemaOut,
+    ReorderSchemaIn,
+)
 from app.api.parents_list.models import PARENTS_LIST_SERVICE
 from app.api.user_information.models import USER_INFORMATION_SERVICE
 from app.auth.models import USER_SERVICE, User
 from app.auth.token import (
     UserWithInformations,
+    abump_token_versions,
     get_current_user,
     get_current_user_with_informations,
 )
-from app.database.unit_of_work import unit_api
+from app.commun.responses import json_response
+from app.database.unit_of_work import async_unit_api, get_request_session
 from app.exceptions import RessourceNotFoundException, UnauthorizedException
 
 links_api = APIRouter(
@@ -21,257 +33,153 @@ links_api = APIRouter(
 )
 
 
-@links_api.get("/confirmed/{list_id}", status_code=status.HTTP_200_OK)
-def get_confirmed_parents_in_list(
+@links_api.get(
+    "/confirmed/{list_id}",
+    status_code=status.HTTP_200_OK,
+    response_model=list[ParentInformation],
+)
+async def get_confirmed_parents_in_list(
     list_id: int = Annotated[int, Path(title="list_id")],
-) -> list[ParentInformation]:
-    with unit_api("Tentative de récupérer les membres confirmés") as session:
-        parent_list = PARENTS_LIST_SERVICE.get_or_none(session, id=list_id)
-        if parent_list is None:
+) -> Response:
+    async with async_unit_api(
+        "Tentative de récupérer les membres confirmés", readonly=True
+    ) as session:
+        result = await PARENTS_ROSTER_SERVICE.aget_parents_in_list(
+            session, list_id, UserOnListStatus.ACCEPTED
+        )
+        if result is None:
             raise RessourceNotFoundException("La liste n'existe pas")
 
-        list_links = LIST_LINK_SERVICE.get_all_list_links_by_list_id(
-            session, parent_list.id
-        )
-
-        result: list[ParentInformation] = []
-        for list_link in list_links:
-            if list_link.status == UserOnListStatus.WAITING:
-                continue
-
-            user_information = USER_INFORMATION_SERVICE.get_or_none(
-                session, user_id=list_link.user_id
-            )
-
-            if user_information is None:
-                raise RessourceNotFoundException(
-                    f"L'utilisateur {list_link.user_id} n'a pas d'informations"
-                )
-
-            result.append(
-                ParentInformation(
-                    user_id=list_link.user_id,
-                    first_name=user_information.first_name,
-                    last_name=user_information.name,
-                    position_in_list=list_link.position_in_list,
-                    is_email=False if user_information.email is None else True,
-                    is_admin=list_link.is_admin,
-                    is_creator=parent_list.creator_id == list_link.user_id,
-                )
-            )
-
-        return result
+    return json_response(PARENT_INFORMATIONS, result)
 
 
-@links_api.get("/waiting/{list_id}", status_code=status.HTTP_200_OK)
-def get_waiting_parents_in_list(
+@links_api.get(
+    "/waiting/{list_id}",
+    status_code=status.HTTP_200_OK,
+    response_model=list[ParentInformation],
+)
+async def get_waiting_parents_in_list(
     list_id: int = Annotated[int, Path(title="list_id")],
-) -> list[ParentInformation]:
-    with unit_api("Tentative de récupérer les membres confirmés") as session:
-        parent_list = PARENTS_LIST_SERVICE.get_or_none(session, id=list_id)
-        if parent_list is None:
+) -> Response:
+    async with async_unit_api(
+        "Tentative de récupérer les membres confirmés", readonly=True
+    ) as session:
+        result = await PARENTS_ROSTER_SERVICE.aget_parents_in_list(
+            session, list_id, UserOnListStatus.WAITING
+        )
+        if result is None:
             raise RessourceNotFoundException("La liste n'existe pas")
 
-        list_links = LIST_LINK_SERVICE.get_all_list_links_by_list_id(
-            session, parent_list.id
-        )
+    return json_response(PARENT_INFORMATIONS, result)
 
-        result: list[ParentInformation] = []
-        for list_link in list_links:
-            if list_link.status == UserOnListStatus.WAITING:
-                user_information = USER_INFORMATION_SERVICE.get_or_none(
-                    session, user_id=list_link.user_id
-                )
-
-                if user_information is None:
-                    raise RessourceNotFoundException(
-                        f"L'utilisateur {list_link.user_id} n'a pas d'informations"
-                    )
-
-                result.append(
-                    ParentInformation(
-                        user_id=list_link.user_id,
-                        first_name=user_information.first_name,
-                        last_name=user_information.name,
-                        position_in_list=list_link.position_in_list,
-                        is_email=False if user_information.email is None else True,
-                        is_admin=list_link.is_admin,
-                        is_creator=parent_list.creator_id == list_link.user_id,
-                    )
-                )
-        return result
-
-
-@links_api.patch("/up/{list_id}/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-def up_parent_position(
-    admin_user: Annotated[
-        UserWithInformations, Depends(get_current_user_with_informations)
-    ],
-    list_id: int = Annotated[int, Path(title="list_id")],
-    user_id: int = Annotated[int, Path(title="user_id")],
-) -> None:
-    with unit_api("Tentative de changer la position d'un membre") as session:
-        parent_list = PARENTS_LIST_SERVICE.get_or_none(session, id=list_id)
-        if parent_list is None:
-            raise RessourceNotFoundException("La liste non trouvée")
 
-        if parent_list.id not in admin_user.parents_list_ids:
-            raise UnauthorizedException("Tu n'as pas accès à cette liste")
+def check_list_admin(admin_user: UserWithInformations, list_id: int) -> None:
+    if list_id not in admin_user.parents_list_ids:
+        raise UnauthorizedException("Tu n'as pas accès à cette liste")
 
-        admin_user_list_link = LIST_LINK_SERVICE.get_or_none(
-            session,
-            user_id=admin_user.id,
-            list_id=parent_list.id,
-        )
+    if list_id not in admin_user.admin_list_ids:
+        raise UnauthorizedException("Tu n'es pas admin de cette liste")
 
-        if admin_user_list_link.is_admin is False:
-            raise UnauthorizedException("Tu n'es pas admin de cette liste")
 
-        user_to_change_position = LIST_LINK_SERVICE.get_or_none(
-            session,
-            user_id=user_id,
-            list_id=parent_list.id,
-        )
+def to_positions(ordering: dict[int, int]) -> list[PositionSchemaOut]:
+    return [
+        PositionSchemaOut(user_id=user_id, position_in_list=position)
+        for user_id, position in ordering.items()
+    ]
 
-        if user_to_change_position is None:
-            raise RessourceNotFoundException("L'utilisateur n'existe pas")
 
-        all_list_links = LIST_LINK_SERVICE.get_all_list_links_by_list_id(
-            session, parent_list.id
-        )
+async def move_parent(
+    request_session: AsyncSession,
+    admin_user: UserWithInformations,
+    list_id: int,
+    user_id: int,
+    offset: int,
+) -> list[PositionSchemaOut]:
+    async with async_unit_api(
+        "Tentative de changer la position d'un membre", session=request_session
+    ) as session:
+        check_list_admin(admin_user, list_id)
 
-        min_position = 1
-        max_position = len(all_list_links)
-
-        if (
-            min_position >= user_to_change_position.position_in_list
-            or max_position < user_to_change_position.position_in_list
-        ):
-            raise RessourceNotFoundException("Position invalide")
-
-        parent_to_toogle = LIST_LINK_SERVICE.get_or_none(
-            session,
-            list_id=parent_list.id,
-            position_in_list=user_to_change_position.position_in_list - 1,
+        ordering = await LIST_LINK_SERVICE.aswap_with_neighbor(
+            session, list_id, user_id, offset
         )
 
-        if parent_to_toogle is None:
-            raise RessourceNotFoundException("Parent non trouvé")
-
-        initial_position = user_to_change_position.position_in_list
-
-        LIST_LINK_SERVICE.update(
-            session,
-            user_to_change_position.id,
-            position_in_list=initial_position - 1,
-        )
+        if len(ordering) == 0:
+            raise RessourceNotFoundException("Position invalide")
 
-        LIST_LINK_SERVICE.update(
-            session,
-            parent_to_toogle.id,
-            position_in_list=initial_position,
-        )
+    return to_positions(ordering)
 
 
-@links_api.patch("/down/{list_id}/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-def down_parent_position(
+@links_api.patch("/up/{list_id}/{user_id}", status_code=status.HTTP_200_OK)
+async def up_parent_position(
     admin_user: Annotated[
         UserWithInformations, Depends(get_current_user_with_informations)
     ],
+    request_session: Annotated[AsyncSession, Depends(get_request_session)],
     list_id: int = Annotated[int, Path(title="list_id")],
     user_id: int = Annotated[int, Path(title="user_id")],
-) -> None:
-    with unit_api("Tentative de changer la position d'un membre") as session:
-        parent_list = PARENTS_LIST_SERVICE.get_or_none(session, id=list_id)
-        if parent_list is None:
-            raise RessourceNotFoundException("La liste non trouvée")
+) -> list[PositionSchemaOut]:
+    return await move_parent(request_session, admin_user, list_id, user_id, -1)
 
-        if parent_list.id not in admin_user.parents_list_ids:
-            raise UnauthorizedException("Tu n'as pas accès à cette liste")
 
-        admin_user_list_link = LIST_LINK_SERVICE.get_or_none(
-            session,
-            user_id=admin_user.id,
-            list_id=parent_list.id,
-        )
-
-        if admin_user_list_link.is_admin is False:
-            raise UnauthorizedException("Tu n'es pas admin de cette liste")
-
-        user_to_change_position = LIST_LINK_SERVICE.get_or_none(
-            session,
-            user_id=user_id,
-            list_id=parent_list.id,
-        )
-
-        if user_to_change_position is None:
-            raise RessourceNotFoundException("L'utilisateur n'existe pas")
-
-        all_list_links = LIST_LINK_SERVICE.get_all_list_links_by_list_id(
-            session, parent_list.id
-        )
-
-        min_position = 1
-        max_position = len(all_list_links)
-
-        if (
-            min_position > user_to_change_position.position_in_list
-            or max_position <= user_to_change_position.position_in_list
-        ):
-            raise RessourceNotFoundException("Position invalide")
-
-        parent_to_toogle = LIST_LINK_SERVICE.get_or_none(
-            session,
-            list_id=parent_list.id,
-            position_in_list=user_to_change_position.position_in_list + 1,
-        )
+@links_api.patch("/down/{list_id}/{user_id}", status_code=status.HTTP_200_OK)
+async def down_parent_position(
+    admin_user: Annotated[
+        UserWithInformations, Depends(get_current_user_with_informations)
+    ],
+    request_session: Annotated[AsyncSession, Depends(get_request_session)],
+    list_id: int = Annotated[int, Path(title="list_id")],
+    user_id: int = Annotated[int, Path(title="user_id")],
+) -> list[PositionSchemaOut]:
+    return await move_parent(request_session, admin_user, list_id, user_id, 1)
 
-        if parent_to_toogle is None:
-            raise RessourceNotFoundException("Parent non trouvé")
 
-        initial_position = user_to_change_position.position_in_list
+@links_api.patch("/reorder/{list_id}", status_code=status.HTTP_200_OK)
+async def reorder_parents(
+    admin_user: Annotated[
+        UserWithInformations, Depends(get_current_user_with_informations)
+    ],
+    request_session: Annotated[AsyncSession, Depends(get_request_session)],
+    reorder: ReorderSchemaIn,
+    list_id: int = Annotated[int, Path(title="list_id")],
+) -> list[PositionSchemaOut]:
+    async with async_unit_api(
+        "Tentative de réordonner les membres", session=request_session
+    ) as session:
+        check_list_admin(admin_user, list_id)
 
-        LIST_LINK_SERVICE.update(
+        ordering = await LIST_LINK_SERVICE.areorder(
             session,
-            user_to_change_position.id,
-            position_in_list=initial_position + 1,
+            list_id,
+            user_ids=reorder.user_ids,
+            user_id=reorder.user_id,
+            position=reorder.position,
         )
 
-        LIST_LINK_SERVICE.update(
-            session,
-            parent_to_toogle.id,
-            position_in_list=initial_position,
-        )
+    return to_positions(ordering)
 
 
 @links_api.patch(
     "/make-admin/{list_id}/{user_id}", status_code=status.HTTP_204_NO_CONTENT
 )
-def make_user_admin(
+async def make_user_admin(
     admin_user: Annotated[
         UserWithInformations, Depends(get_current_user_with_informations)
     ],
+    request_session: Annotated[AsyncSession, Depends(get_request_session)],
     list_id: int = Annotated[int, Path(title="list_id")],
     user_id: int = Annotated[int, Path(title="user_id")],
 ) -> None:
-    with unit_api("Tentative de changer la position d'un membre") as session:
-        parent_list = PARENTS_LIST_SERVICE.get_or_none(session, id=list_id)
+    async with async_unit_api(
+        "Tentative de changer la position d'un membre", session=request_session
+    ) as session:
+        parent_list = await PARENTS_LIST_SERVICE.aget_or_none(session, id=list_id)
         if parent_list is None:
             raise RessourceNotFoundException("La liste non trouvée")
 
-        if parent_list.id not in admin_user.parents_list_ids:
-            raise UnauthorizedException("Tu n'as pas accès à cette liste")
-
-        admin_user_list_link = LIST_LINK_SERVICE.get_or_none(
-            session,
-            user_id=admin_user.id,
-            list_id=parent_list.id,
-        )
-
-        if admin_user_list_link.is_admin is False:
-            raise UnauthorizedException("Tu n'es pas admin de cette liste")
+        check_list_admin(admin_user, parent_list.id)
 
-        user_to_make_admin = LIST_LINK_SERVICE.get_or_none(
+        user_to_make_admin = await LIST_LINK_SERVICE.aget_or_none(
             session,
             user_id=user_id,
             list_id=parent_list.id,
@@ -283,23 +191,25 @@ def make_user_admin(
         if user_to_make_admin.position_in_list == 0:
             raise UnauthorizedException("L'utilisateur est en file d'attente")
 
-        LIST_LINK_SERVICE.update(
-            session,
-            user_to_make_admin.id,
-            is_admin=True,
+        await LIST_LINK_SERVICE.aupdate_where(
+            session, {"id": user_to_make_admin.id}, {"is_admin": True}
         )
+        await abump_token_versions(session, user_to_make_admin.user_id)
 
 
 @links_api.patch(
     "/transfer/{list_id}/{user_id}", status_code=status.HTTP_204_NO_CONTENT
 )
-def transfer_list_propriety(
+async def transfer_list_propriety(
     admin_user: Annotated[User, Depends(get_current_user)],
+    request_session: Annotated[AsyncSession, Depends(get_request_session)],
     list_id: int = Annotated[int, Path(title="list_id")],
     user_id: int = Annotated[int, Path(title="user_id")],
 ) -> None:
-    with unit_api("Tentative de transfert de propriété d'une liste") as session:
-        actual_list = PARENTS_LIST_SERVICE.get_or_none(session, id=list_id)
+    async with async_unit_api(
+        "Tentative de transfert de propriété d'une liste", session=request_session
+    ) as session:
+        actual_list = await PARENTS_LIST_SERVICE.aget_or_none(session, id=list_id)
         if actual_list is None:
             raise RessourceNotFoundException("La liste n'existe pas")
 
@@ -308,11 +218,13 @@ def transfer_list_propriety(
                 "Tu ne peux pas transférer la propriété d'une liste pour laquelle tu n'as pas la propriété"
             )
 
-        user_to_transfer = USER_SERVICE.get_or_none(session, id=user_id)
+        user_to_transfer = await USER_SERVICE.aget_or_none(session, id=user_id)
         if user_to_transfer is None:
             raise RessourceNotFoundException("L'utilisateur n'existe pas")
 
-        user_info = USER_INFORMATION_SERVICE.get_or_none(session, user_id=user_id)
+        user_info = await USER_INFORMATION_SERVICE.aget_or_none(
+            session, user_id=user_id
+        )
         if user_info is None:
             raise RessourceNotFoundException("L'utilisateur n'a pas d'informations")
 
@@ -321,21 +233,19 @@ def transfer_list_propriety(
                 "L'utilisateur cible n'a pas confirmé son email"
             )
 
-        PARENTS_LIST_SERVICE.update(
-            session,
-            actual_list.id,
-            creator_id=user_to_transfer.id,
+        await PARENTS_LIST_SERVICE.aupdate_where(
+            session, {"id": actual_list.id}, {"creator_id": user_to_transfer.id}
         )
 
-        user_to_transfer_list_link = LIST_LINK_SERVICE.get_or_none(
+        updated_rows = await LIST_LINK_SERVICE.aupdate_where(
             session,
-            user_id=user_to_transfer.id,
-            list_id=actual_list.id,
+            {"user_id": user_to_transfer.id, "list_id": actual_list.id},
+            {"is_admin": True},
         )
 
-        if user_to_transfer_list_link is None:
+        if updated_rows == 0:
             raise RessourceNotFoundException(
                 "L'utilisateur cible n'a pas rejoint cette liste"
             )
 
-        LIST_LINK_SERVICE.update(session, user_to_transfer_list_link.id, is_admin=True)
+        await abump_token_versions(session, user_to_transfer.id)
@@ -1,12 +1,29 @@
+from collections.abc import Iterator
 from enum import Enum
 from typing import Optional
 
-from sqlalchemy import Column, ForeignKey, Integer, select
+from sqlalchemy import (
+    Column,
+    ForeignKey,
+    Index,
+    Integer,
+    Row,
+    and_,
+    case,
+    select,
+    update,
+)
 from sqlmodel import Field, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.api.links.schemas import PARENT_INFORMATIONS, ParentInformation
+from app.api.parents_list.models import ParentsList
 from app.api.school.models import *  # Be sure import School before ListLink
+from app.api.user_information.models import UserInformation
+from app.commun.decryption import DECRYPTION_ENGINE
 from app.database.model_base import BaseSQLModel
 from app.database.repository import Repository
+from app.exceptions import InvalidPositionException, RessourceNotFoundException
 
 
 class UserOnListStatus(Enum):
@@ -21,6 +38,11 @@ class SchoolRelation(Enum):
 
 class ListLink(BaseSQLModel, table=True):
     __tablename__ = "list_links"
+    # Both composite indexes also serve the lookups on list_id alone
+    __table_args__ = (
+        Index("ix_list_links_list_id_user_id", "list_id", "user_id"),
+        Index("ix_list_links_list_id_position_in_list", "list_id", "position_in_list"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     status: UserOnListStatus
@@ -31,7 +53,9 @@ class ListLink(BaseSQLModel, table=True):
         sa_column=Column(Integer, ForeignKey("parents_lists.id", ondelete="CASCADE")),
     )
     user_id: int = Field(
-        sa_column=Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
+        sa_column=Column(
+            Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True
+        )
     )
 
 
@@ -52,13 +76,322 @@ class ListLinkService(Repository[ListLink]):
 
         return [item[0] for item in session.exec(statement).all()]
 
+    def lock_list(self, session: Session, list_id: int) -> None:
+        """
+        Lock the row of the list until the end of the transaction, so that
+        concurrent moves on the list queue up.
+
+        In its own statement: on PostgreSQL, a locking read joined to the
+        links would return the positions from before the move it waited for.
+        The reads that follow see the committed positions.
+        """
+        session.exec(
+            select(ParentsList.id).where(ParentsList.id == list_id).with_for_update()
+        )
+
+    def get_ordering(self, session: Session, list_id: int) -> dict[int, int]:
+        """Positions of the accepted members of a list by user id, in order."""
+        rows = session.exec(
+            select(ListLink.user_id, ListLink.position_in_list)
+            .where(
+                ListLink.list_id == list_id,
+                ListLink.status == UserOnListStatus.ACCEPTED,
+            )
+            .order_by(ListLink.position_in_list, ListLink.id)
+        ).all()
+
+        return {row.user_id: row.position_in_list for row in rows}
+
+    def swap_with_neighbor(
+        self, session: Session, list_id: int, user_id: int, offset: int
+    ) -> dict[int, int]:
+        """
+        Exchange the position of a member with the one `offset` places away
+        (-1 moves the member up, +1 down) in a single UPDATE ... CASE.
+
+        Returns the new ordering of the list, see `get_ordering`, or an empty
+        dict when the member or the neighbor doesn't exist (nothing is changed
+        then).
+        """
+        self.lock_list(session, list_id)
+        ordering = self.get_ordering(session, list_id)
+
+        member_position = ordering.get(user_id)
+        if member_position is None:
+            return {}
+
+        target_position = member_position + offset
+
+        neighbor_exists = (
+            select(ListLink.id)
+            .where(
+                ListLink.list_id == list_id,
+                ListLink.status == UserOnListStatus.ACCEPTED,
+                ListLink.position_in_list == target_position,
+            )
+            .exists()
+        )
+
+        # Positions are constants: each row is switched on its own value,
+        # whatever the order the database updates the two rows in
+        statement = (
+            update(ListLink)
+            .where(
+                ListLink.list_id == list_id,
+                ListLink.status == UserOnListStatus.ACCEPTED,
+                ListLink.position_in_list.in_([member_position, target_position]),
+                neighbor_exists,
+            )
+            .values(
+                position_in_list=case(
+                    (ListLink.position_in_list == member_position, target_position),
+                    else_=member_position,
+                )
+            )
+            .returning(ListLink.user_id, ListLink.position_in_list)
+            .execution_options(synchronize_session="fetch")
+        )
+        swapped = session.exec(statement).all()
+
+        if len(swapped) == 0:
+            return {}
+
+        ordering.update({row.user_id: row.position_in_list for row in swapped})
+
+        return dict(sorted(ordering.items(), key=lambda item: item[1]))
+
+    def reorder(
+        self,
+        session: Session,
+        list_id: int,
+        *,
+        user_ids: list[int] | None = None,
+        user_id: int | None = None,
+        position: int | None = None,
+    ) -> dict[int, int]:
+        """
+        Rewrite the positions of the accepted members of a list, either from
+        the full ordered `user_ids` or by moving `user_id` to `position`.
+
+        Whatever the size of the list, this costs three statements: the lock
+        of the list, the read of the current order and one UPDATE ... CASE on
+        the moved rows. Returns the new ordering, see `get_ordering`.
+        """
+        self.lock_list(session, list_id)
+        current_positions = self.get_ordering(session, list_id)
+        current_order = list(current_positions)
+
+        if user_ids is None:
+            if user_id not in current_positions:
+                raise RessourceNotFoundException(
+                    "L'utilisateur n'est pas dans la liste"
+                )
+
+            if position is None or not 1 <= position <= len(current_order):
+                raise InvalidPositionException(
+                    f"La position doit être comprise entre 1 et {len(current_order)}"
+                )
+
+            user_ids = [item for item in current_order if item != user_id]
+            user_ids.insert(position - 1, user_id)
+
+        if len(user_ids) != len(current_order) or set(user_ids) != set(current_order):
+            raise InvalidPositionException(
+                "Le nouvel ordre doit contenir chaque membre de la liste une fois"
+            )
+
+        new_positions = {
+            item: index
+            for index, item in enumerate(user_ids, start=1)
+            if current_positions[item] != index
+        }
+
+        moved = []
+        if len(new_positions) > 0:
+            statement = (
+                update(ListLink)
+                .where(
+                    ListLink.list_id == list_id,
+                    ListLink.status == UserOnListStatus.ACCEPTED,
+                    ListLink.user_id.in_(new_positions),
+                )
+                .values(position_in_list=case(new_positions, value=ListLink.user_id))
+                .returning(ListLink.user_id, ListLink.position_in_list)
+                .execution_options(synchronize_session="fetch")
+            )
+            moved = session.exec(statement).all()
+
+        ordering = current_positions | {
+            row.user_id: row.position_in_list for row in moved
+        }
+        expected_positions = list(range(1, len(ordering) + 1))
+        # A member with two links would be moved twice: the unit is rolled
+        # back rather than leaving gaps or duplicates in the list
+        if (
+            len(moved) != len(new_positions)
+            or sorted(ordering.values()) != expected_positions
+        ):
+            raise InvalidPositionException(
+                f"Les positions de la liste doivent aller de 1 à {len(ordering)}"
+            )
+
+        return dict(sorted(ordering.items(), key=lambda item: item[1]))
+
+    async def aswap_with_neighbor(
+        self, session: AsyncSession, list_id: int, user_id: int, offset: int
+    ) -> dict[int, int]:
+        return await session.run_sync(self.swap_with_neighbor, list_id, user_id, offset)
+
+    async def areorder(
+        self,
+        session: AsyncSession,
+        list_id: int,
+        *,
+        user_ids: list[int] | None = None,
+        user_id: int | None = None,
+        position: int | None = None,
+    ) -> dict[int, int]:
+        return await session.run_sync(
+            self.reorder,
+            list_id,
+            user_ids=user_ids,
+            user_id=user_id,
+            position=position,
+        )
+
+    async def aget_all_list_links_by_user_id(
+        self, session: AsyncSession, user_id: int
+    ) -> list[ListLink]:
+        return await session.run_sync(self.get_all_list_links_by_user_id, user_id)
+
+    async def aget_all_list_links_by_list_id(
+        self, session: AsyncSession, list_id: int
+    ) -> list[ListLink]:
+        return await session.run_sync(self.get_all_list_links_by_list_id, list_id)
+
+
+class ParentsRosterService:
+    """
+    Rosters are read in one statement, then their names are decrypted in one
+    batch by DECRYPTION_ENGINE (in processes for the largest lists).
+    """
+
+    def get_roster_rows(
+        self, session: Session, list_id: int, status: UserOnListStatus
+    ) -> list[Row] | None:
+        """
+        The members of a list with their encrypted names.
+
+        The list is the left side of the joins so that an unknown list (None)
+        can be told apart from a list without members (empty list).
+        """
+        statement = (
+            # build_roster unpacks the first five columns in this order
+            select(
+                ParentsList.creator_id,
+                ListLink.user_id,
+                ListLink.position_in_list,
+                ListLink.is_admin,
+                UserInformation.encrypted_email,
+                UserInformation.id,
+                UserInformation.encrypted_first_name,
+                UserInformation.encrypted_name,
+            )
+            .select_from(ParentsList)
+            .outerjoin(
+                ListLink,
+                and_(ListLink.list_id == ParentsList.id, ListLink.status == status),
+            )
+            .outerjoin(UserInformation, UserInformation.user_id == ListLink.user_id)
+            .where(ParentsList.id == list_id)
+            .order_by(ListLink.position_in_list, ListLink.id)
+        )
+        rows = session.exec(statement).all()
+
+        if len(rows) == 0:
+            return None
+
+        members = [row for row in rows if row.user_id is not None]
+        for row in members:
+            if row.id is None:
+                raise RessourceNotFoundException(
+                    f"L'utilisateur {row.user_id} n'a pas d'informations"
+                )
+
+        return members
+
+    @staticmethod
+    def encrypted_names(members: list[Row]) -> list[str]:
+        """First names, then last names: one batch to decrypt."""
+        return [row.encrypted_first_name for row in members] + [
+            row.encrypted_name for row in members
+        ]
+
+    @staticmethod
+    def roster_items(members: list[Row], names: list[str]) -> Iterator[dict]:
+        """The rows are unpacked in the order of `get_roster_rows`."""
+        first_names, last_names = names[: len(members)], names[len(members) :]
+
+        for row, first_name, last_name in zip(members, first_names, last_names):
+            creator_id, user_id, position_in_list, is_admin, encrypted_email = row[:5]
+            yield {
+                "user_id": user_id,
+                "first_name": first_name,
+                "last_name": last_name,
+                "position_in_list": position_in_list,
+                "is_email": encrypted_email is not None,
+                "is_admin": is_admin,
+                "is_creator": creator_id == user_id,
+            }
+
+    @classmethod
+    def build_roster(
+        cls, members: list[Row], names: list[str]
+    ) -> list[ParentInformation]:
+        """
+        The roster validated in one call, its items made as they are consumed:
+        named Row attributes and a model built per member cost twice as much
+        on large lists.
+        """
+        return PARENT_INFORMATIONS.validate_python(cls.roster_items(members, names))
+
+    def get_parents_in_list(
+        self, session: Session, list_id: int, status: UserOnListStatus
+    ) -> list[ParentInformation] | None:
+        members = self.get_roster_rows(session, list_id, status)
+        if members is None:
+            return None
+
+        names = DECRYPTION_ENGINE.decrypt_many(self.encrypted_names(members))
+
+        return self.build_roster(members, names)
+
+    async def aget_parents_in_list(
+        self, session: AsyncSession, list_id: int, status: UserOnListStatus
+    ) -> list[ParentInformation] | None:
+        members = await session.run_sync(self.get_roster_rows, list_id, status)
+        if members is None:
+            return None
+
+        # Off the session. On the loop, unless DECRYPTION_PROCESS_THRESHOLD sends
+        # a roster this large to the process pool (never when it is 0)
+        names = await DECRYPTION_ENGINE.adecrypt_many(self.encrypted_names(members))
+
+        return self.build_roster(members, names)
+
 
 class SchoolLink(BaseSQLModel, table=True):
     __tablename__ = "school_links"
+    # Also serves the lookups on user_id alone
+    __table_args__ = (
+        Index("ix_school_links_user_id_school_id", "user_id", "school_id"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     school_id: int = Field(
-        sa_column=Column(Integer, ForeignKey("schools.id", ondelete="CASCADE"))
+        sa_column=Column(
+            Integer, ForeignKey("schools.id", ondelete="CASCADE"), index=True
+        )
     )
     user_id: int = Field(
         sa_column=Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
@@ -76,6 +409,12 @@ class SchoolLinkService(Repository[SchoolLink]):
 
         return [item[0] for item in session.exec(statement).all()]
 
+    async def aget_all_school_links_by_user_id(
+        self, session: AsyncSession, user_id: int
+    ) -> list[SchoolLink]:
+        return await session.run_sync(self.get_all_school_links_by_user_id, user_id)
+
 
 LIST_LINK_SERVICE = ListLinkService()
+PARENTS_ROSTER_SERVICE = ParentsRosterService()
 SCHOOL_LINK_SERVICE = SchoolLinkService()
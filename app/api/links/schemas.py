@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter, model_validator
 
 
 class LinkListSchemaIn(BaseModel):
@@ -25,3 +25,30 @@ class ParentInformation(BaseModel):
     is_email: bool
     is_admin: bool
     is_creator: bool
+
+
+# Validates a whole roster in one call, and serializes it
+PARENT_INFORMATIONS = TypeAdapter(list[ParentInformation])
+
+
+class PositionSchemaOut(BaseModel):
+    user_id: int
+    position_in_list: int
+
+
+class ReorderSchemaIn(BaseModel):
+    """Either the full ordered `user_ids`, or one `user_id` and its new `position`."""
+
+    user_ids: list[int] | None = None
+    user_id: int | None = None
+    position: int | None = None
+
+    @model_validator(mode="after")
+    def check_one_form(self) -> "ReorderSchemaIn":
+        is_move = self.user_id is not None and self.position is not None
+        is_partial_move = (self.user_id is None) != (self.position is None)
+
+        if is_partial_move or is_move == (self.user_ids is not None):
+            raise ValueError("Give either user_ids, or user_id and position")
+
+        return self
@@ -1,7 +1,9 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Body, Depends, Path, status
+from fastapi import APIRouter, Body, Depends, Path, Query, status
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.api.links.models import (
     LIST_LINK_SERVICE,
@@ -17,10 +19,12 @@ from app.api.user_information.models import USER_INFORMATION_SERVICE
 from app.auth.models import USER_SERVICE, User
 from app.auth.token import (
     UserWithInformations,
+    abump_token_versions,
     get_current_user,
     get_current_user_with_informations,
 )
-from app.database.unit_of_work import unit_api
+from app.database.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, Page
+from app.database.unit_of_work import async_unit_api, get_request_session
 from app.emailmanager.send_email import (
     html_wrapper_for_join_request_notification,
     send_contact_message,
@@ -37,17 +41,28 @@ parents_list_router = APIRouter(
 
 
 @parents_list_router.get("/{school_code}", status_code=status.HTTP_200_OK)
-def get_parents_lists_by_school_code(
+async def get_parents_lists_by_school_code(
     school_code: str = Annotated[str, Path(title="school_code")],
-) -> list[ParentsList]:
-    with unit_api(
-        "Tentative de récupération de toutes les listes de l'école spécifiée"
+    cursor: Annotated[str | None, Query()] = None,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+) -> Page[ParentsList]:
+    """
+    List the parents lists of a school, one page at a time
+
+    Pass the `next_cursor` of a page as `cursor` to get the next one,
+    `next_cursor` is null on the last page.
+    """
+    async with async_unit_api(
+        "Tentative de récupération de toutes les listes de l'école spécifiée",
+        readonly=True,
     ) as session:
-        school = SCHOOL_SERVICE.get_or_none(session, code=school_code)
+        school = await SCHOOL_SERVICE.aget_or_none(session, code=school_code)
         if school is None:
             raise RessourceNotFoundException("Établissement non trouvé")
 
-        parents_lists = PARENTS_LIST_SERVICE.get_all_by_school_id(session, school.id)
+        parents_lists = await PARENTS_LIST_SERVICE.aget_page(
+            session, cursor, limit, school_id=school.id
+        )
 
         session.expunge_all()
 
@@ -55,23 +70,26 @@ def get_parents_lists_by_school_code(
 
 
 @parents_list_router.post("/", status_code=status.HTTP_201_CREATED)
-def create_parents_list(
+async def create_parents_list(
     current_user: Annotated[
         UserWithInformations, Depends(get_current_user_with_informations)
     ],
+    request_session: Annotated[AsyncSession, Depends(get_request_session)],
     payload: ParentsListSchemaIn,
 ) -> ParentsListSchemaOut:
-    with unit_api("Tentative de création d'une liste de parents") as session:
-        if current_user.email is None or not current_user.is_email_confirmed:
+    async with async_unit_api(
+        "Tentative de création d'une liste de parents", session=request_session
+    ) as session:
+        if not current_user.is_email_confirmed:
             raise RessourceNotFoundException(
                 "Tu ne peux pas créer une liste de parents sans email confirmé"
             )
 
-        school = SCHOOL_SERVICE.get_or_none(session, code=payload.school_code)
+        school = await SCHOOL_SERVICE.aget_or_none(session, code=payload.school_code)
         if school is None:
             raise RessourceNotFoundException("Impossible de trouver l'école")
 
-        school_link = SCHOOL_LINK_SERVICE.get_or_none(
+        school_link = await SCHOOL_LINK_SERVICE.aget_or_none(
             session, school_id=school.id, user_id=current_user.id
         )
 
@@ -91,9 +109,9 @@ def create_parents_list(
             school_id=school.id,
             creator_id=current_user.id,
         )
-        new_parent_list = PARENTS_LIST_SERVICE.create(session, new_parent_list)
+        new_parent_list = await PARENTS_LIST_SERVICE.acreate(session, new_parent_list)
 
-        list_link = ListLink(
+        list_link = ListLink.trusted(
             status=UserOnListStatus.ACCEPTED,
             position_in_list=1,
             is_admin=True,
@@ -101,7 +119,8 @@ def create_parents_list(
             user_id=current_user.id,
         )
 
-        LIST_LINK_SERVICE.create(session, list_link)
+        await LIST_LINK_SERVICE.acreate(session, list_link)
+        await abump_token_versions(session, current_user.id)
 
         session.expunge(new_parent_list)
 
@@ -113,29 +132,34 @@ class Message(BaseModel):
 
 
 @parents_list_router.post("/join/{list_id}", status_code=status.HTTP_200_OK)
-def ask_for_join_parents_list(
+async def ask_for_join_parents_list(
     current_user: Annotated[
         UserWithInformations, Depends(get_current_user_with_informations)
     ],
+    request_session: Annotated[AsyncSession, Depends(get_request_session)],
     list_id: int = Annotated[int, Path(title="list_id")],
     payload: Message = Annotated[Message, Body(embed=True)],
 ) -> ListLink:
-    with unit_api("Tentative d'ajout d'un membre à une liste de parents") as session:
-        list_to_join = PARENTS_LIST_SERVICE.get_or_none(session, id=list_id)
+    async with async_unit_api(
+        "Tentative d'ajout d'un membre à une liste de parents", session=request_session
+    ) as session:
+        list_to_join = await PARENTS_LIST_SERVICE.aget_or_none(session, id=list_id)
         if list_to_join is None:
             raise RessourceNotFoundException("La liste de parents n'existe pas")
 
         if list_to_join.id in current_user.parents_list_ids:
             raise RessourceNotFoundException("Tu as déjà rejoint cette liste")
 
-        school = SCHOOL_SERVICE.get_or_none(session, id=list_to_join.school_id)
+        school = await SCHOOL_SERVICE.aget_decrypted_by_id(
+            session, list_to_join.school_id
+        )
         if school is None:
             raise RessourceNotFoundException("Impossible de trouver l'école")
 
         if school.id not in current_user.school_ids:
             raise RessourceNotFoundException("Tu ne fais pas partie de cette école")
 
-        new_list_link = ListLink(
+        new_list_link = ListLink.trusted(
             status=UserOnListStatus.WAITING,
             position_in_list=0,  # 0 means in waiting position
             is_admin=False,
@@ -143,11 +167,12 @@ def ask_for_join_parents_list(
             user_id=current_user.id,
         )
 
-        new_list_link_created = LIST_LINK_SERVICE.create(session, new_list_link)
+        new_list_link_created = await LIST_LINK_SERVICE.acreate(session, new_list_link)
+        await abump_token_versions(session, current_user.id)
 
         session.expunge(new_list_link_created)
 
-        creator_user_info = USER_INFORMATION_SERVICE.get_or_none(
+        creator_user_info = await USER_INFORMATION_SERVICE.aget_or_none(
             session,
             id=list_to_join.creator_id,
         )
@@ -166,7 +191,8 @@ def ask_for_join_parents_list(
             list_name=list_to_join.list_name,
             message=payload.message,
         )
-        send_contact_message(
+        await run_in_threadpool(
+            send_contact_message,
             f"ParentsListMaker - {current_user.username} a demandé à rejoindre votre liste",
             html,
             to=creator_user_info.email,
@@ -176,18 +202,21 @@ def ask_for_join_parents_list(
 
 
 @parents_list_router.delete("/leave/{list_id}", status_code=status.HTTP_204_NO_CONTENT)
-def leave_parents_list(
+async def leave_parents_list(
     current_user: Annotated[User, Depends(get_current_user)],
+    request_session: Annotated[AsyncSession, Depends(get_request_session)],
     list_id: int = Annotated[int, Path(title="list_id")],
 ) -> None:
-    with unit_api("Tentative de quitter une liste de parents") as session:
-        requested_user_link = LIST_LINK_SERVICE.get_or_none(
+    async with async_unit_api(
+        "Tentative de quitter une liste de parents", session=request_session
+    ) as session:
+        requested_user_link = await LIST_LINK_SERVICE.aget_or_none(
             session,
             user_id=current_user.id,
             list_id=list_id,
         )
 
-        parent_list = PARENTS_LIST_SERVICE.get_or_none(session, id=list_id)
+        parent_list = await PARENTS_LIST_SERVICE.aget_or_none(session, id=list_id)
         if parent_list is None:
             raise RessourceNotFoundException("La liste de parents n'existe pas")
 
@@ -199,40 +228,39 @@ def leave_parents_list(
         if requested_user_link is None:
             raise RessourceNotFoundException("Tu n'as pas rejoint cette liste")
 
-        LIST_LINK_SERVICE.delete(session, requested_user_link.id)
+        await LIST_LINK_SERVICE.adelete(session, requested_user_link.id)
+        await abump_token_versions(session, current_user.id)
 
 
 @parents_list_router.patch(
     "/accept/{user_id}/{list_id}", status_code=status.HTTP_200_OK
 )
-def accept_parents_list(
+async def accept_parents_list(
     admin_user: Annotated[
         UserWithInformations, Depends(get_current_user_with_informations)
     ],
+    request_session: Annotated[AsyncSession, Depends(get_request_session)],
     user_id: int = Annotated[int, Path(title="user_id")],
     list_id: int = Annotated[int, Path(title="list_id")],
 ) -> ListLink:
-    with unit_api(f"Tentative d'accepter l'utilisateur {user_id}") as session:
-        list_to_join = PARENTS_LIST_SERVICE.get_or_none(session, id=list_id)
+    async with async_unit_api(
+        f"Tentative d'accepter l'utilisateur {user_id}", session=request_session
+    ) as session:
+        list_to_join = await PARENTS_LIST_SERVICE.aget_or_none(session, id=list_id)
         if list_to_join is None:
             raise RessourceNotFoundException("La liste n'existe pas")
 
-        admin_user_list_link = LIST_LINK_SERVICE.get_or_none(
-            session,
-            user_id=admin_user.id,
-            list_id=list_to_join.id,
-        )
-        if admin_user_list_link is None:
+        if list_to_join.id not in admin_user.parents_list_ids:
             raise RessourceNotFoundException("Tu n'as pas rejoint cette liste")
 
-        if admin_user_list_link.is_admin is False:
+        if list_to_join.id not in admin_user.admin_list_ids:
             raise UnauthorizedException("Tu n'est pas admin de cette liste")
 
-        user_to_accept = USER_SERVICE.get_or_none(session, id=user_id)
+        user_to_accept = await USER_SERVICE.aget_or_none(session, id=user_id)
         if user_to_accept is None:
             raise RessourceNotFoundException("L'utilisateur n'existe pas")
 
-        user_to_accept_list_link = LIST_LINK_SERVICE.get_or_none(
+        user_to_accept_list_link = await LIST_LINK_SERVICE.aget_or_none(
             session,
             user_id=user_to_accept.id,
             list_id=list_to_join.id,
@@ -242,7 +270,7 @@ def accept_parents_list(
                 "L'utilisateur n'a pas demandé à rejoindre cette liste"
             )
 
-        list_links = LIST_LINK_SERVICE.get_all_list_links_by_list_id(
+        list_links = await LIST_LINK_SERVICE.aget_all_list_links_by_list_id(
             session, list_to_join.id
         )
 
@@ -250,14 +278,19 @@ def accept_parents_list(
             list(filter(lambda x: x.status == UserOnListStatus.ACCEPTED, list_links))
         )
 
-        new_list_link = LIST_LINK_SERVICE.update(
+        [new_list_link] = await LIST_LINK_SERVICE.aupdate_where(
             session,
-            user_to_accept_list_link.id,
-            is_admin=False,
-            status=UserOnListStatus.ACCEPTED,
-            position_in_list=nb_members + 1,
+            {"id": user_to_accept_list_link.id},
+            {
+                "is_admin": False,
+                "status": UserOnListStatus.ACCEPTED,
+                "position_in_list": nb_members + 1,
+            },
+            returning=True,
         )
 
+        await abump_token_versions(session, user_to_accept.id)
+
         session.expunge(new_list_link)
 
     return new_list_link
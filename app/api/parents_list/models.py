@@ -1,7 +1,7 @@
 from typing import Optional
 
 from pydantic import field_validator
-from sqlalchemy import Column, ForeignKey, Integer, select
+from sqlalchemy import Column, ForeignKey, Index, Integer, select
 from sqlmodel import Field, Session
 
 from app.commun.validator import validate_string
@@ -11,6 +11,8 @@ from app.database.repository import Repository
 
 class ParentsList(BaseSQLModel, table=True):
     __tablename__ = "parents_lists"
+    # Keyset pagination of the lists of a school walks this index in order
+    __table_args__ = (Index("ix_parents_lists_school_id_id", "school_id", "id"),)
 
     id: Optional[int] = Field(default=None, primary_key=True)
     list_name: str = Field(unique=True)
@@ -2,6 +2,7 @@ import logging
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, Path, status
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.api.links.models import (
     SCHOOL_LINK_SERVICE,
@@ -13,10 +14,11 @@ from app.api.school.schemas import SchoolSchemaIn, SchoolSchemaMe, SchoolSchemaO
 from app.auth.models import User
 from app.auth.token import (
     UserWithInformations,
+    abump_token_versions,
     get_current_user,
     get_current_user_with_informations,
 )
-from app.database.unit_of_work import unit_api
+from app.database.unit_of_work import async_unit_api, get_request_session
 from app.exceptions import CannotCreateStillExistsException, RessourceNotFoundException
 
 logger = logging.getLogger(__name__)
@@ -28,62 +30,70 @@ school_router = APIRouter(
 
 
 @school_router.get("/me", status_code=status.HTTP_200_OK)
-def get_school_of_user(
+async def get_school_of_user(
     current_user: Annotated[
         UserWithInformations, Depends(get_current_user_with_informations)
     ],
+    request_session: Annotated[AsyncSession, Depends(get_request_session)],
 ) -> list[SchoolSchemaMe]:
-    with unit_api(
-        "Tentative de récupération de l'établissement de l'utilisateur"
+    async with async_unit_api(
+        "Tentative de récupération de l'établissement de l'utilisateur",
+        session=request_session,
     ) as session:
-        schools = []
+        schools_by_id = await SCHOOL_SERVICE.aget_map(
+            session, "id", current_user.school_ids
+        )
+        school_links = await SCHOOL_LINK_SERVICE.aget_map(
+            session, "school_id", current_user.school_ids, user_id=current_user.id
+        )
+
+        user_schools = []
         for school_id in current_user.school_ids:
-            school = SCHOOL_SERVICE.get_or_none(session, id=school_id)
+            school = schools_by_id.get(school_id)
             if school is None:
                 raise RessourceNotFoundException("Établissement non trouvé")
 
-            school_link = SCHOOL_LINK_SERVICE.get_or_none(
-                session, school_id=school_id, user_id=current_user.id
-            )
-
-            if school_link is None:
+            if school_id not in school_links:
                 raise RessourceNotFoundException(
                     "Lien entre établissement et utilisateur non trouvé"
                 )
 
-            school_with_relation = SchoolSchemaMe(
-                id=school.id,
-                school_name=school.school_name,
-                city=school.city,
-                zip_code=school.zip_code,
-                country=school.country,
-                adress=school.adress,
-                school_relation=school_link.school_relation.value,
+            user_schools.append(school)
+
+        schools = [
+            SchoolSchemaMe(
+                **decrypted_school.model_dump(),
+                school_relation=school_links[school.id].school_relation.value,
                 code=school.code,
             )
-
-            schools.append(school_with_relation)
+            for school, decrypted_school in zip(
+                user_schools, School.to_decrypted_many(user_schools)
+            )
+        ]
 
     return schools
 
 
 @school_router.get("/{school_code}", status_code=status.HTTP_200_OK)
-def get_school_by_school_code(
+async def get_school_by_school_code(
     school_code: str = Annotated[str, Path(title="school_code")],
 ) -> SchoolSchemaOut:
-    with unit_api("Tentative de récupération de l'établissement") as session:
-        school = SCHOOL_SERVICE.get_or_none(session, code=school_code)
-        if school is None:
+    async with async_unit_api(
+        "Tentative de récupération de l'établissement", readonly=True
+    ) as session:
+        decrypted_school = await SCHOOL_SERVICE.aget_decrypted_by_code(
+            session, school_code
+        )
+        if decrypted_school is None:
             raise RessourceNotFoundException("Établissement non trouvé")
 
-        decrypted_school = school.to_decrypted()
-
     return decrypted_school
 
 
 @school_router.post("/", status_code=status.HTTP_201_CREATED)
-def create_school(
+async def create_school(
     current_user: Annotated[User, Depends(get_current_user)],
+    request_session: Annotated[AsyncSession, Depends(get_request_session)],
     payload: SchoolSchemaIn,
 ) -> SchoolSchemaOut:
     """
@@ -93,7 +103,9 @@ def create_school(
     He must've a link object
     """
 
-    with unit_api("Tentative de création d'établissement") as session:
+    async with async_unit_api(
+        "Tentative de création d'établissement", session=request_session
+    ) as session:
         school = School(
             school_name=payload.school_name,
             city=payload.city,
@@ -104,15 +116,16 @@ def create_school(
             code=payload.code,
         )
 
-        created_school = SCHOOL_SERVICE.create(session, school)
+        created_school = await SCHOOL_SERVICE.acreate(session, school)
 
-        school_link = SchoolLink(
+        school_link = SchoolLink.trusted(
             school_id=created_school.id,
             user_id=current_user.id,
-            school_relation=payload.school_relation,
+            school_relation=SchoolRelation(payload.school_relation),
         )
 
-        SCHOOL_LINK_SERVICE.create(session, school_link)
+        await SCHOOL_LINK_SERVICE.acreate(session, school_link)
+        await abump_token_versions(session, current_user.id)
 
         session.expunge(created_school)
 
@@ -124,8 +137,9 @@ def create_school(
 
 
 @school_router.get("/join/{school_code}", status_code=status.HTTP_200_OK)
-def join_school(
+async def join_school(
     current_user: Annotated[User, Depends(get_current_user)],
+    request_session: Annotated[AsyncSession, Depends(get_request_session)],
     school_code: Annotated[str, Path(title="school_code")],
 ) -> SchoolSchemaOut:
     """
@@ -134,25 +148,26 @@ def join_school(
     User must be logger in to create a school.
     He must've a link object
     """
-    with unit_api("Tentative de rejoindre un établissement") as session:
-        school = SCHOOL_SERVICE.get_or_none(session, code=school_code)
+    async with async_unit_api(
+        "Tentative de rejoindre un établissement", session=request_session
+    ) as session:
+        school = await SCHOOL_SERVICE.aget_decrypted_by_code(session, school_code)
         if school is None:
             raise RessourceNotFoundException("Établissement non trouvé")
 
-        user_link = SCHOOL_LINK_SERVICE.get_or_none(
+        user_link = await SCHOOL_LINK_SERVICE.aget_or_none(
             session, user_id=current_user.id, school_id=school.id
         )
         if user_link is not None:
             raise CannotCreateStillExistsException("L'utilisateur est déjà membre")
 
-        school_link = SchoolLink(
+        school_link = SchoolLink.trusted(
             school_id=school.id,
             user_id=current_user.id,
             school_relation=SchoolRelation.PARENT,
         )
 
-        SCHOOL_LINK_SERVICE.create(session, school_link)
-
-        session.expunge(school)
+        await SCHOOL_LINK_SERVICE.acreate(session, school_link)
+        await abump_token_versions(session, current_user.id)
 
-    return school.to_decrypted()
+    return school
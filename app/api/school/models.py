@@ -1,14 +1,23 @@
+from collections.abc import Sequence
 from functools import cached_property
-from typing import Optional
+from typing import Any, Optional
 
 from pydantic import field_validator
-from sqlmodel import Field
+from sqlalchemy import event
+from sqlmodel import Field, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.api.school.schemas import SchoolSchemaOut
+from app.commun.cache import TTLCache
 from app.commun.crypto import decrypt, encrypt
+from app.commun.decryption import DECRYPTION_ENGINE
 from app.commun.validator import validate_code, validate_string
 from app.database.model_base import BaseSQLModel
 from app.database.repository import Repository
+from app.settings import SCHOOL_CACHE_SIZE, SCHOOL_CACHE_TTL
+
+# Stored as encrypted_<name>
+ENCRYPTED_FIELDS = ("school_name", "city", "zip_code", "country", "adress")
 
 
 class School(BaseSQLModel, table=True):
@@ -86,9 +95,125 @@ class School(BaseSQLModel, table=True):
             adress=self.adress,
         )
 
+    @classmethod
+    def to_decrypted_many(cls, schools: Sequence["School"]) -> list[SchoolSchemaOut]:
+        """`to_decrypted` of every school, decrypted one column at a time."""
+        columns = [
+            DECRYPTION_ENGINE.decrypt_many(
+                [getattr(school, f"encrypted_{name}") for school in schools]
+            )
+            for name in ENCRYPTED_FIELDS
+        ]
+
+        return [
+            SchoolSchemaOut(id=school.id, **dict(zip(ENCRYPTED_FIELDS, values)))
+            for school, values in zip(schools, zip(*columns))
+        ]
+
+
+# Decrypted schools by ("code", code) and by ("id", id)
+SCHOOL_CACHE: TTLCache[SchoolSchemaOut] = TTLCache(SCHOOL_CACHE_SIZE, SCHOOL_CACHE_TTL)
+
+
+def clear_school_cache_on_commit(session: Session) -> None:
+    session.info["clear_school_cache"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def clear_school_cache(session: Session) -> None:
+    if session.info.pop("clear_school_cache", False):
+        SCHOOL_CACHE.clear()
+
+
+@event.listens_for(Session, "after_rollback")
+def keep_school_cache(session: Session) -> None:
+    session.info.pop("clear_school_cache", None)
+
 
 class SchoolService(Repository[School]):
+    """
+    Decrypted schools are served from SCHOOL_CACHE. Schools are rarely
+    written: the writes of this service clear it all once their unit is
+    committed, so that no request caches the former row again in between.
+    Other workers may serve their copy until SCHOOL_CACHE_TTL.
+    """
+
     __model__ = School
 
+    def get_decrypted_by_code(
+        self, session: Session, code: str
+    ) -> SchoolSchemaOut | None:
+        return self._get_decrypted(session, "code", code)
+
+    def get_decrypted_by_id(self, session: Session, id_: int) -> SchoolSchemaOut | None:
+        return self._get_decrypted(session, "id", id_)
+
+    def _get_decrypted(
+        self, session: Session, field: str, value: Any
+    ) -> SchoolSchemaOut | None:
+        decrypted_school = SCHOOL_CACHE.get((field, value))
+        if decrypted_school is not None:
+            return decrypted_school
+
+        school = self.get_or_none(session, **{field: value})
+        if school is None:
+            return None
+
+        decrypted_school = school.to_decrypted()
+        SCHOOL_CACHE.set(("code", school.code), decrypted_school)
+        SCHOOL_CACHE.set(("id", school.id), decrypted_school)
+
+        return decrypted_school
+
+    def create(self, session: Session, item: School) -> School:
+        item = super().create(session, item)
+        clear_school_cache_on_commit(session)
+
+        return item
+
+    def update(self, session: Session, id_: int, **kwargs) -> School:
+        item = super().update(session, id_, **kwargs)
+        clear_school_cache_on_commit(session)
+
+        return item
+
+    def trusted_update(self, session: Session, id_: int, **kwargs) -> School:
+        item = super().trusted_update(session, id_, **kwargs)
+        clear_school_cache_on_commit(session)
+
+        return item
+
+    def update_where(self, session: Session, *args, **kwargs) -> int | list[School]:
+        result = super().update_where(session, *args, **kwargs)
+        clear_school_cache_on_commit(session)
+
+        return result
+
+    def bulk_update(self, session: Session, rows: list[dict[str, Any]]) -> None:
+        super().bulk_update(session, rows)
+        clear_school_cache_on_commit(session)
+
+    def delete(self, session: Session, id_: int) -> bool:
+        is_deleted = super().delete(session, id_)
+        clear_school_cache_on_commit(session)
+
+        return is_deleted
+
+    async def aupdate(self, session: AsyncSession, id_: int, **kwargs) -> School:
+        item = await super().aupdate(session, id_, **kwargs)
+        clear_school_cache_on_commit(session.sync_session)
+
+        return item
+
+    async def aget_decrypted_by_code(
+        self, session: AsyncSession, code: str
+    ) -> SchoolSchemaOut | None:
+        return await session.run_sync(self.get_decrypted_by_code, code)
+
+    async def aget_decrypted_by_id(
+        self, session: AsyncSession, id_: int
+    ) -> SchoolSchemaOut | None:
+        return await session.run_sync(self.get_decrypted_by_id, id_)
+
 
 SCHOOL_SERVICE = SchoolService()
@@ -1,16 +1,20 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Response, status
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.api.user_information.models import USER_INFORMATION_SERVICE, UserInformation
 from app.api.user_information.schema import (
+    USER_INFORMATION_OUT,
     UserInformationSchemaIn,
     UserInformationSchemaOut,
 )
 from app.auth.models import User
 from app.auth.token import get_current_user
 from app.commun.crypto import generate_confirmation_token
-from app.database.unit_of_work import unit_api
+from app.commun.responses import json_response
+from app.database.unit_of_work import async_unit_api, get_request_session
 from app.emailmanager.models import (
     EMAIL_CONFIRMATION_TOKEN_SERVICE,
     EmailConfirmationToken,
@@ -28,12 +32,15 @@ user_information_router = APIRouter(
 
 
 @user_information_router.post("/", status_code=status.HTTP_201_CREATED)
-def create_users_informations(
+async def create_users_informations(
     current_user: Annotated[User, Depends(get_current_user)],
+    request_session: Annotated[AsyncSession, Depends(get_request_session)],
     user_information: UserInformationSchemaIn,
 ) -> UserInformation:
-    with unit_api("Tentative de création d'informations utilisateur") as session:
-        existing_user_information = USER_INFORMATION_SERVICE.get_or_none(
+    async with async_unit_api(
+        "Tentative de création d'informations utilisateur", session=request_session
+    ) as session:
+        existing_user_information = await USER_INFORMATION_SERVICE.aget_or_none(
             session, user_id=current_user.id
         )
         if existing_user_information is not None:
@@ -41,6 +48,13 @@ def create_users_informations(
                 "Utilisateur a déjà des informations"
             )
 
+        if user_information.email is not None:
+            owner = await USER_INFORMATION_SERVICE.aget_by_email(
+                session, user_information.email
+            )
+            if owner is not None:
+                raise CannotCreateStillExistsException("Email déjà utilisé")
+
         item = UserInformation(
             name=user_information.name,
             first_name=user_information.first_name,
@@ -48,18 +62,23 @@ def create_users_informations(
             user_id=current_user.id,
         )
 
-        item = USER_INFORMATION_SERVICE.create(session, item)
+        item = await USER_INFORMATION_SERVICE.acreate(session, item)
 
         if item.email is not None:
             token = generate_confirmation_token()
-            email_confirmation_token = EmailConfirmationToken(
+            email_confirmation_token = EmailConfirmationToken.trusted(
                 token=token,
                 user_id=current_user.id,
             )
-            EMAIL_CONFIRMATION_TOKEN_SERVICE.create(session, email_confirmation_token)
+            await EMAIL_CONFIRMATION_TOKEN_SERVICE.acreate(
+                session, email_confirmation_token
+            )
             html = html_wrapper_for_confirmation_email_with_token(token)
-            send_contact_message(
-                "ParentsListMaker - Confirmez votre email", html, to=item.email
+            await run_in_threadpool(
+                send_contact_message,
+                "ParentsListMaker - Confirmez votre email",
+                html,
+                to=item.email,
             )
 
         session.expunge(item)
@@ -67,18 +86,21 @@ def create_users_informations(
     return item
 
 
-@user_information_router.get("/", status_code=status.HTTP_200_OK)
-def read_users_informations(
+@user_information_router.get(
+    "/", status_code=status.HTTP_200_OK, response_model=UserInformationSchemaOut
+)
+async def read_users_informations(
     current_user: Annotated[User, Depends(get_current_user)],
-) -> UserInformationSchemaOut:
-    with unit_api("Tentative de lecture des informations utilisateur") as session:
-        user_informations = USER_INFORMATION_SERVICE.get_or_none(
-            session, user_id=current_user.id
+    request_session: Annotated[AsyncSession, Depends(get_request_session)],
+) -> Response:
+    async with async_unit_api(
+        "Tentative de lecture des informations utilisateur", session=request_session
+    ) as session:
+        user_informations = await USER_INFORMATION_SERVICE.aget_decrypted_by_user_id(
+            session, current_user.id
         )
 
         if user_informations is None:
             raise RessourceNotFoundException("Utilisateur n'a pas d'informations")
 
-        session.expunge(user_informations)
-
-    return user_informations.to_decrypted()
+    return json_response(USER_INFORMATION_OUT, user_informations)
@@ -1,17 +1,28 @@
 from functools import cached_property
-from typing import Optional
+from typing import Any, Optional
 
-from pydantic import field_validator
-from sqlalchemy import Column, ForeignKey, Integer
-from sqlmodel import Field
+from pydantic import field_validator, model_validator
+from sqlalchemy import Column, ForeignKey, Integer, select
+from sqlmodel import Field, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.api.user_information.schema import UserInformationSchemaOut
-from app.commun.crypto import decrypt, encrypt
+from app.commun.crypto import blind_index, decrypt, decrypt_many, encrypt
 from app.commun.validator import validate_email, validate_string
 from app.database.model_base import BaseSQLModel
 from app.database.repository import Repository
 
 
+def email_blind_index(email: str) -> str:
+    return blind_index(email.strip().lower())
+
+
+class EncryptedEmail(str):
+    """Ciphertext of an email, with the blind index of its plaintext."""
+
+    blind_index: str
+
+
 class UserInformation(BaseSQLModel, table=True):
     __tablename__ = "user_informations"
 
@@ -19,9 +30,15 @@ class UserInformation(BaseSQLModel, table=True):
     encrypted_name: str = Field(alias="name")
     encrypted_first_name: str = Field(alias="first_name")
     encrypted_email: Optional[str] = Field(unique=True, default=None, alias="email")
+    # Fernet is randomized: lookups and uniqueness go through the blind index
+    email_hash: Optional[str] = Field(
+        default=None, unique=True, index=True, exclude=True
+    )
     is_email_confirmed: bool = Field(default=False)
     user_id: int = Field(
-        sa_column=Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
+        sa_column=Column(
+            Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True
+        )
     )
 
     @cached_property
@@ -46,7 +63,35 @@ class UserInformation(BaseSQLModel, table=True):
 
         value = validate_email(value)
 
-        return encrypt(value)
+        encrypted_email = EncryptedEmail(encrypt(value))
+        encrypted_email.blind_index = email_blind_index(value)
+
+        return encrypted_email
+
+    @model_validator(mode="after")
+    def sync_email_hash(self) -> "UserInformation":
+        # Assigned, not written in __dict__, so that SQLAlchemy saves it
+        encrypted_email = self.encrypted_email
+        if isinstance(encrypted_email, EncryptedEmail):
+            if self.email_hash != encrypted_email.blind_index:
+                self.email_hash = encrypted_email.blind_index
+        elif encrypted_email is None and self.email_hash is not None:
+            self.email_hash = None
+
+        return self
+
+    def trusted_update(self, **values: Any) -> None:
+        # The blind index follows the email, as sync_email_hash does on validation
+        if "encrypted_email" in values:
+            encrypted_email = values["encrypted_email"]
+            if encrypted_email is None:
+                values["email_hash"] = None
+            elif isinstance(encrypted_email, EncryptedEmail):
+                values["email_hash"] = encrypted_email.blind_index
+            else:
+                values["email_hash"] = email_blind_index(decrypt(encrypted_email))
+
+        super().trusted_update(**values)
 
     @field_validator("encrypted_name")
     def name_format(cls, value: str) -> str:
@@ -71,5 +116,43 @@ class UserInformation(BaseSQLModel, table=True):
 class UserInformationService(Repository[UserInformation]):
     __model__ = UserInformation
 
+    def get_by_email(self, session: Session, email: str) -> UserInformation | None:
+        """Index lookup on the blind index, nothing is decrypted."""
+        return self.get_or_none(session, email_hash=email_blind_index(email))
+
+    async def aget_by_email(
+        self, session: AsyncSession, email: str
+    ) -> UserInformation | None:
+        return await session.run_sync(self.get_by_email, email)
+
+    def get_decrypted_by_user_id(
+        self, session: Session, user_id: int
+    ) -> UserInformationSchemaOut | None:
+        """
+        The informations of a user read as a row of columns, without building
+        the model: both names are decrypted in one batch.
+        """
+        row = session.exec(
+            select(
+                UserInformation.encrypted_name,
+                UserInformation.encrypted_first_name,
+                UserInformation.is_email_confirmed,
+            ).where(UserInformation.user_id == user_id)
+        ).first()
+        if row is None:
+            return None
+
+        encrypted_name, encrypted_first_name, is_email_confirmed = row
+        name, first_name = decrypt_many((encrypted_name, encrypted_first_name))
+
+        return UserInformationSchemaOut(
+            name=name, first_name=first_name, is_email=is_email_confirmed
+        )
+
+    async def aget_decrypted_by_user_id(
+        self, session: AsyncSession, user_id: int
+    ) -> UserInformationSchemaOut | None:
+        return await session.run_sync(self.get_decrypted_by_user_id, user_id)
+
 
 USER_INFORMATION_SERVICE = UserInformationService()
@@ -1,6 +1,6 @@
 from typing import Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 
 
 class UserInformationSchemaIn(BaseModel):
@@ -13,3 +13,6 @@ class UserInformationSchemaOut(BaseModel):
     name: str
     first_name: str
     is_email: bool
+
+
+USER_INFORMATION_OUT = TypeAdapter(UserInformationSchemaOut)
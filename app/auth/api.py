@@ -2,18 +2,22 @@ from typing import Annotated
 
 from fastapi import APIRouter, Depends, status
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.auth.models import USER_SERVICE
 from app.auth.token import (
+    TOKEN_VERSIONS,
+    USER_CACHE,
     Token,
     User,
-    UserWithInformations,
+    UserWithEmail,
     authenticate_user,
-    create_access_token,
+    create_user_token,
     get_current_user,
-    get_current_user_with_informations,
+    get_current_user_with_email,
 )
-from app.database.unit_of_work import unit_api
+from app.commun.hashing import HASHING_EXECUTOR
+from app.database.unit_of_work import async_unit_api, get_request_session
 from app.exceptions import (
     CannotCreateStillExistsException,
     RessourceNotFoundException,
@@ -26,61 +30,87 @@ auth_router = APIRouter(
 
 
 @auth_router.post("/token")
-def login_for_access_token(
+async def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
 ) -> Token:
-    with unit_api("Tentative de connexion") as session:
-        user = authenticate_user(session, form_data.username, form_data.password)
+    async with async_unit_api("Tentative de connexion") as session:
+        user = await authenticate_user(session, form_data.username, form_data.password)
         if user is None:
             raise UnauthorizedException("Nom d'utilisateur ou mot de passe incorrect")
 
-        token = create_access_token({"sub": user.username})
+        token = await create_user_token(session, user)
+
+    return token
+
+
+@auth_router.post("/token/refresh")
+async def refresh_access_token(
+    current_user: Annotated[User, Depends(get_current_user)],
+    request_session: Annotated[AsyncSession, Depends(get_request_session)],
+) -> Token:
+    """New token for the current user, with up to date claims (CLAIMS_TOKENS)."""
+    async with async_unit_api(
+        "Tentative de renouvellement du token",
+        readonly=True,
+        session=request_session,
+    ) as session:
+        token = await create_user_token(session, current_user)
 
     return token
 
 
 @auth_router.post("/register", status_code=status.HTTP_201_CREATED)
-def register_user(
+async def register_user(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
 ) -> Token:
-    with unit_api("Tentative de création d'utilisateur") as session:
-        existing_user = USER_SERVICE.get_or_none(session, username=form_data.username)
+    async with async_unit_api("Tentative de création d'utilisateur") as session:
+        existing_user = await USER_SERVICE.aget_or_none(
+            session, username=form_data.username
+        )
 
         if existing_user is not None:
             raise CannotCreateStillExistsException("Nom d'utilisateur déjà enregistré")
 
-        new_user = User(username=form_data.username, password=form_data.password)
-        new_user = USER_SERVICE.create(session, new_user)
+        # Building a User hashes its password with bcrypt
+        new_user = await HASHING_EXECUTOR.run(
+            User, username=form_data.username, password=form_data.password
+        )
+        new_user = await USER_SERVICE.acreate(session, new_user)
 
-        token = create_access_token({"sub": new_user.username})
+        token = await create_user_token(session, new_user)
 
     return token
 
 
 @auth_router.get("/users/me/")
-def read_users_me(
+async def read_users_me(
     current_user: Annotated[User, Depends(get_current_user)],
 ) -> User:
     return current_user
 
 
 @auth_router.get("/users/me/details/")
-def read_users_me_details(
-    current_user: Annotated[
-        UserWithInformations, Depends(get_current_user_with_informations)
-    ],
-) -> UserWithInformations:
+async def read_users_me_details(
+    current_user: Annotated[UserWithEmail, Depends(get_current_user_with_email)],
+) -> UserWithEmail:
     return current_user
 
 
 @auth_router.delete("/users/me/")
-def delete_users_me(
+async def delete_users_me(
     current_user: Annotated[User, Depends(get_current_user)],
+    request_session: Annotated[AsyncSession, Depends(get_request_session)],
 ) -> None:
-    with unit_api("Tentative de suppression de l'utilisateur") as session:
-        is_deleted = USER_SERVICE.delete(session, current_user.id)
+    async with async_unit_api(
+        "Tentative de suppression de l'utilisateur", session=request_session
+    ) as session:
+        is_deleted = await USER_SERVICE.adelete(session, current_user.id)
 
         if is_deleted is False:
             raise RessourceNotFoundException("Impossible de supprimer l'utilisateur")
 
+    USER_CACHE.invalidate(current_user.username)
+    # Its claims tokens no longer match a cached version
+    TOKEN_VERSIONS.invalidate(current_user.id)
+
     return None
@@ -15,6 +15,8 @@ class User(BaseSQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     username: str = Field(unique=True)
     hashed_password: str = Field(alias="password")
+    # Bumped when the claims of the user change, see app.auth.token
+    token_version: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
 
     @field_validator("username")
     def username_format(cls, value: str) -> str:
@@ -6,16 +6,28 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
 from pydantic import BaseModel
+from sqlalchemy import String, cast, event, func, select
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.api.links.models import LIST_LINK_SERVICE, SCHOOL_LINK_SERVICE
-from app.api.user_information.models import USER_INFORMATION_SERVICE
+from app.api.links.models import ListLink, SchoolLink
+from app.api.user_information.models import UserInformation
 from app.auth.models import USER_SERVICE, User
-from app.commun.crypto import verify_password
+from app.commun.cache import TTLCache
+from app.commun.crypto import decrypt, verify_and_update_password
 from app.commun.decorators import safe_execution
-from app.database.unit_of_work import unit_api
+from app.commun.hashing import HASHING_EXECUTOR
+from app.database.unit_of_work import async_unit_api, get_request_session
 from app.exceptions import UnauthorizedException
-from app.settings import ACCESS_TOKEN_EXPIRE_MINUTES, ALGORITHM, SECRET_KEY
+from app.settings import (
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    ALGORITHM,
+    CLAIMS_TOKENS,
+    SECRET_KEY,
+    TOKEN_VERSION_CACHE_TTL,
+    USER_CACHE_SIZE,
+    USER_CACHE_TTL,
+)
 
 CREDENTIALS_EXCEPTION = HTTPException(
     status_code=status.HTTP_401_UNAUTHORIZED,
@@ -29,21 +41,61 @@ class Token(BaseModel):
     token_type: str
 
 
+class UserWithInformations(BaseModel):
+    # The claims of claims tokens: signed but not encrypted, so no email
+    id: int
+    username: str
+    is_email_confirmed: bool
+    parents_list_ids: list[int]
+    school_ids: list[int]
+    admin_list_ids: list[int] = []
+
+
+class UserWithEmail(UserWithInformations):
+    email: str | None
+
+
 class TokenData(BaseModel):
     username: str | None = None
+    # Claims tokens only, see `create_user_token`
+    version: int | None = None
+    claims: UserWithInformations | None = None
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 
-@safe_execution
-def authenticate_user(session: Session, username: str, password: str) -> User | None:
-    user = USER_SERVICE.get_or_raise(session, username=username)
-    is_auth = verify_password(password, user.hashed_password)
+USER_CACHE: TTLCache[User] = TTLCache(USER_CACHE_SIZE, USER_CACHE_TTL)
+# token_version by user id, only read for claims tokens
+TOKEN_VERSIONS: TTLCache[int] = TTLCache(USER_CACHE_SIZE, TOKEN_VERSION_CACHE_TTL)
+
+
+async def authenticate_user(
+    session: AsyncSession, username: str, password: str
+) -> User | None:
+    user = await USER_SERVICE.aget_or_none(session, username=username)
+    if user is None:
+        return None
+
+    verification = await HASHING_EXECUTOR.run(
+        safe_execution(verify_and_update_password), password, user.hashed_password
+    )
+
+    if verification is None:
+        return None
+
+    is_auth, new_hashed_password = verification
 
-    if is_auth is False:
+    if not is_auth:
         return None
 
+    if new_hashed_password is not None:
+        # Rolls a BCRYPT_ROUNDS change out one login at a time
+        await USER_SERVICE.aupdate_where(
+            session, {"id": user.id}, {"hashed_password": new_hashed_password}
+        )
+        USER_CACHE.invalidate(user.username)
+
     return user
 
 
@@ -57,78 +109,261 @@ def create_access_token(data: dict) -> Token:
     return Token(access_token=encoded_jwt, token_type="bearer")
 
 
-async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]) -> User:
-    with unit_api("Tentative de récupération de l'utilisateur du token") as session:
+def decode_token(token: str) -> TokenData:
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except InvalidTokenError:
+        raise UnauthorizedException("Token invalide")
+
+    username: str | None = payload.get("sub")
+
+    if username is None:
+        raise UnauthorizedException("Utilisateur non trouvé dans le token")
+
+    claims = payload.get("usr")
+
+    return TokenData(
+        username=username,
+        version=payload.get("ver"),
+        claims=UserWithInformations.model_validate(claims) if claims else None,
+    )
+
+
+async def create_user_token(session: AsyncSession, user: User) -> Token:
+    """
+    Access token of `user`.
+
+    With CLAIMS_TOKENS, the token also carries its UserWithInformations and
+    the `token_version` of the user: `get_current_user_with_informations`
+    then trusts it without reading the database, until the version is bumped
+    by `abump_token_versions`. Anyone holding the token can decode it, so the
+    email is left out, see `get_current_user_with_email`. A user without
+    informations yet gets a plain token.
+    """
+    data = {"sub": user.username}
+
+    if CLAIMS_TOKENS:
+        # Version first: claims read after a bump then only make a stale token
+        version = await session.scalar(
+            select(User.token_version).where(User.id == user.id)
+        )
         try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            username: str | None = payload.get("sub")
+            user_with_informations = await session.run_sync(
+                get_user_with_informations, user.username
+            )
+        except UnauthorizedException:
+            user_with_informations = None
 
-            if username is None:
-                raise UnauthorizedException("Utilisateur non trouvé dans le token")
+        if user_with_informations is not None:
+            TOKEN_VERSIONS.set(user.id, version)
+            data["ver"] = version
+            data["usr"] = user_with_informations.model_dump(
+                include=set(UserWithInformations.model_fields)
+            )
 
-            token_data = TokenData(username=username)
+    return create_access_token(data)
 
-        except InvalidTokenError:
-            raise UnauthorizedException("Token invalide")
 
-        user = USER_SERVICE.get_or_none(session, username=token_data.username)
+async def aget_token_version(session: AsyncSession, user_id: int) -> int | None:
+    """
+    Current token_version of the user, from TOKEN_VERSIONS when possible.
 
-        if user is None:
-            raise UnauthorizedException("Utilisateur non trouvé")
+    A bump invalidates the entry of this process only: other workers may
+    accept the stale claims until TOKEN_VERSION_CACHE_TTL.
+    """
+    version = TOKEN_VERSIONS.get(user_id)
+    if version is not None:
+        return version
 
-        session.expunge(user)
+    version = await session.scalar(select(User.token_version).where(User.id == user_id))
+    if version is not None:
+        TOKEN_VERSIONS.set(user_id, version)
 
-    return user
+    return version
 
 
-class UserWithInformations(BaseModel):
-    id: int
-    username: str
-    email: str | None
-    is_email_confirmed: bool
-    parents_list_ids: list[int]
-    school_ids: list[int]
+async def abump_token_versions(session: AsyncSession, *user_ids: int) -> None:
+    """
+    Make the claims tokens of `user_ids` stale.
 
+    Call it in the unit changing their lists, schools, admin flags or email.
+    TOKEN_VERSIONS forgets them once the unit is committed.
+    """
+    await USER_SERVICE.aupdate_where(
+        session,
+        {"id": user_ids},
+        {"token_version": User.token_version + 1},
+    )
+    session.sync_session.info.setdefault("stale_token_user_ids", set()).update(user_ids)
 
-async def get_current_user_with_informations(
-    token: Annotated[str, Depends(oauth2_scheme)],
-) -> UserWithInformations:
-    with unit_api("Tentative de récupération de l'utilisateur du token") as session:
-        try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            username: str | None = payload.get("sub")
 
-            if username is None:
-                raise UnauthorizedException("Utilisateur non trouvé dans le token")
+@event.listens_for(Session, "after_commit")
+def forget_stale_token_versions(session: Session) -> None:
+    for user_id in session.info.pop("stale_token_user_ids", ()):
+        TOKEN_VERSIONS.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def keep_token_versions(session: Session) -> None:
+    session.info.pop("stale_token_user_ids", None)
+
 
-            token_data = TokenData(username=username)
-        except InvalidTokenError:
-            raise UnauthorizedException("Token invalide")
+async def aget_user_by_username(session: AsyncSession, username: str) -> User | None:
+    """
+    Detached user, from USER_CACHE when possible.
 
-        user = USER_SERVICE.get_or_none(session, username=token_data.username)
+    Deleting a user or changing a password invalidates its entry in this
+    process only: other workers may use their copy until USER_CACHE_TTL.
+    """
+    user = USER_CACHE.get(username)
+    if user is not None:
+        return user
+
+    user = await USER_SERVICE.aget_or_none(session, username=username)
+    if user is not None:
+        session.expunge(user)
+        USER_CACHE.set(username, user)
+
+    return user
+
+
+async def get_current_user(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    request_session: Annotated[AsyncSession, Depends(get_request_session)],
+) -> User:
+    async with async_unit_api(
+        "Tentative de récupération de l'utilisateur du token",
+        readonly=True,
+        session=request_session,
+    ) as session:
+        token_data = decode_token(token)
+
+        user = await aget_user_by_username(session, token_data.username)
 
         if user is None:
             raise UnauthorizedException("Utilisateur non trouvé")
 
-        user_information = USER_INFORMATION_SERVICE.get_or_none(
-            session, user_id=user.id
-        )
+    return user
 
-        if user_information is None:
-            raise UnauthorizedException("Utilisateur n'a pas d'informations")
 
-        list_links = LIST_LINK_SERVICE.get_all_list_links_by_user_id(session, user.id)
-        school_links = SCHOOL_LINK_SERVICE.get_all_school_links_by_user_id(
-            session, user.id
+def get_user_with_informations(session: Session, username: str) -> UserWithEmail | None:
+    """
+    Assemble UserWithEmail in one statement.
+
+    The ids of the lists and of the schools of the user are aggregated in
+    correlated subqueries (string_agg on PostgreSQL, group_concat on SQLite).
+    """
+    parents_list_ids = (
+        select(func.aggregate_strings(cast(ListLink.list_id, String), ","))
+        .where(ListLink.user_id == User.id)
+        .scalar_subquery()
+    )
+    admin_list_ids = (
+        select(func.aggregate_strings(cast(ListLink.list_id, String), ","))
+        .where(ListLink.user_id == User.id, ListLink.is_admin)
+        .scalar_subquery()
+    )
+    school_ids = (
+        select(func.aggregate_strings(cast(SchoolLink.school_id, String), ","))
+        .where(SchoolLink.user_id == User.id)
+        .scalar_subquery()
+    )
+    statement = (
+        select(
+            User.id,
+            User.username,
+            UserInformation.id.label("user_information_id"),
+            UserInformation.encrypted_email,
+            UserInformation.is_email_confirmed,
+            parents_list_ids.label("parents_list_ids"),
+            school_ids.label("school_ids"),
+            admin_list_ids.label("admin_list_ids"),
         )
+        .outerjoin(UserInformation, UserInformation.user_id == User.id)
+        .where(User.username == username)
+    )
+    row = session.exec(statement).first()
+
+    if row is None:
+        return None
+
+    if row.user_information_id is None:
+        raise UnauthorizedException("Utilisateur n'a pas d'informations")
+
+    return UserWithEmail(
+        id=row.id,
+        username=row.username,
+        email=(
+            decrypt(row.encrypted_email) if row.encrypted_email is not None else None
+        ),
+        is_email_confirmed=row.is_email_confirmed,
+        parents_list_ids=split_ids(row.parents_list_ids),
+        school_ids=split_ids(row.school_ids),
+        admin_list_ids=split_ids(row.admin_list_ids),
+    )
+
+
+def split_ids(aggregated_ids: str | None) -> list[int]:
+    if aggregated_ids is None:
+        return []
+
+    return [int(item) for item in aggregated_ids.split(",")]
+
 
-        user_with_informations = UserWithInformations(
-            id=user.id,
-            username=user.username,
-            email=user_information.email,
-            is_email_confirmed=user_information.is_email_confirmed,
-            parents_list_ids=[link.list_id for link in list_links],
-            school_ids=[link.school_id for link in school_links],
+async def get_current_user_with_informations(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    request_session: Annotated[AsyncSession, Depends(get_request_session)],
+) -> UserWithInformations:
+    async with async_unit_api(
+        "Tentative de récupération de l'utilisateur du token",
+        readonly=True,
+        session=request_session,
+    ) as session:
+        token_data = decode_token(token)
+
+        if token_data.claims is not None:
+            version = await aget_token_version(session, token_data.claims.id)
+            if version is not None and version == token_data.version:
+                return token_data.claims
+
+        # Plain or stale token
+        user_with_informations = await session.run_sync(
+            get_user_with_informations, token_data.username
         )
 
+        if user_with_informations is None:
+            raise UnauthorizedException("Utilisateur non trouvé")
+
     return user_with_informations
+
+
+async def get_current_user_with_email(
+    current_user: Annotated[
+        UserWithInformations, Depends(get_current_user_with_informations)
+    ],
+    request_session: Annotated[AsyncSession, Depends(get_request_session)],
+) -> UserWithEmail:
+    """
+    The current user with its email, for the routes showing or sending it.
+
+    Plain and stale tokens already read it: only claims tokens, which don't
+    carry it, need this query.
+    """
+    if isinstance(current_user, UserWithEmail):
+        return current_user
+
+    async with async_unit_api(
+        "Tentative de récupération de l'email de l'utilisateur",
+        readonly=True,
+        session=request_session,
+    ) as session:
+        encrypted_email = await session.scalar(
+            select(UserInformation.encrypted_email).where(
+                UserInformation.user_id == current_user.id
+            )
+        )
+
+    return UserWithEmail(
+        **current_user.model_dump(),
+        email=decrypt(encrypted_email) if encrypted_email is not None else None,
+    )
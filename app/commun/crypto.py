@@ -1,40 +1,146 @@
 import base64
+import hashlib
+import hmac
 import secrets
 import string
+from collections.abc import Iterable
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from random import choices
 
 import jwt
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
 from passlib.context import CryptContext
 
-from app.settings import AES_KEY, SECRET_KEY
+from app.settings import AES_KEYS, BCRYPT_ROUNDS, BLIND_INDEX_KEY, SECRET_KEY
 
-PWD_CONTEXT = CryptContext(schemes=["bcrypt"], deprecated="auto")
+PWD_CONTEXT = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS
+)
 
 
 def generate_confirmation_token() -> str:
     return secrets.token_urlsafe(nbytes=32)
 
 
-def encrypt(string_to_encrypt: str, key: bytes = AES_KEY) -> str:
-    frnt = Fernet(key)
-    encrypted = frnt.encrypt(string_to_encrypt.encode())
+# Encrypted columns store this prefix and the Fernet token, which is already
+# URL-safe base64. Values without it are in the legacy format, the token
+# base64 encoded once more (a third larger): `decrypt` reads both.
+CIPHERTEXT_PREFIX = "f1:"
 
-    return base64.urlsafe_b64encode(encrypted).decode()
+# A key, or a key ring: the primary key first, then the former keys
+Key = bytes | tuple[bytes, ...]
 
 
-def decrypt(string_to_decrypt: str, key: bytes = AES_KEY) -> str:
-    frnt = Fernet(key)
-    decrypted = frnt.decrypt(base64.urlsafe_b64decode(string_to_decrypt))
+@lru_cache(maxsize=8)
+def get_cipher(key: Key = AES_KEYS) -> MultiFernet:
+    """
+    Cipher of `key`, built once: it decodes and splits the keys. It encrypts
+    with the primary key and decrypts with any key of the ring.
+    """
+    keys = (key,) if isinstance(key, bytes) else key
+
+    return MultiFernet([Fernet(one_key) for one_key in keys])
+
+
+def is_legacy_ciphertext(stored: str) -> bool:
+    return not stored.startswith(CIPHERTEXT_PREFIX)
+
+
+def ciphertext_to_token(stored: str) -> bytes:
+    """Fernet token of a stored value, in either format."""
+    if is_legacy_ciphertext(stored):
+        return base64.urlsafe_b64decode(stored)
+
+    return stored[len(CIPHERTEXT_PREFIX) :].encode()
+
+
+def compact_ciphertext(stored: str) -> str:
+    """A stored value in the current format, re-encoded without decrypting it."""
+    return CIPHERTEXT_PREFIX + ciphertext_to_token(stored).decode()
+
+
+def needs_rotation(stored: str, key: Key = AES_KEYS) -> bool:
+    """Whether a stored value isn't in the current format with the primary key."""
+    if is_legacy_ciphertext(stored):
+        return True
+
+    primary_key = key if isinstance(key, bytes) else key[0]
+    try:
+        get_cipher(primary_key).decrypt(ciphertext_to_token(stored))
+    except InvalidToken:
+        return True
+
+    return False
+
+
+def rotate(stored: str, key: Key = AES_KEYS) -> str:
+    """A stored value encrypted again with the primary key, in the current format."""
+    token = get_cipher(key).rotate(ciphertext_to_token(stored))
+
+    return CIPHERTEXT_PREFIX + token.decode()
+
+
+def encrypt(string_to_encrypt: str, key: Key = AES_KEYS) -> str:
+    token = get_cipher(key).encrypt(string_to_encrypt.encode())
+
+    return CIPHERTEXT_PREFIX + token.decode()
+
+
+def decrypt(string_to_decrypt: str, key: Key = AES_KEYS) -> str:
+    decrypted = get_cipher(key).decrypt(ciphertext_to_token(string_to_decrypt))
 
     return decrypted.decode()
 
 
+def blind_index(value: str, key: bytes = BLIND_INDEX_KEY) -> str:
+    """
+    Keyed HMAC of `value`: equal values give equal indexes, so an encrypted
+    column can be looked up and made unique through it.
+    """
+    return hmac.new(key, value.encode(), hashlib.sha256).hexdigest()
+
+
+def encrypt_many(
+    strings_to_encrypt: Iterable[str | None], key: Key = AES_KEYS
+) -> list[str | None]:
+    """`encrypt` a column of values, None (a nullable column) is kept as is."""
+    frnt = get_cipher(key)
+
+    return [
+        None
+        if value is None
+        else CIPHERTEXT_PREFIX + frnt.encrypt(value.encode()).decode()
+        for value in strings_to_encrypt
+    ]
+
+
+def decrypt_many(
+    strings_to_decrypt: Iterable[str | None], key: Key = AES_KEYS
+) -> list[str | None]:
+    """`decrypt` a column of values, None (a nullable column) is kept as is."""
+    frnt = get_cipher(key)
+
+    return [
+        None if value is None else frnt.decrypt(ciphertext_to_token(value)).decode()
+        for value in strings_to_decrypt
+    ]
+
+
 def verify_password(plain_password, hashed_password):
     return PWD_CONTEXT.verify(plain_password, hashed_password)
 
 
+def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    """
+    Verify the password, and hash it again when `hashed_password` wasn't
+    made with the current BCRYPT_ROUNDS (the new hash, else None).
+    """
+    return PWD_CONTEXT.verify_and_update(plain_password, hashed_password)
+
+
 def get_password_hash(password):
     return PWD_CONTEXT.hash(password)
 
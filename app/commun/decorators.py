@@ -7,8 +7,8 @@ def safe_execution(func):
     def wrapper(*args, **kwargs):
         try:
             return func(*args, **kwargs)
-        except Exception as e:
-            logger.exception(e)
+        except Exception:
+            logger.exception(f"{func.__name__} a échoué")
             return None
 
     return wrapper
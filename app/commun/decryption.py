@@ -0,0 +1,117 @@
+import asyncio
+import math
+import multiprocessing
+import threading
+from collections.abc import Sequence
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
+from typing import Any
+
+from app.commun.crypto import Key, decrypt_many
+from app.settings import AES_KEYS, DECRYPTION_PROCESS_THRESHOLD, DECRYPTION_PROCESSES
+
+
+class DecryptionEngine:
+    """
+    `decrypt_many` in the calling thread for small batches, split across a
+    pool of processes from `process_threshold` values on.
+
+    AES and HMAC hold the GIL: threads can't decrypt in parallel, processes
+    can. Below the threshold, sending the values to the processes costs more
+    than it saves (see benchmarks/bench_decryption_engine.py). A threshold of
+    0 never uses the processes.
+
+    The pool is started at the first large batch, with `spawn`: forking a
+    process running threads and an event loop isn't safe.
+    """
+
+    def __init__(self, process_threshold: int, processes: int) -> None:
+        self.process_threshold = process_threshold
+        self.processes = processes
+        self._lock = threading.Lock()
+        self._pool: ProcessPoolExecutor | None = None
+        self.in_thread_batches = 0
+        self.process_batches = 0
+
+    def uses_processes(self, nb_values: int) -> bool:
+        return 0 < self.process_threshold <= nb_values and self.processes > 0
+
+    def decrypt_many(
+        self, values: Sequence[str | None], key: Key = AES_KEYS
+    ) -> list[str | None]:
+        if not self.uses_processes(len(values)):
+            self._count(in_thread=True)
+            return decrypt_many(values, key)
+
+        return self._gather([future.result() for future in self._submit(values, key)])
+
+    async def adecrypt_many(
+        self, values: Sequence[str | None], key: Key = AES_KEYS
+    ) -> list[str | None]:
+        """
+        Same as `decrypt_many`, without blocking the event loop on the pool.
+
+        A batch under the threshold is still decrypted on the loop.
+        """
+        if not self.uses_processes(len(values)):
+            self._count(in_thread=True)
+            return decrypt_many(values, key)
+
+        chunks = await asyncio.gather(
+            *(asyncio.wrap_future(future) for future in self._submit(values, key))
+        )
+
+        return self._gather(chunks)
+
+    def _submit(
+        self, values: Sequence[str | None], key: Key
+    ) -> list[Future[list[str | None]]]:
+        self._count(in_thread=False)
+        pool = self._get_pool()
+        chunk_size = math.ceil(len(values) / self.processes)
+        decrypt_chunk = partial(decrypt_many, key=key)
+
+        return [
+            pool.submit(decrypt_chunk, list(values[start : start + chunk_size]))
+            for start in range(0, len(values), chunk_size)
+        ]
+
+    @staticmethod
+    def _gather(chunks: list[list[str | None]]) -> list[str | None]:
+        return [value for chunk in chunks for value in chunk]
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+
+            return self._pool
+
+    def _count(self, in_thread: bool) -> None:
+        with self._lock:
+            if in_thread:
+                self.in_thread_batches += 1
+            else:
+                self.process_batches += 1
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def statistics(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "process_threshold": self.process_threshold,
+                "processes": self.processes,
+                "pool_started": self._pool is not None,
+                "in_thread_batches": self.in_thread_batches,
+                "process_batches": self.process_batches,
+            }
+
+
+DECRYPTION_ENGINE = DecryptionEngine(DECRYPTION_PROCESS_THRESHOLD, DECRYPTION_PROCESSES)
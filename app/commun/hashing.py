@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from app.exceptions import ServiceUnavailableException
+from app.settings import HASHING_QUEUE_SIZE, HASHING_WORKERS
+
+R = TypeVar("R")
+
+
+class HashingExecutor:
+    """
+    Dedicated threads for bcrypt, so a burst of logins can't take every
+    thread of the AnyIO pool used by the rest of the application.
+
+    At most `max_workers` hashes run at once and `max_queue` wait for a
+    thread, beyond that `run` refuses the work. A job counts as pending until
+    its thread is done with it, even when the awaiting request was cancelled.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int) -> None:
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="hashing"
+        )
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    async def run(self, func: Callable[..., R], *args: Any, **kwargs: Any) -> R:
+        with self._lock:
+            if self.pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise ServiceUnavailableException(
+                    "Trop de connexions en cours, réessaie dans un instant"
+                )
+            self.pending += 1
+
+        submitted_at = time.perf_counter()
+
+        def job() -> R:
+            self._observe_wait(time.perf_counter() - submitted_at)
+            return func(*args, **kwargs)
+
+        future = self._executor.submit(job)
+        # Added before wrap_future's own callback: counted by the time run returns
+        future.add_done_callback(self._observe_done)
+        return await asyncio.wrap_future(future)
+
+    def _observe_done(self, future: Future) -> None:
+        with self._lock:
+            self.pending -= 1
+            if future.cancelled():
+                self.cancelled += 1
+            elif future.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+    def _observe_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.total_wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def statistics(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "pending": self.pending,
+                "completed": self.completed,
+                "failed": self.failed,
+                "cancelled": self.cancelled,
+                "rejected": self.rejected,
+                "total_wait_ms": round(self.total_wait_seconds * 1000, 3),
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+            }
+
+
+HASHING_EXECUTOR = HashingExecutor(HASHING_WORKERS, HASHING_QUEUE_SIZE)
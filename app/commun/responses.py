@@ -0,0 +1,14 @@
+from typing import TypeVar
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+T = TypeVar("T")
+
+
+def json_response(adapter: TypeAdapter[T], content: T) -> Response:
+    """
+    `content`, already validated, serialized once by `adapter`. FastAPI sends
+    a Response as is: the route's response_model only documents it.
+    """
+    return Response(adapter.dump_json(content), media_type="application/json")
@@ -0,0 +1,85 @@
+"""
+Compute the email blind index of the rows written before it existed.
+
+    python -m app.database.backfill_email_hashes
+
+A page of rows is decrypted and updated per transaction. A row whose email
+the application changed in the meantime is left alone: its validator already
+wrote the index. Two rows with the same email can't both get it, the unique
+index rejects the page: fix the duplicate, then run the command again.
+"""
+
+import argparse
+import logging
+
+from sqlalchemy import Engine, bindparam, update
+from sqlmodel import Session
+
+from app.api.user_information.models import (
+    USER_INFORMATION_SERVICE,
+    UserInformation,
+    email_blind_index,
+)
+from app.commun.crypto import decrypt_many
+from app.database.pagination import MAX_PAGE_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+def backfill_email_hashes(engine: Engine, batch_size: int = MAX_PAGE_SIZE) -> int:
+    """Index every email without one, returns how many were indexed."""
+    table = UserInformation.__table__
+    # Compare and swap: only the email that was read gets its index
+    statement = (
+        update(table)
+        .where(
+            table.c.id == bindparam("row_id"),
+            table.c.encrypted_email == bindparam("read_email"),
+            table.c.email_hash.is_(None),
+        )
+        .values(email_hash=bindparam("new_email_hash"))
+    )
+    backfilled = 0
+
+    cursor = None
+    while True:
+        with Session(engine) as session:
+            page = USER_INFORMATION_SERVICE.get_batch(session, cursor, batch_size)
+            items = [
+                item
+                for item in page.items
+                if item.encrypted_email is not None and item.email_hash is None
+            ]
+            emails = decrypt_many(item.encrypted_email for item in items)
+            rows = [
+                {
+                    "row_id": item.id,
+                    "read_email": item.encrypted_email,
+                    "new_email_hash": email_blind_index(email),
+                }
+                for item, email in zip(items, emails)
+            ]
+            # Not the rows the application changed in the meantime
+            indexed = (
+                session.connection().execute(statement, rows).rowcount if rows else 0
+            )
+            session.commit()
+
+        backfilled += indexed
+        logger.info(f"user_informations: {indexed} emails indexed")
+
+        if page.next_cursor is None:
+            break
+        cursor = page.next_cursor
+
+    return backfilled
+
+
+if __name__ == "__main__":
+    from app.database.unit_of_work import engine
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch-size", type=int, default=MAX_PAGE_SIZE)
+    args = parser.parse_args()
+
+    print(f"{backfill_email_hashes(engine, args.batch_size)} emails indexed")
@@ -0,0 +1,100 @@
+"""
+Rewrite the encrypted columns still in the legacy format in the compact one.
+
+    python -m app.database.compact_ciphertexts
+
+Values are re-encoded, not decrypted. A page of rows is rewritten per
+transaction, and a value the application changed in the meantime is left
+alone, so the command can run next to the application.
+"""
+
+import argparse
+import logging
+
+from sqlalchemy import Engine, bindparam, update
+from sqlmodel import Session
+
+from app.api.school.models import ENCRYPTED_FIELDS, SCHOOL_SERVICE
+from app.api.user_information.models import USER_INFORMATION_SERVICE
+from app.commun.crypto import compact_ciphertext, is_legacy_ciphertext
+from app.database.pagination import MAX_PAGE_SIZE
+from app.database.repository import Repository
+
+logger = logging.getLogger(__name__)
+
+ENCRYPTED_COLUMNS: dict[Repository, tuple[str, ...]] = {
+    SCHOOL_SERVICE: tuple(f"encrypted_{name}" for name in ENCRYPTED_FIELDS),
+    USER_INFORMATION_SERVICE: (
+        "encrypted_name",
+        "encrypted_first_name",
+        "encrypted_email",
+    ),
+}
+
+
+def compact_page(session: Session, repository: Repository, items: list) -> int:
+    table = repository.__model__.__table__
+    rewritten = 0
+
+    for column in ENCRYPTED_COLUMNS[repository]:
+        rows = [
+            {
+                "row_id": item.id,
+                "legacy": getattr(item, column),
+                "compact": compact_ciphertext(getattr(item, column)),
+            }
+            for item in items
+            if getattr(item, column) is not None
+            and is_legacy_ciphertext(getattr(item, column))
+        ]
+        if not rows:
+            continue
+
+        # Compare and swap: only the value that was read is replaced
+        statement = (
+            update(table)
+            .where(
+                table.c.id == bindparam("row_id"),
+                table.c[column] == bindparam("legacy"),
+            )
+            .values({column: bindparam("compact")})
+        )
+        # Not the rows the application changed in the meantime
+        rewritten += session.connection().execute(statement, rows).rowcount
+
+    return rewritten
+
+
+def compact_ciphertexts(engine: Engine, batch_size: int = MAX_PAGE_SIZE) -> int:
+    """Rewrite every legacy value, returns how many were rewritten."""
+    rewritten = 0
+
+    for repository in ENCRYPTED_COLUMNS:
+        cursor = None
+        while True:
+            with Session(engine) as session:
+                page = repository.get_batch(session, cursor, batch_size)
+                rewritten_in_page = compact_page(session, repository, page.items)
+                session.commit()
+
+            rewritten += rewritten_in_page
+            logger.info(
+                f"{repository.__model__.__tablename__}: "
+                f"{rewritten_in_page} values rewritten"
+            )
+
+            if page.next_cursor is None:
+                break
+            cursor = page.next_cursor
+
+    return rewritten
+
+
+if __name__ == "__main__":
+    from app.database.unit_of_work import engine
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch-size", type=int, default=MAX_PAGE_SIZE)
+    args = parser.parse_args()
+
+    print(f"{compact_ciphertexts(engine, args.batch_size)} values rewritten")
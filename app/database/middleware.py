@@ -0,0 +1,63 @@
+import math
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import cookie_parser
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.database.replica import LAST_WRITE_COOKIE, RecentWrite, current_recent_write
+from app.settings import PRODUCTION, READ_YOUR_WRITES_WINDOW
+
+
+class ReadYourWritesMiddleware:
+    """
+    Route the reads of a client who just wrote to the primary.
+
+    The time of its last write is carried by the `last_write` cookie, so the
+    window holds whichever worker serves the next request. A client which
+    does not send cookies back reads from the replica.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        recent_write = RecentWrite(last_write_from_scope(scope))
+        reset_token = current_recent_write.set(recent_write)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and recent_write.has_written:
+                headers = MutableHeaders(scope=message)
+                headers.append("Set-Cookie", last_write_cookie(recent_write))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_recent_write.reset(reset_token)
+
+
+def last_write_from_scope(scope: Scope) -> float | None:
+    for name, value in scope["headers"]:
+        if name == b"cookie":
+            last_write = cookie_parser(value.decode("latin-1")).get(LAST_WRITE_COOKIE)
+            try:
+                return float(last_write) if last_write is not None else None
+            except ValueError:
+                return None
+
+    return None
+
+
+def last_write_cookie(recent_write: RecentWrite) -> str:
+    cookie = (
+        f"{LAST_WRITE_COOKIE}={recent_write.last_write:.3f}; "
+        f"Max-Age={math.ceil(READ_YOUR_WRITES_WINDOW)}; Path=/; HttpOnly; SameSite=Lax"
+    )
+    if PRODUCTION:
+        cookie += "; Secure"
+
+    return cookie
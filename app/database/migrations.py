@@ -0,0 +1,106 @@
+import logging
+
+from sqlalchemy import Connection, Engine, Index, inspect
+from sqlalchemy.schema import CreateColumn
+from sqlmodel import SQLModel
+
+logger = logging.getLogger(__name__)
+
+
+def create_missing_columns(engine: Engine) -> list[str]:
+    """
+    Add the columns declared on the models but missing from the database.
+
+    A column added to an existing table must be nullable or have a server
+    default, for the rows already there.
+    """
+    created: list[str] = []
+
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        existing_tables = set(inspector.get_table_names())
+
+        for table in SQLModel.metadata.tables.values():
+            if table.name not in existing_tables:
+                continue
+
+            existing_columns = {
+                column["name"] for column in inspector.get_columns(table.name)
+            }
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+
+                column_definition = CreateColumn(column).compile(
+                    dialect=connection.dialect
+                )
+                logger.info(f"Adding column {column.name} to {table.name}")
+                connection.exec_driver_sql(
+                    f"ALTER TABLE {table.name} ADD COLUMN {column_definition}"
+                )
+                created.append(f"{table.name}.{column.name}")
+
+    return created
+
+
+def create_missing_indexes(engine: Engine) -> list[str]:
+    """
+    Create the indexes declared on the models but missing from the database.
+
+    `create_all` only creates the indexes of the tables it creates: databases
+    created before an index was declared need this to catch up.
+
+    On PostgreSQL they are created CONCURRENTLY, without locking the writes
+    to their table. An interrupted run may leave an INVALID index behind: drop
+    it, and run again.
+    """
+    created: list[str] = []
+    concurrently = engine.dialect.name == "postgresql"
+
+    if concurrently:
+        # CREATE INDEX CONCURRENTLY can't run in a transaction
+        connect = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+    else:
+        connect = engine.begin()
+
+    with connect as connection:
+        inspector = inspect(connection)
+        existing_tables = set(inspector.get_table_names())
+
+        for table in SQLModel.metadata.tables.values():
+            if table.name not in existing_tables:
+                continue
+
+            existing_indexes = {
+                index["name"] for index in inspector.get_indexes(table.name)
+            }
+            for index in table.indexes:
+                if index.name in existing_indexes:
+                    continue
+
+                logger.info(f"Creating index {index.name} on {table.name}")
+                create_index(connection, index, concurrently)
+                created.append(index.name)
+
+    return created
+
+
+def create_index(connection: Connection, index: Index, concurrently: bool) -> None:
+    if not concurrently:
+        index.create(connection)
+        return
+
+    # Only for this statement: create_all runs in a transaction
+    options = index.dialect_options["postgresql"]
+    options["concurrently"] = True
+    try:
+        index.create(connection)
+    finally:
+        options["concurrently"] = False
+
+
+if __name__ == "__main__":
+    from app.database.unit_of_work import engine
+
+    create_missing_columns(engine)
+    create_missing_indexes(engine)
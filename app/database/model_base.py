@@ -1,8 +1,61 @@
+from functools import cache, cached_property
+from typing import Any, Self
+
 from pydantic import ConfigDict
+from sqlalchemy.orm import class_mapper
+from sqlalchemy.orm.attributes import set_attribute
 from sqlmodel import SQLModel
 
+
+@cache
+def _cached_properties(cls: type) -> tuple[str, ...]:
+    return tuple(
+        name
+        for klass in cls.__mro__
+        for name, attribute in vars(klass).items()
+        if isinstance(attribute, cached_property)
+    )
+
+
 # Modify sqlModel to force type validation
 
 
 class BaseSQLModel(SQLModel):
     model_config = ConfigDict(validate_assignment=True)
+
+    @classmethod
+    def trusted(cls, **values: Any) -> Self:
+        """
+        Build a model from values that are already valid, without running the
+        validators: read from the database, made by the application, already
+        encrypted or hashed. Fields are given by name, not alias.
+
+        User input goes through the constructor, which validates each field.
+        """
+        # Like a row loaded by SQLAlchemy: its __init__ isn't called
+        item = class_mapper(cls).class_manager.new_instance()
+        defaults = {
+            name: field.get_default(call_default_factory=True)
+            for name, field in cls.model_fields.items()
+            if name not in values and not field.is_required()
+        }
+        item.trusted_update(**defaults, **values)
+        object.__setattr__(item, "__pydantic_fields_set__", set(values))
+
+        return item
+
+    def trusted_update(self, **values: Any) -> None:
+        """Assign values that are already valid, see `trusted`."""
+        model_fields = type(self).model_fields
+        for name, value in values.items():
+            if name not in model_fields:
+                raise AttributeError(f"{type(self).__name__} has no field {name}")
+
+            # Through SQLAlchemy only, which records the change to flush
+            set_attribute(self, name, value)
+
+        self.__pydantic_fields_set__.update(values)
+
+        # The decrypted values cached from the former ones
+        for name in _cached_properties(type(self)):
+            self.__dict__.pop(name, None)
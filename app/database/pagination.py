@@ -0,0 +1,38 @@
+import base64
+import binascii
+import json
+from typing import Generic, TypeVar
+
+from pydantic import BaseModel
+
+from app.exceptions import InvalidCursorException
+
+T = TypeVar("T")
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class Page(BaseModel, Generic[T]):
+    items: list[T]
+    next_cursor: str | None
+
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"id": last_id}).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        last_id = json.loads(base64.urlsafe_b64decode(cursor))["id"]
+    except (binascii.Error, ValueError, TypeError, KeyError) as e:
+        raise InvalidCursorException("Curseur invalide") from e
+
+    if not isinstance(last_id, int):
+        raise InvalidCursorException("Curseur invalide")
+
+    return last_id
+
+
+def clamp_page_size(limit: int) -> int:
+    return max(1, min(limit, MAX_PAGE_SIZE))
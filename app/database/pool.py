@@ -0,0 +1,124 @@
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import URL, make_url
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from app.settings import (
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+)
+
+# Upper bounds of the checkout latency histogram, in milliseconds
+CHECKOUT_LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+class PoolStatistics:
+    """Checkout latency of a pool, shared by the threads using it."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.latency_buckets = [0] * (len(CHECKOUT_LATENCY_BUCKETS_MS) + 1)
+
+    def observe_checkout(self, seconds: float) -> None:
+        bucket = len(CHECKOUT_LATENCY_BUCKETS_MS)
+        for index, upper_bound in enumerate(CHECKOUT_LATENCY_BUCKETS_MS):
+            if seconds * 1000 <= upper_bound:
+                bucket = index
+                break
+
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+            self.latency_buckets[bucket] += 1
+
+    def observe_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self, pool: Pool) -> dict[str, Any]:
+        with self._lock:
+            histogram = {
+                f"le_{upper_bound}ms": count
+                for upper_bound, count in zip(
+                    CHECKOUT_LATENCY_BUCKETS_MS, self.latency_buckets
+                )
+            }
+            histogram["le_inf"] = self.latency_buckets[-1]
+
+            return {
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "total_wait_ms": round(self.total_wait_seconds * 1000, 3),
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+                "checkout_latency_histogram": histogram,
+            }
+
+
+class InstrumentedPoolMixin:
+    statistics: PoolStatistics
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except TimeoutError:
+            self.statistics.observe_timeout()
+            raise
+
+        self.statistics.observe_checkout(time.perf_counter() - start)
+
+        return connection
+
+
+def instrumented_pool_class(base: type[QueuePool]) -> type[QueuePool]:
+    # The statistics live on a dedicated class, so they survive `recreate()`
+    return type(
+        f"Instrumented{base.__name__}",
+        (InstrumentedPoolMixin, base),
+        {"statistics": PoolStatistics()},
+    )
+
+
+def engine_options(url: str | URL, *, is_async: bool = False) -> dict[str, Any]:
+    """Pool settings for `create_engine`/`create_async_engine` from app.settings."""
+    database_url = make_url(url)
+    if database_url.get_backend_name() == "sqlite" and database_url.database in (
+        None,
+        "",
+        ":memory:",
+    ):
+        # In-memory SQLite lives in a single connection: keep its default pool
+        return {}
+
+    base = AsyncAdaptedQueuePool if is_async else QueuePool
+
+    return {
+        "poolclass": instrumented_pool_class(base),
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def pool_statistics(pool: Pool) -> dict[str, Any] | None:
+    statistics = getattr(pool, "statistics", None)
+    if statistics is None:
+        return None
+
+    return statistics.snapshot(pool)
@@ -0,0 +1,45 @@
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import Engine, event
+
+
+class QueryStatistics:
+    """Statements run for one request, and the time spent in them."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration_seconds = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.duration_seconds += seconds
+
+    def server_timing(self) -> str:
+        duration_ms = self.duration_seconds * 1000
+
+        return f'db;dur={duration_ms:.3f};desc="{self.count} queries"'
+
+
+# Set by `QueryStatisticsMiddleware` for the request being served. The
+# statistics object is shared, so the threads of `run_in_threadpool` (which
+# work on a copy of the context) add to it too.
+current_query_statistics: ContextVar[QueryStatistics | None] = ContextVar(
+    "current_query_statistics", default=None
+)
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context.query_start_time = time.perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    statistics = current_query_statistics.get()
+    if statistics is not None:
+        statistics.observe(time.perf_counter() - context.query_start_time)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Count the statements of `engine` in the current request statistics."""
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
@@ -0,0 +1,74 @@
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from app.settings import READ_YOUR_WRITES_WINDOW
+
+# Cookie carrying the time of the client's last write, so every worker sees it
+LAST_WRITE_COOKIE = "last_write"
+
+
+class RecentWrite:
+    """
+    Time of the last write of the client being served.
+
+    Its reads go to the primary until the replica has caught up with what it
+    just wrote.
+    """
+
+    def __init__(self, last_write: float | None = None) -> None:
+        self.last_write = last_write
+        self.has_written = False
+
+    def mark(self) -> None:
+        self.last_write = time.time()
+        self.has_written = True
+
+    def is_recent(self, window_seconds: float = READ_YOUR_WRITES_WINDOW) -> bool:
+        # A cookie from the future is not trusted to pin the reads to the primary
+        return (
+            self.last_write is not None
+            and 0 <= time.time() - self.last_write < window_seconds
+        )
+
+
+# Set by `ReadYourWritesMiddleware` for the request being served
+current_recent_write: ContextVar[RecentWrite | None] = ContextVar(
+    "current_recent_write", default=None
+)
+
+
+def use_replica() -> bool:
+    """A client who just wrote reads from the primary until the replica caught up."""
+    recent_write = current_recent_write.get()
+
+    return recent_write is None or not recent_write.is_recent()
+
+
+def has_written(session: Session) -> bool:
+    return session.info.get("has_written", False)
+
+
+def mark_writer(session: Session) -> None:
+    """Called once `session` is committed."""
+    recent_write = current_recent_write.get()
+    if recent_write is not None and has_written(session):
+        recent_write.mark()
+
+
+@event.listens_for(Session, "after_flush")
+def flag_flush(session: Session, flush_context) -> None:
+    session.info["has_written"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def flag_dml(orm_execute_state: ORMExecuteState) -> None:
+    # update_where/bulk_update don't go through a flush
+    if (
+        orm_execute_state.is_insert
+        or orm_execute_state.is_update
+        or orm_execute_state.is_delete
+    ):
+        orm_execute_state.session.info["has_written"] = True
@@ -1,13 +1,29 @@
-from typing import Generic, List, Optional, TypeVar
+from typing import Any, Dict, Generic, Iterable, List, Optional, TypeVar
 
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import update
 from sqlalchemy.exc import NoResultFound
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.database.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    Page,
+    clamp_page_size,
+    decode_cursor,
+    encode_cursor,
+)
 from app.exceptions import DatabaseException, NotFoundException
 
 T = TypeVar("T")
 
 
+def _assign(item: T, values: dict[str, Any]) -> None:
+    for key, value in values.items():
+        setattr(item, key, value)
+
+
 class Repository(Generic[T]):
     __model__: type
 
@@ -28,14 +44,83 @@ class Repository(Generic[T]):
         except Exception as e:
             raise DatabaseException from e
 
-        for key, value in kwargs.items():
-            setattr(bd_item, key, value)
+        _assign(bd_item, kwargs)
+
+        session.flush()
+        session.refresh(bd_item)
+
+        return bd_item
+
+    def trusted_update(self, session: Session, id_: int, **kwargs) -> T:
+        """
+        Same as `update`, for values that are already valid: read from the
+        database, made by the application, already encrypted or hashed. The
+        model validators don't run (see `BaseSQLModel.trusted_update`), user
+        input goes through `update`.
+        """
+        try:
+            bd_item = session.get_one(self.__model__, id_)
+        except Exception as e:
+            raise DatabaseException from e
+
+        bd_item.trusted_update(**kwargs)
 
         session.flush()
         session.refresh(bd_item)
 
         return bd_item
 
+    def update_where(
+        self,
+        session: Session,
+        filters: Dict[str, Any],
+        values: Dict[str, Any],
+        returning: bool = False,
+    ) -> int | List[T]:
+        """
+        Update every row matching `filters` with one UPDATE statement.
+
+        Unlike `update`, nothing is loaded and the model validators don't run:
+        `values` are written as they are, so they must already be valid (no
+        user input that needs hashing or encryption). A list, tuple or set in
+        `filters` matches any of its values.
+
+        Returns the number of updated rows, or the updated rows themselves
+        (UPDATE ... RETURNING) with `returning=True`.
+        """
+        filter_kwargs = [
+            getattr(self.__model__, key).in_(value)
+            if isinstance(value, (list, tuple, set))
+            else getattr(self.__model__, key) == value
+            for key, value in filters.items()
+        ]
+
+        statement = update(self.__model__).where(*filter_kwargs).values(**values)
+
+        try:
+            if returning:
+                statement = statement.returning(self.__model__)
+                return list(session.exec(statement).scalars().all())
+
+            return session.exec(statement).rowcount
+        except Exception as e:
+            raise DatabaseException from e
+
+    def bulk_update(self, session: Session, rows: List[Dict[str, Any]]) -> None:
+        """
+        Update many rows by primary key in one executemany round trip.
+
+        Each row is a dict holding the `id` and the new values of the columns
+        to update. As with `update_where`, the model validators don't run.
+        """
+        if not rows:
+            return
+
+        try:
+            session.exec(update(self.__model__), params=rows)
+        except Exception as e:
+            raise DatabaseException from e
+
     def get_or_raise(self, session: Session, **kwargs) -> T:
         filter_kwargs = [
             getattr(self.__model__, key) == value for key, value in kwargs.items()
@@ -61,9 +146,84 @@ class Repository(Generic[T]):
 
         return item
 
+    def get_many(
+        self, session: Session, field: str, values: Iterable[Any], **kwargs
+    ) -> List[T]:
+        """Fetch every row whose `field` is in `values` with a single IN query."""
+        values = set(values)
+        if not values:
+            return []
+
+        filter_kwargs = [
+            getattr(self.__model__, key) == value for key, value in kwargs.items()
+        ]
+
+        statement = select(self.__model__).where(
+            getattr(self.__model__, field).in_(values), *filter_kwargs
+        )
+
+        return list(session.exec(statement).all())
+
+    def get_map(
+        self, session: Session, field: str, values: Iterable[Any], **kwargs
+    ) -> Dict[Any, T]:
+        """Same as `get_many`, keyed by the value of `field`."""
+        items = self.get_many(session, field, values, **kwargs)
+
+        return {getattr(item, field): item for item in items}
+
     def get_all(self, session: Session) -> List[T]:
         return session.exec(select(self.__model__)).all()
 
+    def get_page(
+        self,
+        session: Session,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        **kwargs,
+    ) -> Page[T]:
+        """
+        Keyset pagination on `id`: a page costs the same whatever its depth.
+
+        `cursor` is the `next_cursor` of the previous page, None for the first.
+        """
+        return self.get_batch(session, cursor, clamp_page_size(limit), **kwargs)
+
+    def get_batch(
+        self,
+        session: Session,
+        cursor: Optional[str] = None,
+        limit: int = MAX_PAGE_SIZE,
+        **kwargs,
+    ) -> Page[T]:
+        """
+        `get_page` without its MAX_PAGE_SIZE cap, for the maintenance commands:
+        never with a limit from a request.
+        """
+        if limit < 1:
+            raise ValueError(f"A batch has at least one row, not {limit}")
+
+        filter_kwargs = [
+            getattr(self.__model__, key) == value for key, value in kwargs.items()
+        ]
+        if cursor is not None:
+            filter_kwargs.append(self.__model__.id > decode_cursor(cursor))
+
+        statement = (
+            select(self.__model__)
+            .where(*filter_kwargs)
+            .order_by(self.__model__.id)
+            .limit(limit + 1)
+        )
+        items = list(session.exec(statement).all())
+
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = encode_cursor(items[-1].id)
+
+        return Page(items=items, next_cursor=next_cursor)
+
     def delete(self, session: Session, id_: int) -> bool:
         try:
             item = session.get_one(self.__model__, id_)
@@ -73,3 +233,71 @@ class Repository(Generic[T]):
         session.delete(item)
 
         return True
+
+    # Async variants: the sync queries above run on the AsyncSession greenlet,
+    # so the I/O goes through the asyncio driver without blocking the loop.
+
+    async def acreate(self, session: AsyncSession, item: T) -> T:
+        return await session.run_sync(self.create, item)
+
+    async def aupdate(self, session: AsyncSession, id_: int, **kwargs) -> T:
+        try:
+            bd_item = await session.get_one(self.__model__, id_)
+        except Exception as e:
+            raise DatabaseException from e
+
+        # Field validators hash and encrypt: keep them off the event loop
+        await run_in_threadpool(_assign, bd_item, kwargs)
+
+        await session.flush()
+        await session.refresh(bd_item)
+
+        return bd_item
+
+    async def atrusted_update(self, session: AsyncSession, id_: int, **kwargs) -> T:
+        return await session.run_sync(self.trusted_update, id_, **kwargs)
+
+    async def aupdate_where(
+        self,
+        session: AsyncSession,
+        filters: Dict[str, Any],
+        values: Dict[str, Any],
+        returning: bool = False,
+    ) -> int | List[T]:
+        return await session.run_sync(self.update_where, filters, values, returning)
+
+    async def abulk_update(
+        self, session: AsyncSession, rows: List[Dict[str, Any]]
+    ) -> None:
+        return await session.run_sync(self.bulk_update, rows)
+
+    async def aget_or_raise(self, session: AsyncSession, **kwargs) -> T:
+        return await session.run_sync(self.get_or_raise, **kwargs)
+
+    async def aget_or_none(self, session: AsyncSession, **kwargs) -> Optional[T]:
+        return await session.run_sync(self.get_or_none, **kwargs)
+
+    async def aget_many(
+        self, session: AsyncSession, field: str, values: Iterable[Any], **kwargs
+    ) -> List[T]:
+        return await session.run_sync(self.get_many, field, values, **kwargs)
+
+    async def aget_map(
+        self, session: AsyncSession, field: str, values: Iterable[Any], **kwargs
+    ) -> Dict[Any, T]:
+        return await session.run_sync(self.get_map, field, values, **kwargs)
+
+    async def aget_all(self, session: AsyncSession) -> List[T]:
+        return await session.run_sync(self.get_all)
+
+    async def aget_page(
+        self,
+        session: AsyncSession,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        **kwargs,
+    ) -> Page[T]:
+        return await session.run_sync(self.get_page, cursor, limit, **kwargs)
+
+    async def adelete(self, session: AsyncSession, id_: int) -> bool:
+        return await session.run_sync(self.delete, id_)
@@ -0,0 +1,151 @@
+"""
+Encrypt the encrypted columns again with the primary key, AES_KEY.
+
+    python -m app.database.rotate_encryption_key --checkpoint rotation.json
+
+To rotate the key: set BLIND_INDEX_KEY if it was derived from AES_KEY, make
+the new key AES_KEY and the former one AES_OLD_KEYS, restart the
+application, run this command, then remove AES_OLD_KEYS.
+
+A page of rows is encrypted again per transaction, and a value the
+application changed in the meantime is left alone, so the command can run
+next to the application: --rows-per-second keeps it from competing with the
+requests. The last id done of each table is saved in the --checkpoint file
+after each page, an interrupted rotation resumes from there. Delete the file
+to start the next rotation.
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from sqlalchemy import Engine, bindparam, update
+from sqlmodel import Session
+
+from app.commun.crypto import Key, needs_rotation, rotate
+from app.database.compact_ciphertexts import ENCRYPTED_COLUMNS
+from app.database.pagination import MAX_PAGE_SIZE, encode_cursor
+from app.database.repository import Repository
+from app.settings import AES_KEYS
+
+logger = logging.getLogger(__name__)
+
+
+def load_checkpoint(path: Path | None) -> dict[str, int]:
+    """Last id done of each table, empty without a checkpoint file."""
+    if path is None or not path.exists():
+        return {}
+
+    return json.loads(path.read_text())
+
+
+def save_checkpoint(path: Path | None, checkpoint: dict[str, int]) -> None:
+    if path is None:
+        return
+
+    # Replaced in one step: an interruption leaves the former checkpoint
+    temporary_path = path.with_name(path.name + ".tmp")
+    temporary_path.write_text(json.dumps(checkpoint))
+    os.replace(temporary_path, path)
+
+
+def rotate_page(
+    session: Session, repository: Repository, items: list, key: Key = AES_KEYS
+) -> int:
+    table = repository.__model__.__table__
+    rotated = 0
+
+    for column in ENCRYPTED_COLUMNS[repository]:
+        rows = [
+            {
+                "row_id": item.id,
+                "read_value": getattr(item, column),
+                "rotated_value": rotate(getattr(item, column), key),
+            }
+            for item in items
+            if getattr(item, column) is not None
+            and needs_rotation(getattr(item, column), key)
+        ]
+        if not rows:
+            continue
+
+        # Compare and swap: only the value that was read is replaced
+        statement = (
+            update(table)
+            .where(
+                table.c.id == bindparam("row_id"),
+                table.c[column] == bindparam("read_value"),
+            )
+            .values({column: bindparam("rotated_value")})
+        )
+        # Not the rows the application changed in the meantime
+        rotated += session.connection().execute(statement, rows).rowcount
+
+    return rotated
+
+
+def rotate_encryption_key(
+    engine: Engine,
+    batch_size: int = MAX_PAGE_SIZE,
+    checkpoint_path: Path | None = None,
+    rows_per_second: float | None = None,
+    sleep: Callable[[float], None] = time.sleep,
+    key: Key = AES_KEYS,
+) -> int:
+    """Encrypt every value again with the primary key, returns how many were."""
+    checkpoint = load_checkpoint(checkpoint_path)
+    rotated = 0
+    rows_read = 0
+    start = time.monotonic()
+
+    for repository in ENCRYPTED_COLUMNS:
+        table_name = repository.__model__.__tablename__
+        last_id = checkpoint.get(table_name)
+        cursor = None if last_id is None else encode_cursor(last_id)
+        while True:
+            with Session(engine) as session:
+                page = repository.get_batch(session, cursor, batch_size)
+                rotated_in_page = rotate_page(session, repository, page.items, key)
+                last_id = page.items[-1].id if page.items else None
+                session.commit()
+
+            rotated += rotated_in_page
+            if last_id is not None:
+                checkpoint[table_name] = last_id
+                save_checkpoint(checkpoint_path, checkpoint)
+            logger.info(
+                f"{table_name}: {rotated_in_page} values rotated, "
+                f"up to id {checkpoint.get(table_name)}"
+            )
+
+            # Wait until the rows read so far fit in the rate
+            rows_read += len(page.items)
+            if rows_per_second:
+                ahead = rows_read / rows_per_second - (time.monotonic() - start)
+                if ahead > 0:
+                    sleep(ahead)
+
+            if page.next_cursor is None:
+                break
+            cursor = page.next_cursor
+
+    return rotated
+
+
+if __name__ == "__main__":
+    from app.database.unit_of_work import engine
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch-size", type=int, default=MAX_PAGE_SIZE)
+    parser.add_argument("--checkpoint", type=Path)
+    parser.add_argument("--rows-per-second", type=float)
+    args = parser.parse_args()
+
+    rotated = rotate_encryption_key(
+        engine, args.batch_size, args.checkpoint, args.rows_per_second
+    )
+    print(f"{rotated} values rotated")
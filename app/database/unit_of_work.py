@@ -1,24 +1,89 @@
 import contextlib
 import logging
+from collections.abc import AsyncIterator
 
 from fastapi import HTTPException, status
-from sqlalchemy import create_engine
+from sqlalchemy import URL, create_engine, make_url
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import Session, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+# Register every table before creating them
+import app.api.links.models
+import app.auth.models  # noqa: F401
+from app.database.migrations import create_missing_columns, create_missing_indexes
+from app.database.pool import engine_options
+from app.database.query_statistics import instrument_engine
+from app.database.replica import mark_writer, use_replica
 from app.exceptions import (
     CannotCreateStillExistsException,
+    InvalidPositionException,
     ParentsListMakerException,
     RessourceNotFoundException,
+    ServiceUnavailableException,
     UnauthorizedException,
 )
-from app.settings import DB_URL
+from app.settings import (
+    ASYNC_DB_READ_URL,
+    ASYNC_DB_URL,
+    DB_MIGRATE_ON_STARTUP,
+    DB_READ_URL,
+    DB_URL,
+)
 
 logger = logging.getLogger(__name__)
 
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str) -> URL:
+    """Swap the sync driver of `url` for its asyncio counterpart."""
+    sync_url = make_url(url)
+    async_url = sync_url.set(drivername=ASYNC_DRIVERS[sync_url.get_backend_name()])
+
+    # asyncpg names the libpq `sslmode` parameter `ssl`
+    if "sslmode" in async_url.query:
+        async_url = async_url.difference_update_query(["sslmode"]).update_query_dict(
+            {"ssl": async_url.query["sslmode"]}
+        )
+
+    return async_url
+
+
 # Create the database
 
-engine = create_engine(DB_URL)
+engine = create_engine(DB_URL, **engine_options(DB_URL))
 SQLModel.metadata.create_all(engine)
+# Otherwise once per deployment: python -m app.database.migrations
+if DB_MIGRATE_ON_STARTUP:
+    create_missing_columns(engine)
+    create_missing_indexes(engine)
+
+async_engine = create_async_engine(
+    ASYNC_DB_URL or to_async_url(DB_URL), **engine_options(DB_URL, is_async=True)
+)
+
+# Read-only units go to the replica when one is configured
+if DB_READ_URL:
+    read_engine = create_engine(DB_READ_URL, **engine_options(DB_READ_URL))
+    async_read_engine = create_async_engine(
+        ASYNC_DB_READ_URL or to_async_url(DB_READ_URL),
+        **engine_options(DB_READ_URL, is_async=True),
+    )
+else:
+    read_engine = engine
+    async_read_engine = async_engine
+
+for instrumented_engine in {
+    engine,
+    async_engine.sync_engine,
+    read_engine,
+    async_read_engine.sync_engine,
+}:
+    instrument_engine(instrumented_engine)
 
 
 @contextlib.contextmanager
@@ -39,41 +104,114 @@ def unit():
         session.close()
 
 
-@contextlib.contextmanager
-def unit_api(attempt_message: str):
-    session = Session(engine)
-    try:
-        yield session
-        session.commit()
-
-    except CannotCreateStillExistsException as e:
-        session.rollback()
-        logger.exception(e)
-        raise HTTPException(
+def to_http_exception(attempt_message: str, e: Exception) -> HTTPException:
+    if isinstance(e, CannotCreateStillExistsException):
+        return HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=f"{attempt_message} FAILED : {str(e)}",
         )
-    except RessourceNotFoundException as e:
-        session.rollback()
-        logger.exception(e)
-        raise HTTPException(
+
+    if isinstance(e, RessourceNotFoundException):
+        return HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"{attempt_message} FAILED : {str(e)}",
         )
-    except UnauthorizedException as e:
-        session.rollback()
-        logger.exception(e)
-        raise HTTPException(
+
+    if isinstance(e, InvalidPositionException):
+        return HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=f"{attempt_message} FAILED : {str(e)}",
+        )
+
+    if isinstance(e, UnauthorizedException):
+        return HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"{attempt_message} FAILED : {str(e)}",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+    if isinstance(e, ServiceUnavailableException):
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"{attempt_message} FAILED : {str(e)}",
+            headers={"Retry-After": "1"},
+        )
+
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"{attempt_message} FAILED",
+    )
+
+
+@contextlib.contextmanager
+def unit_api(attempt_message: str, readonly: bool = False):
+    """
+    Session on the primary, committed when the block succeeds.
+
+    With `readonly`, the session reads from the replica (see `use_replica`)
+    and is never committed.
+    """
+    if readonly and use_replica():
+        session = Session(read_engine)
+    else:
+        session = Session(engine)
+
+    try:
+        yield session
+        if not readonly:
+            session.commit()
+            mark_writer(session)
     except Exception as e:
         session.rollback()
         logger.exception(e)
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"{attempt_message} FAILED",
-        )
+        raise to_http_exception(attempt_message, e)
     finally:
         session.close()
+
+
+async def get_request_session() -> AsyncIterator[AsyncSession]:
+    """
+    One session per request, shared by the auth dependencies and the route.
+
+    Give it to `async_unit_api`: the whole request then runs on a single
+    connection and a single transaction, committed by the unit of the route.
+    """
+    session = AsyncSession(async_engine, expire_on_commit=False)
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+@contextlib.asynccontextmanager
+async def async_unit_api(
+    attempt_message: str,
+    readonly: bool = False,
+    session: AsyncSession | None = None,
+):
+    """
+    Same contract as `unit_api`, on the asyncio engines.
+
+    Objects are not expired on commit: an expired attribute would need a lazy
+    load, which AsyncSession can't do implicitly.
+
+    A `session` from `get_request_session` is used as is and left open. With
+    `readonly`, its transaction goes on in the next unit of the request.
+    """
+    owns_session = session is None
+    if owns_session:
+        bind = async_read_engine if readonly and use_replica() else async_engine
+        session = AsyncSession(bind, expire_on_commit=False)
+
+    try:
+        yield session
+        if not readonly:
+            await session.commit()
+            mark_writer(session.sync_session)
+    except Exception as e:
+        await session.rollback()
+        logger.exception(e)
+        raise to_http_exception(attempt_message, e)
+    finally:
+        if owns_session:
+            await session.close()
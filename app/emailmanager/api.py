@@ -1,12 +1,18 @@
 from typing import Annotated
 
 from fastapi import APIRouter, Body, Depends, Path, status
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.api.user_information.models import USER_INFORMATION_SERVICE, UserInformation
 from app.auth.models import USER_SERVICE
 from app.auth.token import (
+    USER_CACHE,
+    UserWithEmail,
     UserWithInformations,
+    abump_token_versions,
+    get_current_user_with_email,
     get_current_user_with_informations,
 )
 from app.commun.crypto import (
@@ -14,7 +20,8 @@ from app.commun.crypto import (
     generate_password_reset_token,
     verify_password_reset_token,
 )
-from app.database.unit_of_work import unit_api
+from app.commun.hashing import HASHING_EXECUTOR
+from app.database.unit_of_work import async_unit_api, get_request_session
 from app.emailmanager.models import (
     EMAIL_CONFIRMATION_TOKEN_SERVICE,
     EmailConfirmationToken,
@@ -26,7 +33,11 @@ from app.emailmanager.send_email import (
     html_wrapper_for_password_reset_email,
     send_contact_message,
 )
-from app.exceptions import RessourceNotFoundException, UnauthorizedException
+from app.exceptions import (
+    CannotCreateStillExistsException,
+    RessourceNotFoundException,
+    UnauthorizedException,
+)
 from app.settings import FRONTEND_URL
 
 email_router = APIRouter(
@@ -36,40 +47,49 @@ email_router = APIRouter(
 
 
 @email_router.post("/")
-def add_email_to_user(
+async def add_email_to_user(
     current_user: Annotated[
         UserWithInformations, Depends(get_current_user_with_informations)
     ],
+    request_session: Annotated[AsyncSession, Depends(get_request_session)],
     payload: EmailSchema,
 ) -> EmailConfirmationToken:
-    with unit_api("Trying to add email to user") as session:
-        existing_user_information = USER_INFORMATION_SERVICE.get_or_none(
+    async with async_unit_api(
+        "Trying to add email to user", session=request_session
+    ) as session:
+        existing_user_information = await USER_INFORMATION_SERVICE.aget_or_none(
             session, user_id=current_user.id
         )
 
         if existing_user_information is None:
             raise UnauthorizedException("User has no informations")
 
-        USER_INFORMATION_SERVICE.update(
+        owner = await USER_INFORMATION_SERVICE.aget_by_email(session, payload.email)
+        if owner is not None and owner.id != existing_user_information.id:
+            raise CannotCreateStillExistsException("Email already used")
+
+        await USER_INFORMATION_SERVICE.aupdate(
             session,
             existing_user_information.id,
             encrypted_email=payload.email,
             is_email_confirmed=False,
         )
+        await abump_token_versions(session, current_user.id)
 
-        new_email_confirmation = EmailConfirmationToken(
+        new_email_confirmation = EmailConfirmationToken.trusted(
             token=generate_confirmation_token(),
             user_id=current_user.id,
         )
 
-        confirm_email_created = EMAIL_CONFIRMATION_TOKEN_SERVICE.create(
+        confirm_email_created = await EMAIL_CONFIRMATION_TOKEN_SERVICE.acreate(
             session, new_email_confirmation
         )
 
         html = html_wrapper_for_confirmation_email_with_token(
             token=new_email_confirmation.token
         )
-        send_contact_message(
+        await run_in_threadpool(
+            send_contact_message,
             subject="ParentsListMaker - Confirmez votre email",
             html=html,
             to=payload.email,
@@ -81,9 +101,9 @@ def add_email_to_user(
 
 
 @email_router.get("/{token}")
-def confirm_email(token: Annotated[str, Path(title="token")]) -> UserInformation:
-    with unit_api("Trying to confirm email") as session:
-        email_confirmation = EMAIL_CONFIRMATION_TOKEN_SERVICE.get_or_none(
+async def confirm_email(token: Annotated[str, Path(title="token")]) -> UserInformation:
+    async with async_unit_api("Trying to confirm email") as session:
+        email_confirmation = await EMAIL_CONFIRMATION_TOKEN_SERVICE.aget_or_none(
             session, token=token
         )
 
@@ -93,21 +113,23 @@ def confirm_email(token: Annotated[str, Path(title="token")]) -> UserInformation
         if email_confirmation.is_confirmed is True:
             raise UnauthorizedException("Email already confirmed")
 
-        EMAIL_CONFIRMATION_TOKEN_SERVICE.update(
-            session, email_confirmation.id, is_confirmed=True
+        await EMAIL_CONFIRMATION_TOKEN_SERVICE.aupdate_where(
+            session, {"id": email_confirmation.id}, {"is_confirmed": True}
         )
 
-        actual_information = USER_INFORMATION_SERVICE.get_or_none(
-            session, user_id=email_confirmation.user_id
+        user_informations = await USER_INFORMATION_SERVICE.aupdate_where(
+            session,
+            {"user_id": email_confirmation.user_id},
+            {"is_email_confirmed": True},
+            returning=True,
         )
 
-        if actual_information is None:
+        if len(user_informations) == 0:
             raise UnauthorizedException("User has no informations")
 
-        user_information = USER_INFORMATION_SERVICE.update(
-            session, actual_information.id, is_email_confirmed=True
-        )
+        await abump_token_versions(session, email_confirmation.user_id)
 
+        user_information = user_informations[0]
         session.expunge(user_information)
 
     return user_information
@@ -118,20 +140,23 @@ class Message(BaseModel):
 
 
 @email_router.post("/contact-user/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-def contact_user(
-    current_user: Annotated[
-        UserWithInformations, Depends(get_current_user_with_informations)
-    ],
+async def contact_user(
+    current_user: Annotated[UserWithEmail, Depends(get_current_user_with_email)],
+    request_session: Annotated[AsyncSession, Depends(get_request_session)],
     user_id: int = Annotated[int, Path(title="user_id")],
     payload: Message = Annotated[Message, Body(embed=True)],
 ) -> None:
-    with unit_api("Tentative de contacter un utilisateur") as session:
+    async with async_unit_api(
+        "Tentative de contacter un utilisateur", session=request_session
+    ) as session:
         if current_user.email is None or not current_user.is_email_confirmed:
             raise RessourceNotFoundException(
                 "Tu ne peux pas contacter un utilisateur sans email confirmé"
             )
 
-        user_info = USER_INFORMATION_SERVICE.get_or_none(session, user_id=user_id)
+        user_info = await USER_INFORMATION_SERVICE.aget_or_none(
+            session, user_id=user_id
+        )
 
         if user_info is None:
             raise RessourceNotFoundException("L'utilisateur n'existe pas")
@@ -142,7 +167,8 @@ def contact_user(
             )
 
         html = html_wrapper_for_introduction_email(current_user.email, payload.message)
-        send_contact_message(
+        await run_in_threadpool(
+            send_contact_message,
             subject="ParentsListMaker - Demande de contact",
             html=html,
             to=user_info.email,
@@ -150,16 +176,18 @@ def contact_user(
 
 
 @email_router.post("/request-password-reset", status_code=status.HTTP_204_NO_CONTENT)
-def request_password_reset(
+async def request_password_reset(
     payload: UsernameSchema,
 ) -> None:
-    with unit_api("Demande de réinitialisation du mot de passe") as session:
-        user = USER_SERVICE.get_or_none(session, username=payload.username)
+    async with async_unit_api("Demande de réinitialisation du mot de passe") as session:
+        user = await USER_SERVICE.aget_or_none(session, username=payload.username)
 
         if user is None:
             raise UnauthorizedException("Utilisateur non trouvé")
 
-        user_info = USER_INFORMATION_SERVICE.get_or_none(session, user_id=user.id)
+        user_info = await USER_INFORMATION_SERVICE.aget_or_none(
+            session, user_id=user.id
+        )
 
         if user_info is None:
             raise UnauthorizedException("Utilisateur n'a pas d'informations")
@@ -171,7 +199,8 @@ def request_password_reset(
         reset_link = f"{FRONTEND_URL}/auth/reset-password?token={reset_token}"
 
         html = html_wrapper_for_password_reset_email(reset_link)
-        send_contact_message(
+        await run_in_threadpool(
+            send_contact_message,
             subject="ParentsListMaker - Réinitialisation du mot de passe",
             html=html,
             to=user_info.email,
@@ -179,16 +208,19 @@ def request_password_reset(
 
 
 @email_router.post("/reset-password", status_code=status.HTTP_204_NO_CONTENT)
-def reset_password(
+async def reset_password(
     payload: PasswordResetSchema,
 ) -> None:
-    with unit_api("Réinitialisation du mot de passe") as session:
+    async with async_unit_api("Réinitialisation du mot de passe") as session:
         user_id = verify_password_reset_token(payload.token)
         if user_id is None:
             raise UnauthorizedException("Token de réinitialisation invalide ou expiré")
 
-        USER_SERVICE.update(
-            session,
-            user_id,
-            hashed_password=payload.new_password,
+        user = await USER_SERVICE.aget_or_raise(session, id=user_id)
+
+        # Assigning the password hashes it with bcrypt
+        await HASHING_EXECUTOR.run(
+            setattr, user, "hashed_password", payload.new_password
         )
+
+    USER_CACHE.invalidate(user.username)
@@ -16,7 +16,9 @@ class EmailConfirmationToken(BaseSQLModel, table=True):
     is_confirmed: bool = Field(default=False)
     created_at: datetime = Field(default=datetime.now(timezone.utc))
     user_id: int = Field(
-        sa_column=Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
+        sa_column=Column(
+            Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True
+        )
     )
 
 
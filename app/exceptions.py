@@ -20,6 +20,10 @@ class NotFoundException(DatabaseException):
     pass
 
 
+class InvalidCursorException(DatabaseException):
+    pass
+
+
 # API Exception
 
 
@@ -37,3 +41,11 @@ class CannotCreateStillExistsException(APIException):
 
 class RessourceNotFoundException(APIException):
     pass
+
+
+class InvalidPositionException(APIException):
+    pass
+
+
+class ServiceUnavailableException(APIException):
+    pass
@@ -6,7 +6,10 @@ from app.api.parents_list.api import parents_list_router
 from app.api.school.api import school_router
 from app.api.user_information.api import user_information_router
 from app.auth.api import auth_router
+from app.database.middleware import ReadYourWritesMiddleware
 from app.emailmanager.api import email_router
+from app.monitoring.api import monitoring_router
+from app.monitoring.middleware import QueryStatisticsMiddleware
 from app.settings import FRONTEND_URL
 
 app = FastAPI()
@@ -22,6 +25,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(QueryStatisticsMiddleware)
 
 app.include_router(auth_router)
 app.include_router(email_router)
@@ -29,3 +34,4 @@ app.include_router(user_information_router)
 app.include_router(school_router)
 app.include_router(parents_list_router)
 app.include_router(links_api)
+app.include_router(monitoring_router)
@@ -0,0 +1,84 @@
+import secrets
+from typing import Annotated, Any
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from app.api.school.models import SCHOOL_CACHE
+from app.auth.token import CREDENTIALS_EXCEPTION, USER_CACHE
+from app.commun.decryption import DECRYPTION_ENGINE
+from app.commun.hashing import HASHING_EXECUTOR
+from app.database import unit_of_work
+from app.database.pool import pool_statistics
+from app.settings import MONITORING_TOKEN
+
+monitoring_bearer = HTTPBearer(auto_error=False)
+
+
+def check_monitoring_token(
+    credentials: Annotated[
+        HTTPAuthorizationCredentials | None, Depends(monitoring_bearer)
+    ],
+) -> None:
+    """
+    The monitoring routes need the MONITORING_TOKEN bearer token: they expose
+    the load of the worker. Without the setting they aren't served at all.
+    """
+    if MONITORING_TOKEN is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+    if credentials is None or not secrets.compare_digest(
+        credentials.credentials.encode(), MONITORING_TOKEN.encode()
+    ):
+        raise CREDENTIALS_EXCEPTION
+
+
+monitoring_router = APIRouter(
+    tags=["Monitoring"],
+    prefix="/monitoring",
+    dependencies=[Depends(check_monitoring_token)],
+)
+
+
+@monitoring_router.get("/pool", status_code=status.HTTP_200_OK)
+async def get_pool_statistics() -> dict[str, Any]:
+    """
+    Connection pool usage of this worker
+
+    `null` when the engine runs on a pool without instrumentation
+    (in-memory SQLite).
+    """
+    statistics = {
+        "sync": pool_statistics(unit_of_work.engine.pool),
+        "async": pool_statistics(unit_of_work.async_engine.sync_engine.pool),
+    }
+
+    # The read replica, when DB_READ_URL is set
+    if unit_of_work.read_engine is not unit_of_work.engine:
+        statistics["read"] = pool_statistics(unit_of_work.read_engine.pool)
+        statistics["async_read"] = pool_statistics(
+            unit_of_work.async_read_engine.sync_engine.pool
+        )
+
+    return statistics
+
+
+@monitoring_router.get("/caches", status_code=status.HTTP_200_OK)
+async def get_cache_statistics() -> dict[str, Any]:
+    """Size and hit rate of the in-process caches of this worker"""
+    return {
+        "users": USER_CACHE.statistics(),
+        "schools": SCHOOL_CACHE.statistics(),
+    }
+
+
+@monitoring_router.get("/hashing", status_code=status.HTTP_200_OK)
+async def get_hashing_statistics() -> dict[str, Any]:
+    """Load of the bcrypt threads of this worker, and the time hashes waited"""
+    return HASHING_EXECUTOR.statistics()
+
+
+@monitoring_router.get("/decryption", status_code=status.HTTP_200_OK)
+async def get_decryption_statistics() -> dict[str, Any]:
+    """Batches decrypted in the calling thread or across processes by this worker"""
+    return DECRYPTION_ENGINE.statistics()
@@ -0,0 +1,42 @@
+import logging
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.database.query_statistics import QueryStatistics, current_query_statistics
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStatisticsMiddleware:
+    """
+    Count the SQL statements of each request
+
+    The count and the time spent in the database are sent back in a
+    `Server-Timing` header and logged.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        statistics = QueryStatistics()
+        reset_token = current_query_statistics.set(statistics)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", statistics.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_query_statistics.reset(reset_token)
+            logger.info(
+                f"{scope['method']} {scope['path']} : {statistics.count} queries in {statistics.duration_seconds * 1000:.3f} ms"
+            )
@@ -1,4 +1,5 @@
 import base64
+import hashlib
 import os
 
 from dotenv import load_dotenv
@@ -12,12 +13,62 @@ FRONTEND_URL = os.getenv("FRONTEND_URL")
 
 # Database
 DB_URL = os.getenv("DB_URL")
+ASYNC_DB_URL = os.getenv("ASYNC_DB_URL")  # derived from DB_URL when unset
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds, -1 to disable
+DB_POOL_PRE_PING = False if os.getenv("DB_POOL_PRE_PING") == "False" else True
+DB_READ_URL = os.getenv("DB_READ_URL")  # read replica, DB_URL when unset
+ASYNC_DB_READ_URL = os.getenv("ASYNC_DB_READ_URL")  # derived from DB_READ_URL
+# seconds during which a client who wrote reads from the primary (last_write cookie)
+READ_YOUR_WRITES_WINDOW = float(os.getenv("READ_YOUR_WRITES_WINDOW", "10"))
+# missing columns and indexes added at import, by every worker: small databases only
+DB_MIGRATE_ON_STARTUP = True if os.getenv("DB_MIGRATE_ON_STARTUP") == "True" else False
 
 # security
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 7200
-AES_KEY = base64.b64decode(os.getenv("AES_KEY"))
+# bearer token of the /monitoring routes, not served when unset
+MONITORING_TOKEN = os.getenv("MONITORING_TOKEN")
+AES_KEY = base64.b64decode(os.getenv("AES_KEY"))  # encrypts and decrypts
+# former keys, comma separated, still decrypting during a key rotation
+AES_OLD_KEYS = tuple(
+    base64.b64decode(key) for key in os.getenv("AES_OLD_KEYS", "").split(",") if key
+)
+AES_KEYS = (AES_KEY, *AES_OLD_KEYS)
+# HMAC key of the blind indexes of encrypted columns, derived from AES_KEY
+# when unset. Changing it means computing the indexes again.
+BLIND_INDEX_KEY = (
+    base64.b64decode(os.getenv("BLIND_INDEX_KEY"))
+    if os.getenv("BLIND_INDEX_KEY")
+    else hashlib.sha256(b"blind-index:" + AES_KEY).digest()
+)
+if AES_OLD_KEYS and not os.getenv("BLIND_INDEX_KEY"):
+    raise ValueError(
+        "Set BLIND_INDEX_KEY before rotating AES_KEY: the key derived from "
+        "the new AES_KEY wouldn't match the stored indexes"
+    )
+# users resolved from a token are cached by username, 0 to disable
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))  # seconds
+# tokens carrying the lists, schools and admin flags of the user
+CLAIMS_TOKENS = True if os.getenv("CLAIMS_TOKENS") == "True" else False
+# seconds a worker may accept claims made stale by another worker
+TOKEN_VERSION_CACHE_TTL = float(os.getenv("TOKEN_VERSION_CACHE_TTL", "30"))
+# decrypted schools are cached by code and id, 0 to disable
+SCHOOL_CACHE_SIZE = int(os.getenv("SCHOOL_CACHE_SIZE", "1024"))
+SCHOOL_CACHE_TTL = float(os.getenv("SCHOOL_CACHE_TTL", "300"))  # seconds
+# bcrypt cost, hashes with another cost are upgraded at the next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# bcrypt threads, and hashes allowed to wait for one before answering 503
+HASHING_WORKERS = int(os.getenv("HASHING_WORKERS", "2"))
+HASHING_QUEUE_SIZE = int(os.getenv("HASHING_QUEUE_SIZE", "32"))
+
+# values from which decryption is split across processes, 0 to never do it
+DECRYPTION_PROCESS_THRESHOLD = int(os.getenv("DECRYPTION_PROCESS_THRESHOLD", "0"))
+DECRYPTION_PROCESSES = int(os.getenv("DECRYPTION_PROCESSES", str(os.cpu_count() or 1)))
 
 # Email
 DOMAIN_EMAIL = os.getenv("DOMAIN_EMAIL")
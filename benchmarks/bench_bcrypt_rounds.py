@@ -0,0 +1,56 @@
+"""
+bcrypt verification latency per cost, and the cost to use for a target.
+
+    python -m benchmarks.bench_bcrypt_rounds --target-ms 250
+
+Times a verification (what a login costs) for each cost between --min-rounds
+and --max-rounds, and suggests the highest one within --target-ms, to set
+as BCRYPT_ROUNDS.
+"""
+
+import argparse
+import time
+
+from passlib.hash import bcrypt
+
+PASSWORD = "Password123*"
+
+
+def verification_ms(rounds: int, repeat: int) -> float:
+    hashed_password = bcrypt.using(rounds=rounds).hash(PASSWORD)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        bcrypt.verify(PASSWORD, hashed_password)
+
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--target-ms", type=float, default=250)
+    parser.add_argument("--min-rounds", type=int, default=10)
+    parser.add_argument("--max-rounds", type=int, default=15)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    suggested_rounds = None
+    print(f"{'rounds':<8}{'verify (ms)':>12}")
+    for rounds in range(args.min_rounds, args.max_rounds + 1):
+        latency = verification_ms(rounds, args.repeat)
+        print(f"{rounds:<8}{latency:>12.1f}")
+
+        if latency <= args.target_ms:
+            suggested_rounds = rounds
+        else:
+            # Each round doubles the cost: the next ones are over too
+            break
+
+    if suggested_rounds is None:
+        print(f"Even {args.min_rounds} rounds take more than {args.target_ms} ms")
+    else:
+        print(f"BCRYPT_ROUNDS={suggested_rounds} for {args.target_ms} ms")
+
+
+if __name__ == "__main__":
+    main()
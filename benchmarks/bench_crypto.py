@@ -0,0 +1,59 @@
+"""
+Decryption of a roster with a Fernet per value, and with the shared cipher.
+
+    python -m benchmarks.bench_crypto --values 80 --repeat 200
+
+Decrypts --values ciphertexts (a 40 member roster has 80: first and last
+names) the way `decrypt` did before the cipher was cached, then with
+`decrypt` and `decrypt_many`.
+"""
+
+import argparse
+import time
+from collections.abc import Callable
+
+from cryptography.fernet import Fernet
+
+from app.commun.crypto import ciphertext_to_token, decrypt, decrypt_many, encrypt
+from app.settings import AES_KEY
+
+
+def decrypt_with_a_new_fernet(string_to_decrypt: str) -> str:
+    return Fernet(AES_KEY).decrypt(ciphertext_to_token(string_to_decrypt)).decode()
+
+
+def elapsed_us(run: Callable[[], object], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        run()
+
+    return (time.perf_counter() - start) / repeat * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--values", type=int, default=80)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    values = [encrypt(f"Parent {index}") for index in range(args.values)]
+
+    timings = {
+        "new Fernet per value": elapsed_us(
+            lambda: [decrypt_with_a_new_fernet(value) for value in values],
+            args.repeat,
+        ),
+        "decrypt": elapsed_us(
+            lambda: [decrypt(value) for value in values], args.repeat
+        ),
+        "decrypt_many": elapsed_us(lambda: decrypt_many(values), args.repeat),
+    }
+
+    baseline = timings["new Fernet per value"]
+    print(f"{'':<22}{'roster (us)':>12}{'speedup':>10}")
+    for name, timing in timings.items():
+        print(f"{name:<22}{timing:>12.1f}{baseline / timing:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Batch size from which decrypting in processes beats decrypting in-thread.
+
+    python -m benchmarks.bench_decryption_engine --processes 4
+
+Times DecryptionEngine on batches of growing size, in-thread and with a warm
+pool of --processes processes, and suggests the smallest batch from which
+the pool always wins, to set as DECRYPTION_PROCESS_THRESHOLD.
+"""
+
+import argparse
+import os
+import time
+
+from app.commun.crypto import encrypt_many
+from app.commun.decryption import DecryptionEngine
+
+BATCH_SIZES = (100, 500, 1000, 2500, 5000, 10000, 25000, 50000)
+
+
+def elapsed_ms(engine: DecryptionEngine, values: list[str], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        engine.decrypt_many(values)
+
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    in_thread = DecryptionEngine(process_threshold=0, processes=args.processes)
+    in_processes = DecryptionEngine(process_threshold=1, processes=args.processes)
+    # Start the pool outside of the timings
+    in_processes.decrypt_many(encrypt_many(["warm up"] * args.processes))
+
+    crossover = None
+    print(f"{os.cpu_count()} cores, {args.processes} processes")
+    print(f"{'values':>8}{'in-thread (ms)':>16}{'processes (ms)':>16}")
+    try:
+        for batch_size in BATCH_SIZES:
+            values = encrypt_many(f"Parent {index}" for index in range(batch_size))
+            in_thread_ms = elapsed_ms(in_thread, values, args.repeat)
+            in_processes_ms = elapsed_ms(in_processes, values, args.repeat)
+            print(f"{batch_size:>8}{in_thread_ms:>16.1f}{in_processes_ms:>16.1f}")
+
+            if in_processes_ms >= in_thread_ms:
+                crossover = None
+            elif crossover is None:
+                crossover = batch_size
+    finally:
+        in_processes.shutdown()
+
+    if crossover is None:
+        print("The processes never win here: keep DECRYPTION_PROCESS_THRESHOLD=0")
+    else:
+        print(f"DECRYPTION_PROCESS_THRESHOLD={crossover}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Lookup latency on list_links with and without the declared indexes.
+
+    python -m benchmarks.bench_list_link_indexes --links 1000000
+
+Builds two throwaway SQLite databases holding the same links, one without
+any secondary index, and times the lookups the routers issue.
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlmodel import Session, SQLModel
+
+from app.api.links.models import LIST_LINK_SERVICE, ListLink
+from app.auth.models import User  # noqa: F401  users is referenced by list_links
+
+MEMBERS_PER_LIST = 40
+
+
+def build_database(path: Path, nb_links: int, with_indexes: bool):
+    engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine, tables=[ListLink.__table__])
+
+    with engine.begin() as connection:
+        if not with_indexes:
+            for index in ListLink.__table__.indexes:
+                connection.exec_driver_sql(f"DROP INDEX {index.name}")
+
+        rows = [
+            (
+                link_id,
+                "ACCEPTED",
+                link_id % MEMBERS_PER_LIST + 1,
+                False,
+                link_id // MEMBERS_PER_LIST,
+                link_id,
+            )
+            for link_id in range(1, nb_links + 1)
+        ]
+        connection.exec_driver_sql(
+            "INSERT INTO list_links "
+            "(id, status, position_in_list, is_admin, list_id, user_id) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+
+    return engine
+
+
+def time_lookups(engine, nb_links: int, nb_lookups: int) -> dict[str, float]:
+    randomizer = random.Random(0)
+    user_ids = [randomizer.randint(1, nb_links) for _ in range(nb_lookups)]
+
+    lookups = {
+        "get_or_none(user_id, list_id)": lambda session, user_id: (
+            LIST_LINK_SERVICE.get_or_none(
+                session, user_id=user_id, list_id=user_id // MEMBERS_PER_LIST
+            )
+        ),
+        "get_all_list_links_by_list_id": lambda session, user_id: (
+            LIST_LINK_SERVICE.get_all_list_links_by_list_id(
+                session, user_id // MEMBERS_PER_LIST
+            )
+        ),
+        "get_all_list_links_by_user_id": lambda session, user_id: (
+            LIST_LINK_SERVICE.get_all_list_links_by_user_id(session, user_id)
+        ),
+    }
+
+    results = {}
+    with Session(engine) as session:
+        for name, lookup in lookups.items():
+            start = time.perf_counter()
+            for user_id in user_ids:
+                lookup(session, user_id)
+                session.expunge_all()
+            results[name] = (time.perf_counter() - start) / nb_lookups * 1000
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--links", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        timings = {}
+        for with_indexes in (False, True):
+            engine = build_database(
+                Path(directory) / f"links_{with_indexes}.db", args.links, with_indexes
+            )
+            timings[with_indexes] = time_lookups(engine, args.links, args.lookups)
+            engine.dispose()
+
+    print(f"{args.links} links, mean of {args.lookups} lookups")
+    print(f"{'lookup':<32}{'no index (ms)':>16}{'indexed (ms)':>16}")
+    for name in timings[True]:
+        print(f"{name:<32}{timings[False][name]:>16.3f}{timings[True][name]:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Roster hydration and serialization, per member model and in one batch.
+
+    python -m benchmarks.bench_roster_response --members 200 --repeat 200
+
+Reads a roster of --members from a throwaway SQLite database, then times
+and measures the peak memory of turning its rows and decrypted names into
+the JSON response: the way it was done before (a validated model per member
+from the named Row attributes, validated again and serialized by FastAPI),
+then with `build_roster` and `json_response`. Decryption isn't included,
+it is the same for both.
+"""
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlmodel import Session, SQLModel
+
+from app.api.links.models import (
+    PARENTS_ROSTER_SERVICE,
+    ListLink,
+    ParentsRosterService,
+    UserOnListStatus,
+)
+from app.api.links.schemas import PARENT_INFORMATIONS, ParentInformation
+from app.api.parents_list.models import ParentsList
+from app.api.user_information.models import UserInformation
+from app.auth.models import User  # noqa: F401  users is referenced by list_links
+from app.commun.responses import json_response
+
+
+def create_roster(session: Session, nb_members: int) -> None:
+    session.add(
+        ParentsList(id=1, list_name="CP", holder_length=10, school_id=1, creator_id=1)
+    )
+    for user_id in range(1, nb_members + 1):
+        session.add(
+            UserInformation(
+                name=f"Parent {user_id}", first_name="Jean", email=None, user_id=user_id
+            )
+        )
+        session.add(
+            ListLink(
+                list_id=1,
+                user_id=user_id,
+                position_in_list=user_id,
+                status=UserOnListStatus.ACCEPTED,
+                is_admin=False,
+                school_relation="parent",
+                school_id=1,
+            )
+        )
+    session.commit()
+
+
+def model_per_member(members: list, names: list[str]) -> bytes:
+    first_names, last_names = names[: len(members)], names[len(members) :]
+    roster = [
+        ParentInformation(
+            user_id=row.user_id,
+            first_name=first_name,
+            last_name=last_name,
+            position_in_list=row.position_in_list,
+            is_email=row.encrypted_email is not None,
+            is_admin=row.is_admin,
+            is_creator=row.creator_id == row.user_id,
+        )
+        for row, first_name, last_name in zip(members, first_names, last_names)
+    ]
+
+    # What FastAPI does with a returned value and a response model
+    return PARENT_INFORMATIONS.dump_json(PARENT_INFORMATIONS.validate_python(roster))
+
+
+def one_batch(members: list, names: list[str]) -> bytes:
+    roster = ParentsRosterService.build_roster(members, names)
+
+    return json_response(PARENT_INFORMATIONS, roster).body
+
+
+def measure(run: Callable[[], object], repeat: int) -> tuple[float, float]:
+    """Microseconds per run (best of 5 rounds), and peak KiB of one run."""
+    rounds = []
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            run()
+        rounds.append((time.perf_counter() - start) / repeat * 1_000_000)
+    elapsed_us = min(rounds)
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return elapsed_us, peak / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--members", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{Path(directory) / 'roster.db'}")
+        SQLModel.metadata.create_all(engine)
+        with Session(engine) as session:
+            create_roster(session, args.members)
+            members = PARENTS_ROSTER_SERVICE.get_roster_rows(
+                session, 1, UserOnListStatus.ACCEPTED
+            )
+        engine.dispose()
+
+    names = [f"Name {index}" for index in range(2 * len(members))]
+    assert model_per_member(members, names) == one_batch(members, names)
+
+    measures = {
+        "model per member": measure(
+            lambda: model_per_member(members, names), args.repeat
+        ),
+        "one batch": measure(lambda: one_batch(members, names), args.repeat),
+    }
+
+    baseline_us, _ = measures["model per member"]
+    print(f"{args.members} members")
+    print(f"{'':<18}{'roster (us)':>12}{'speedup':>10}{'peak (KiB)':>12}")
+    for name, (elapsed_us, peak_kib) in measures.items():
+        print(
+            f"{name:<18}{elapsed_us:>12.1f}{baseline_us / elapsed_us:>9.2f}x"
+            f"{peak_kib:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
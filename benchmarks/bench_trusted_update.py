@@ -0,0 +1,95 @@
+"""
+Cost of a model construction or update, validated and trusted.
+
+    python -m benchmarks.bench_trusted_update --repeat 2000
+
+Times, on models outside of a session, what the validators cost per
+construction or update with validate_assignment, against `trusted` and
+`trusted_update` given values that are already valid. The password update
+hashes with bcrypt: it is timed --bcrypt-repeat times only.
+"""
+
+import argparse
+import time
+from collections.abc import Callable
+
+from app.api.links.models import ListLink, UserOnListStatus
+from app.api.school.models import School
+from app.api.user_information.models import UserInformation
+from app.auth.models import User
+from app.commun.crypto import encrypt, get_password_hash
+
+PASSWORD = "Password123*"
+
+
+def elapsed_us(run: Callable[[], object], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        run()
+
+    return (time.perf_counter() - start) / repeat * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--bcrypt-repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    list_link_values = {
+        "status": UserOnListStatus.WAITING,
+        "position_in_list": 0,
+        "is_admin": False,
+        "list_id": 1,
+        "user_id": 1,
+    }
+    user_information = UserInformation(
+        name="Dupont", first_name="Jean", email=None, user_id=1
+    )
+    school = School(
+        school_name="Ecole",
+        city="Paris",
+        zip_code="75000",
+        country="France",
+        adress="1 rue de Paris",
+        code="BENCH001",
+    )
+    encrypted_city = encrypt("Lyon")
+    user = User(username="parent", password=PASSWORD)
+    hashed_password = get_password_hash(PASSWORD)
+
+    cases = {
+        "build a list link": (
+            lambda: ListLink(**list_link_values),
+            lambda: ListLink.trusted(**list_link_values),
+            args.repeat,
+        ),
+        "confirm an email": (
+            lambda: setattr(user_information, "is_email_confirmed", True),
+            lambda: user_information.trusted_update(is_email_confirmed=True),
+            args.repeat,
+        ),
+        "update a city": (
+            lambda: setattr(school, "encrypted_city", "Lyon"),
+            lambda: school.trusted_update(encrypted_city=encrypted_city),
+            args.repeat,
+        ),
+        "update a password": (
+            lambda: setattr(user, "hashed_password", PASSWORD),
+            lambda: user.trusted_update(hashed_password=hashed_password),
+            args.bcrypt_repeat,
+        ),
+    }
+
+    print(f"{'':<20}{'validated (us)':>16}{'trusted (us)':>14}{'speedup':>10}")
+    for name, (validated, trusted, repeat) in cases.items():
+        validated_us = elapsed_us(validated, repeat)
+        trusted_us = elapsed_us(trusted, repeat)
+        print(
+            f"{name:<20}{validated_us:>16.1f}{trusted_us:>14.1f}"
+            f"{validated_us / trusted_us:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Authenticated request throughput with and without the user cache.
+
+    python -m benchmarks.bench_user_cache --requests 2000
+
+Serves GET /users/me/ from a throwaway SQLite database through the ASGI app,
+once with USER_CACHE disabled and once enabled.
+"""
+
+import argparse
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from sqlalchemy import NullPool, create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, SQLModel
+
+from app.auth.models import User
+from app.auth.token import USER_CACHE, create_access_token
+from app.database import unit_of_work
+from app.main import app
+
+
+def use_database(path: Path) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        session.add(User(username="parent", password="Password123*"))
+        session.commit()
+
+    async_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{path}", poolclass=NullPool
+    )
+    unit_of_work.engine = unit_of_work.read_engine = engine
+    unit_of_work.async_engine = unit_of_work.async_read_engine = async_engine
+
+
+def requests_per_second(client: TestClient, nb_requests: int) -> float:
+    headers = {
+        "Authorization": f"Bearer {create_access_token({'sub': 'parent'}).access_token}"
+    }
+
+    start = time.perf_counter()
+    for _ in range(nb_requests):
+        response = client.get("/users/me/", headers=headers)
+        assert response.status_code == 200
+
+    return nb_requests / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    # One log line per request would be timed too
+    logging.getLogger("app.monitoring.middleware").setLevel(logging.WARNING)
+
+    maxsize = USER_CACHE.maxsize
+    with tempfile.TemporaryDirectory() as directory:
+        use_database(Path(directory) / "users.db")
+        client = TestClient(app)
+
+        throughputs = {}
+        for name, cache_size in (("cache off", 0), ("cache on", maxsize)):
+            USER_CACHE.clear()
+            USER_CACHE.maxsize = cache_size
+            throughputs[name] = requests_per_second(client, args.requests)
+
+    print(f"{args.requests} GET /users/me/")
+    for name, throughput in throughputs.items():
+        print(f"{name:<12}{throughput:>10.0f} requests/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+import jwt
+from fastapi.testclient import TestClient
+from passlib.hash import bcrypt
+from sqlalchemy import event
+from sqlmodel import Session
+
+from app.api.links.models import SchoolLink, SchoolRelation
+from app.auth import token
+from app.auth.models import USER_SERVICE
+from app.auth.token import TOKEN_VERSIONS, USER_CACHE
+from app.commun.crypto import generate_password_reset_token, verify_password
+from app.commun.hashing import HashingExecutor
+from app.settings import BCRYPT_ROUNDS
+from tests.factories import (
+    TEST_PASSWORD,
+    get_list_link_factory,
+    get_school_factory,
+    get_user_information_factory,
+)
+
+
+def register(client: TestClient, username: str) -> str:
+    response = client.post(
+        "/register", data={"username": username, "password": TEST_PASSWORD}
+    )
+    assert response.status_code == 201
+
+    return response.json()["access_token"]
+
+
+def test_register_then_read_users_me(client: TestClient):
+    token = register(client, "parent")
+
+    response = client.get("/users/me/", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 200
+    assert response.json()["username"] == "parent"
+
+
+def test_register_twice_is_forbidden(client: TestClient):
+    register(client, "parent")
+
+    response = client.post(
+        "/register", data={"username": "parent", "password": TEST_PASSWORD}
+    )
+
+    assert response.status_code == 403
+
+
+def test_login(client: TestClient):
+    register(client, "parent")
+
+    response = client.post(
+        "/token", data={"username": "parent", "password": TEST_PASSWORD}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["token_type"] == "bearer"
+
+
+def test_login_with_wrong_password(client: TestClient):
+    register(client, "parent")
+
+    response = client.post(
+        "/token", data={"username": "parent", "password": "Wrong" + TEST_PASSWORD}
+    )
+
+    assert response.status_code == 401
+
+
+def test_read_users_me_with_invalid_token(client: TestClient):
+    response = client.get("/users/me/", headers={"Authorization": "Bearer invalid"})
+
+    assert response.status_code == 401
+
+
+def test_token_user_is_cached(client: TestClient, count_queries):
+    headers = {"Authorization": f"Bearer {register(client, 'parent')}"}
+    assert client.get("/users/me/", headers=headers).status_code == 200
+
+    with count_queries() as queries:
+        response = client.get("/users/me/", headers=headers)
+
+    assert response.status_code == 200
+    assert queries == []
+
+
+def test_deleted_user_is_evicted_from_the_cache(client: TestClient):
+    headers = {"Authorization": f"Bearer {register(client, 'parent')}"}
+    assert client.get("/users/me/", headers=headers).status_code == 200
+
+    assert client.delete("/users/me/", headers=headers).status_code == 200
+
+    assert client.get("/users/me/", headers=headers).status_code == 401
+
+
+def test_password_reset_evicts_the_user_from_the_cache(client: TestClient):
+    headers = {"Authorization": f"Bearer {register(client, 'parent')}"}
+    user_id = client.get("/users/me/", headers=headers).json()["id"]
+    assert USER_CACHE.get("parent") is not None
+
+    response = client.post(
+        "/confirmation-email/reset-password",
+        json={
+            "token": generate_password_reset_token(user_id),
+            "new_password": "New" + TEST_PASSWORD,
+        },
+    )
+
+    assert response.status_code == 204
+    assert USER_CACHE.get("parent") is None
+
+
+def test_read_users_me_details_in_one_query(
+    client: TestClient, session: Session, count_queries
+):
+    headers = {"Authorization": f"Bearer {register(client, 'parent')}"}
+    user_id = client.get("/users/me/", headers=headers).json()["id"]
+    get_user_information_factory(
+        session, user_id=user_id, email="parent@example.com", is_email_confirmed=True
+    )
+    for list_id in (7, 8):
+        get_list_link_factory(
+            session, list_id=list_id, user_id=user_id, position_in_list=0
+        )
+    session.add(
+        SchoolLink(school_id=9, user_id=user_id, school_relation=SchoolRelation.PARENT)
+    )
+    session.commit()
+
+    with count_queries() as queries:
+        response = client.get("/users/me/details/", headers=headers)
+
+    assert len(queries) == 1
+    assert response.status_code == 200
+    details = response.json()
+    assert details["id"] == user_id
+    assert details["email"] == "parent@example.com"
+    assert details["is_email_confirmed"] is True
+    assert sorted(details["parents_list_ids"]) == [7, 8]
+    assert details["school_ids"] == [9]
+
+
+def test_read_users_me_details_without_informations(client: TestClient):
+    headers = {"Authorization": f"Bearer {register(client, 'parent')}"}
+
+    response = client.get("/users/me/details/", headers=headers)
+
+    assert response.status_code == 401
+
+
+def test_auth_and_route_share_one_connection_and_transaction(
+    client: TestClient, async_engine
+):
+    headers = {"Authorization": f"Bearer {register(client, 'parent')}"}
+    USER_CACHE.clear()
+    events = []
+
+    def on_connect(*args):
+        events.append("connect")
+
+    def on_begin(*args):
+        events.append("begin")
+
+    event.listen(async_engine.sync_engine, "connect", on_connect)
+    event.listen(async_engine.sync_engine, "begin", on_begin)
+    try:
+        response = client.post(
+            "/user-informations/",
+            json={"name": "Parent", "first_name": "Jean", "email": None},
+            headers=headers,
+        )
+    finally:
+        event.remove(async_engine.sync_engine, "connect", on_connect)
+        event.remove(async_engine.sync_engine, "begin", on_begin)
+
+    assert response.status_code == 201
+    assert events == ["connect", "begin"]
+
+
+def test_login_when_hashing_is_saturated(client: TestClient, monkeypatch):
+    register(client, "parent")
+    saturated = HashingExecutor(max_workers=1, max_queue=0)
+    saturated.pending = 1
+    monkeypatch.setattr(token, "HASHING_EXECUTOR", saturated)
+
+    response = client.post(
+        "/token", data={"username": "parent", "password": TEST_PASSWORD}
+    )
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_login_with_unknown_user(client: TestClient):
+    response = client.post(
+        "/token", data={"username": "nobody", "password": TEST_PASSWORD}
+    )
+
+    assert response.status_code == 401
+
+
+def test_login_rehashes_a_password_of_another_cost(
+    client: TestClient, session: Session
+):
+    register(client, "parent")
+    user = USER_SERVICE.get_or_raise(session, username="parent")
+    USER_SERVICE.update_where(
+        session,
+        {"id": user.id},
+        {"hashed_password": bcrypt.using(rounds=4).hash(TEST_PASSWORD)},
+    )
+    session.commit()
+
+    response = client.post(
+        "/token", data={"username": "parent", "password": TEST_PASSWORD}
+    )
+
+    assert response.status_code == 200
+    session.expire_all()
+    user = USER_SERVICE.get_or_raise(session, username="parent")
+    assert user.hashed_password.startswith(f"$2b${BCRYPT_ROUNDS:02d}$")
+    assert verify_password(TEST_PASSWORD, user.hashed_password)
+
+
+def claims_token(client: TestClient, session: Session, monkeypatch) -> str:
+    """Claims token of a parent with informations and an admin of list 7."""
+    monkeypatch.setattr(token, "CLAIMS_TOKENS", True)
+    headers = {"Authorization": f"Bearer {register(client, 'parent')}"}
+    user_id = client.get("/users/me/", headers=headers).json()["id"]
+    get_user_information_factory(
+        session, user_id=user_id, email="parent@example.com", is_email_confirmed=True
+    )
+    get_list_link_factory(
+        session, list_id=7, user_id=user_id, position_in_list=1, is_admin=True
+    )
+    session.commit()
+
+    response = client.post("/token/refresh", headers=headers)
+    assert response.status_code == 200
+
+    return response.json()["access_token"]
+
+
+def test_claims_token_is_trusted_without_queries(
+    client: TestClient, session: Session, monkeypatch, count_queries
+):
+    headers = {"Authorization": f"Bearer {claims_token(client, session, monkeypatch)}"}
+
+    with count_queries() as queries:
+        response = client.get("/schools/me", headers=headers)
+
+    assert len(queries) == 0
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+def test_claims_token_only_reads_the_email(
+    client: TestClient, session: Session, monkeypatch, count_queries
+):
+    headers = {"Authorization": f"Bearer {claims_token(client, session, monkeypatch)}"}
+
+    with count_queries() as queries:
+        response = client.get("/users/me/details/", headers=headers)
+
+    assert len(queries) == 1
+    assert response.status_code == 200
+    assert response.json()["email"] == "parent@example.com"
+    assert response.json()["is_email_confirmed"] is True
+    assert response.json()["parents_list_ids"] == [7]
+    assert response.json()["admin_list_ids"] == [7]
+
+
+def test_claims_token_does_not_carry_the_email(
+    client: TestClient, session: Session, monkeypatch
+):
+    access_token = claims_token(client, session, monkeypatch)
+
+    claims = jwt.decode(access_token, options={"verify_signature": False})["usr"]
+
+    assert "email" not in claims
+    assert "parent@example.com" not in str(claims)
+    assert claims["is_email_confirmed"] is True
+
+
+def test_claims_token_of_a_deleted_user_is_refused(
+    client: TestClient, session: Session, monkeypatch
+):
+    headers = {"Authorization": f"Bearer {claims_token(client, session, monkeypatch)}"}
+    user_id = client.get("/users/me/", headers=headers).json()["id"]
+    assert TOKEN_VERSIONS.get(user_id) is not None
+
+    assert client.delete("/users/me/", headers=headers).status_code == 200
+
+    assert TOKEN_VERSIONS.get(user_id) is None
+    assert client.get("/schools/me", headers=headers).status_code == 401
+
+
+def test_claims_token_is_stale_once_the_user_changes(
+    client: TestClient, session: Session, monkeypatch
+):
+    headers = {"Authorization": f"Bearer {claims_token(client, session, monkeypatch)}"}
+    school = get_school_factory(session, code="CLAIMS01")
+
+    assert client.get("/schools/join/CLAIMS01", headers=headers).status_code == 200
+
+    response = client.get("/users/me/details/", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["school_ids"] == [school.id]
+    user = USER_SERVICE.get_or_raise(session, username="parent")
+    assert user.token_version == 1
@@ -0,0 +1,41 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.emailmanager.models import EmailConfirmationToken
+from tests.factories import TEST_PASSWORD, get_user_information_factory
+
+
+def test_confirm_email(client: TestClient, session: Session):
+    get_user_information_factory(session, user_id=5000, email="parent@example.com")
+    session.add(EmailConfirmationToken(token="token", user_id=5000))
+    session.commit()
+
+    response = client.get("/confirmation-email/token")
+
+    assert response.status_code == 200
+    assert response.json()["is_email_confirmed"] is True
+    assert "email_hash" not in response.json()
+    assert client.get("/confirmation-email/token").status_code == 401
+
+
+def test_confirm_email_with_unknown_token(client: TestClient):
+    response = client.get("/confirmation-email/unknown")
+
+    assert response.status_code == 401
+
+
+def test_create_user_informations_with_a_used_email(
+    client: TestClient, session: Session
+):
+    get_user_information_factory(session, user_id=5000, email="parent@example.com")
+    token = client.post(
+        "/register", data={"username": "parent", "password": TEST_PASSWORD}
+    ).json()["access_token"]
+
+    response = client.post(
+        "/user-informations/",
+        json={"name": "Parent", "first_name": "Jean", "email": "Parent@example.com"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == 403
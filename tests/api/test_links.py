@@ -0,0 +1,467 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.api.links.models import LIST_LINK_SERVICE, UserOnListStatus
+from app.auth.token import UserWithInformations, get_current_user_with_informations
+from app.main import app
+from tests.factories import (
+    get_list_link_factory,
+    get_parents_list_factory,
+    get_school_factory,
+    get_user_factory,
+    get_user_information_factory,
+)
+
+
+def create_list_with_members(session: Session, nb_members: int, status: str) -> int:
+    parents_list = get_parents_list_factory(session, creator_id=1000)
+
+    for position in range(1, nb_members + 1):
+        user_information = get_user_information_factory(session)
+        get_list_link_factory(
+            session,
+            list_id=parents_list.id,
+            user_id=user_information.user_id,
+            status=status,
+            position_in_list=position if status == "accepted" else 0,
+        )
+
+    return parents_list.id
+
+
+@pytest.mark.parametrize(
+    "route, status",
+    [
+        ("/links/confirmed", UserOnListStatus.ACCEPTED.value),
+        ("/links/waiting", UserOnListStatus.WAITING.value),
+    ],
+)
+def test_roster_query_count_does_not_grow_with_list_size(
+    client: TestClient, session: Session, count_queries, route: str, status: str
+):
+    small_list_id = create_list_with_members(session, 2, status)
+    big_list_id = create_list_with_members(session, 10, status)
+
+    with count_queries() as small_list_queries:
+        response = client.get(f"{route}/{small_list_id}")
+        assert response.status_code == 200
+        assert len(response.json()) == 2
+
+    with count_queries() as big_list_queries:
+        response = client.get(f"{route}/{big_list_id}")
+        assert response.status_code == 200
+        assert len(response.json()) == 10
+
+    assert len(small_list_queries) == len(big_list_queries)
+
+
+def test_confirmed_roster_is_a_single_statement_ordered_by_position(
+    client: TestClient, session: Session, count_queries
+):
+    parents_list = get_parents_list_factory(session, creator_id=2000)
+    for position, user_id in [(3, 2003), (1, 2000), (2, 2002)]:
+        get_user_information_factory(session, user_id=user_id)
+        get_list_link_factory(
+            session,
+            list_id=parents_list.id,
+            user_id=user_id,
+            status="accepted",
+            position_in_list=position,
+            is_admin=user_id == 2000,
+        )
+    get_user_information_factory(session, user_id=2004)
+    get_list_link_factory(
+        session, list_id=parents_list.id, user_id=2004, position_in_list=0
+    )
+
+    list_id = parents_list.id
+    with count_queries() as queries:
+        response = client.get(f"/links/confirmed/{list_id}")
+
+    assert len(queries) == 1
+    assert response.status_code == 200
+    roster = response.json()
+    assert [parent["user_id"] for parent in roster] == [2000, 2002, 2003]
+    assert [parent["position_in_list"] for parent in roster] == [1, 2, 3]
+    assert roster[0]["is_creator"] is True
+    assert roster[0]["is_admin"] is True
+    assert roster[1]["is_creator"] is False
+
+
+def test_roster_names_are_decrypted(client: TestClient, session: Session):
+    parents_list = get_parents_list_factory(session, creator_id=2100)
+    get_user_information_factory(
+        session,
+        user_id=2100,
+        name="Dupont",
+        first_name="Jean",
+        email="jean@example.com",
+    )
+    get_list_link_factory(
+        session,
+        list_id=parents_list.id,
+        user_id=2100,
+        status="accepted",
+        position_in_list=1,
+        is_admin=False,
+    )
+
+    response = client.get(f"/links/confirmed/{parents_list.id}")
+
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == [
+        {
+            "user_id": 2100,
+            "first_name": "Jean",
+            "last_name": "Dupont",
+            "position_in_list": 1,
+            "is_email": True,
+            "is_admin": False,
+            "is_creator": True,
+        }
+    ]
+
+
+def test_roster_response_model_is_documented(client: TestClient):
+    openapi = client.get("/openapi.json").json()
+
+    for route in ("/links/confirmed/{list_id}", "/links/waiting/{list_id}"):
+        schema = openapi["paths"][route]["get"]["responses"]["200"]["content"][
+            "application/json"
+        ]["schema"]
+        assert schema["items"]["$ref"].endswith("/ParentInformation")
+
+
+def test_roster_of_empty_list(client: TestClient, session: Session):
+    parents_list = get_parents_list_factory(session, creator_id=3000)
+
+    response = client.get(f"/links/waiting/{parents_list.id}")
+
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+def test_roster_of_unknown_list(client: TestClient):
+    response = client.get("/links/confirmed/999999")
+
+    assert response.status_code == 404
+
+
+def create_ordered_list(
+    session: Session, nb_members: int, first_user_id: int = 6000
+) -> tuple[int, list[int]]:
+    """A list of accepted members, with the rows their foreign keys need."""
+    user_ids = [first_user_id + position for position in range(nb_members)]
+    for user_id in user_ids:
+        get_user_factory(session, id=user_id, username=f"member{user_id}")
+    school = get_school_factory(session, code=f"LIST{first_user_id}")
+    parents_list = get_parents_list_factory(
+        session, school_id=school.id, creator_id=first_user_id
+    )
+    list_id = parents_list.id
+    for position, user_id in enumerate(user_ids, start=1):
+        get_list_link_factory(
+            session,
+            list_id=list_id,
+            user_id=user_id,
+            status="accepted",
+            position_in_list=position,
+            is_admin=position == 1,
+        )
+
+    return list_id, user_ids
+
+
+def get_ordering(session: Session, list_id: int) -> list[int]:
+    session.expire_all()
+    list_links = LIST_LINK_SERVICE.get_all_list_links_by_list_id(session, list_id)
+
+    return [
+        list_link.user_id
+        for list_link in sorted(list_links, key=lambda link: link.position_in_list)
+    ]
+
+
+def login_as_member_of(user_id: int, list_id: int, is_admin: bool = False) -> None:
+    app.dependency_overrides[get_current_user_with_informations] = lambda: (
+        UserWithInformations(
+            id=user_id,
+            username="admin",
+            is_email_confirmed=False,
+            parents_list_ids=[list_id],
+            school_ids=[],
+            admin_list_ids=[list_id] if is_admin else [],
+        )
+    )
+
+
+def login_as_admin_of(user_id: int, list_id: int) -> None:
+    login_as_member_of(user_id, list_id, is_admin=True)
+
+
+def test_up_and_down_parent_position(client: TestClient, session: Session):
+    list_id, (first, second, third) = create_ordered_list(session, 3)
+    login_as_admin_of(first, list_id)
+
+    response = client.patch(f"/links/up/{list_id}/{third}")
+    assert response.status_code == 200
+    assert response.json() == [
+        {"user_id": first, "position_in_list": 1},
+        {"user_id": third, "position_in_list": 2},
+        {"user_id": second, "position_in_list": 3},
+    ]
+    assert get_ordering(session, list_id) == [first, third, second]
+
+    response = client.patch(f"/links/down/{list_id}/{first}")
+    assert response.status_code == 200
+    assert [item["user_id"] for item in response.json()] == [third, first, second]
+    assert get_ordering(session, list_id) == [third, first, second]
+
+
+@pytest.mark.parametrize("route, member", [("up", 0), ("down", 2)])
+def test_move_parent_out_of_the_list(
+    client: TestClient, session: Session, route: str, member: int
+):
+    list_id, user_ids = create_ordered_list(session, 3)
+    login_as_admin_of(user_ids[0], list_id)
+
+    response = client.patch(f"/links/{route}/{list_id}/{user_ids[member]}")
+
+    assert response.status_code == 404
+    assert get_ordering(session, list_id) == user_ids
+
+
+def test_move_parent_requires_admin(client: TestClient, session: Session):
+    list_id, user_ids = create_ordered_list(session, 3)
+    login_as_member_of(user_ids[1], list_id)
+
+    response = client.patch(f"/links/up/{list_id}/{user_ids[2]}")
+
+    assert response.status_code == 401
+
+
+@pytest.mark.parametrize("engine_name", ["engine", "postgres_engine"])
+def test_concurrent_swaps_keep_positions_a_permutation(request, engine_name: str):
+    # SQLite ignores FOR UPDATE and runs one writer at a time: only
+    # PostgreSQL, which runs them concurrently, tests the lock of the list
+    engine = request.getfixturevalue(engine_name)
+    with Session(engine) as session:
+        list_id, user_ids = create_ordered_list(session, 6)
+
+    def move_randomly(seed: int) -> None:
+        randomizer = random.Random(seed)
+        for _ in range(25):
+            with Session(engine) as worker_session:
+                LIST_LINK_SERVICE.swap_with_neighbor(
+                    worker_session,
+                    list_id,
+                    randomizer.choice(user_ids),
+                    randomizer.choice([-1, 1]),
+                )
+                worker_session.commit()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(move_randomly, range(8)))
+
+    with Session(engine) as session:
+        positions = [
+            list_link.position_in_list
+            for list_link in LIST_LINK_SERVICE.get_all_list_links_by_list_id(
+                session, list_id
+            )
+        ]
+    assert sorted(positions) == [1, 2, 3, 4, 5, 6]
+
+
+def test_swap_waiting_for_the_lock_reads_the_committed_positions(postgres_engine):
+    with Session(postgres_engine) as session:
+        list_id, (first, second, third) = create_ordered_list(session, 3)
+
+    def move_first_down() -> None:
+        with Session(postgres_engine) as worker_session:
+            LIST_LINK_SERVICE.swap_with_neighbor(worker_session, list_id, first, 1)
+            worker_session.commit()
+
+    with Session(postgres_engine) as session, ThreadPoolExecutor() as executor:
+        LIST_LINK_SERVICE.swap_with_neighbor(session, list_id, first, 1)
+        waiting_move = executor.submit(move_first_down)
+        time.sleep(0.5)
+        assert not waiting_move.done()
+        session.commit()
+        waiting_move.result()
+
+    with Session(postgres_engine) as session:
+        # Moved down twice, not back to the top from the former positions
+        assert get_ordering(session, list_id) == [second, third, first]
+
+
+def test_reorder_moves_one_parent_to_a_position(client: TestClient, session: Session):
+    list_id, user_ids = create_ordered_list(session, 30)
+    login_as_admin_of(user_ids[0], list_id)
+
+    response = client.patch(
+        f"/links/reorder/{list_id}", json={"user_id": user_ids[29], "position": 2}
+    )
+
+    assert response.status_code == 200
+    assert get_ordering(session, list_id) == [
+        user_ids[0],
+        user_ids[29],
+        *user_ids[1:29],
+    ]
+
+
+def test_reorder_with_the_full_order(client: TestClient, session: Session):
+    list_id, user_ids = create_ordered_list(session, 4)
+    login_as_admin_of(user_ids[0], list_id)
+    new_order = [user_ids[2], user_ids[0], user_ids[3], user_ids[1]]
+
+    response = client.patch(f"/links/reorder/{list_id}", json={"user_ids": new_order})
+
+    assert response.status_code == 200
+    assert response.json() == [
+        {"user_id": user_id, "position_in_list": position}
+        for position, user_id in enumerate(new_order, start=1)
+    ]
+    assert get_ordering(session, list_id) == new_order
+
+
+def test_reorder_waiting_for_the_lock_reads_the_committed_positions(
+    postgres_engine,
+):
+    with Session(postgres_engine) as session:
+        list_id, (first, second, third) = create_ordered_list(session, 3)
+
+    def move_first_to_second() -> None:
+        with Session(postgres_engine) as worker_session:
+            LIST_LINK_SERVICE.reorder(
+                worker_session, list_id, user_id=first, position=2
+            )
+            worker_session.commit()
+
+    with Session(postgres_engine) as session, ThreadPoolExecutor() as executor:
+        LIST_LINK_SERVICE.reorder(session, list_id, user_id=first, position=3)
+        waiting_move = executor.submit(move_first_to_second)
+        time.sleep(0.5)
+        assert not waiting_move.done()
+        session.commit()
+        waiting_move.result()
+
+    with Session(postgres_engine) as session:
+        assert get_ordering(session, list_id) == [second, first, third]
+        positions = [
+            list_link.position_in_list
+            for list_link in LIST_LINK_SERVICE.get_all_list_links_by_list_id(
+                session, list_id
+            )
+        ]
+        assert sorted(positions) == [1, 2, 3]
+
+
+def test_reorder_query_count_does_not_grow_with_list_size(
+    client: TestClient, session: Session, count_queries
+):
+    small_list_id, small_user_ids = create_ordered_list(session, 3)
+    big_list_id, big_user_ids = create_ordered_list(session, 40, first_user_id=7000)
+
+    login_as_admin_of(small_user_ids[0], small_list_id)
+    with count_queries() as small_list_queries:
+        response = client.patch(
+            f"/links/reorder/{small_list_id}",
+            json={"user_ids": small_user_ids[::-1]},
+        )
+        assert response.status_code == 200
+
+    login_as_admin_of(big_user_ids[0], big_list_id)
+    with count_queries() as big_list_queries:
+        response = client.patch(
+            f"/links/reorder/{big_list_id}", json={"user_ids": big_user_ids[::-1]}
+        )
+        assert response.status_code == 200
+
+    assert len(small_list_queries) == len(big_list_queries)
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        {"user_ids": [6000, 6001]},
+        {"user_ids": [6000, 6001, 6001]},
+        {"user_ids": [6000, 6001, 6999]},
+        {"user_id": 6001, "position": 0},
+        {"user_id": 6001, "position": 4},
+    ],
+)
+def test_reorder_rejects_what_is_not_a_permutation(
+    client: TestClient, session: Session, body: dict
+):
+    list_id, user_ids = create_ordered_list(session, 3)
+    login_as_admin_of(user_ids[0], list_id)
+
+    response = client.patch(f"/links/reorder/{list_id}", json=body)
+
+    assert response.status_code == 422
+    assert get_ordering(session, list_id) == user_ids
+
+
+def test_reorder_is_rolled_back_when_positions_would_repeat(
+    client: TestClient, session: Session
+):
+    list_id, user_ids = create_ordered_list(session, 3)
+    # A second link of the same member: moving the member rewrites both
+    get_list_link_factory(
+        session,
+        list_id=list_id,
+        user_id=user_ids[1],
+        status="accepted",
+        position_in_list=4,
+    )
+    login_as_admin_of(user_ids[0], list_id)
+
+    response = client.patch(
+        f"/links/reorder/{list_id}",
+        json={"user_ids": [user_ids[1], user_ids[0], user_ids[2]]},
+    )
+
+    assert response.status_code == 422
+    assert get_ordering(session, list_id) == [*user_ids, user_ids[1]]
+
+
+@pytest.mark.parametrize(
+    "body",
+    [{}, {"user_id": 6001}, {"user_ids": [6000], "user_id": 6000, "position": 1}],
+)
+def test_reorder_requires_exactly_one_form(
+    client: TestClient, session: Session, body: dict
+):
+    list_id, user_ids = create_ordered_list(session, 3)
+    login_as_admin_of(user_ids[0], list_id)
+
+    assert client.patch(f"/links/reorder/{list_id}", json=body).status_code == 422
+
+
+def test_reorder_unknown_member(client: TestClient, session: Session):
+    list_id, user_ids = create_ordered_list(session, 3)
+    login_as_admin_of(user_ids[0], list_id)
+
+    response = client.patch(
+        f"/links/reorder/{list_id}", json={"user_id": 6999, "position": 1}
+    )
+
+    assert response.status_code == 404
+
+
+def test_reorder_requires_admin(client: TestClient, session: Session):
+    list_id, user_ids = create_ordered_list(session, 3)
+    login_as_member_of(user_ids[1], list_id)
+
+    response = client.patch(
+        f"/links/reorder/{list_id}", json={"user_ids": user_ids[::-1]}
+    )
+
+    assert response.status_code == 401
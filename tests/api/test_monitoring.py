@@ -0,0 +1,64 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.monitoring import api as monitoring_api
+
+MONITORING_TOKEN = "monitoring-token"
+HEADERS = {"Authorization": f"Bearer {MONITORING_TOKEN}"}
+
+
+@pytest.fixture(autouse=True)
+def monitoring_token(monkeypatch):
+    monkeypatch.setattr(monitoring_api, "MONITORING_TOKEN", MONITORING_TOKEN)
+
+
+def test_get_pool_statistics(client: TestClient):
+    response = client.get("/monitoring/pool", headers=HEADERS)
+
+    assert response.status_code == 200
+    assert set(response.json()) == {"sync", "async"}
+
+
+def test_server_timing_counts_the_queries_of_the_request(client: TestClient):
+    response = client.get("/links/confirmed/999999")
+
+    assert response.status_code == 404
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+    assert response.headers["Server-Timing"].endswith('desc="1 queries"')
+
+
+def test_get_cache_statistics(client: TestClient):
+    response = client.get("/monitoring/caches", headers=HEADERS)
+
+    assert response.status_code == 200
+    assert response.json()["users"]["hits"] >= 0
+
+
+def test_get_hashing_statistics(client: TestClient):
+    response = client.get("/monitoring/hashing", headers=HEADERS)
+
+    assert response.status_code == 200
+    assert {"pending", "rejected", "max_wait_ms"} <= set(response.json())
+
+
+def test_get_decryption_statistics(client: TestClient):
+    response = client.get("/monitoring/decryption", headers=HEADERS)
+
+    assert response.status_code == 200
+    assert {"process_threshold", "in_thread_batches", "process_batches"} <= set(
+        response.json()
+    )
+
+
+@pytest.mark.parametrize(
+    "headers",
+    [{}, {"Authorization": "Bearer wrong"}, {"Authorization": MONITORING_TOKEN}],
+)
+def test_monitoring_needs_the_token(client: TestClient, headers: dict):
+    assert client.get("/monitoring/pool", headers=headers).status_code == 401
+
+
+def test_monitoring_is_not_served_without_a_token(client: TestClient, monkeypatch):
+    monkeypatch.setattr(monitoring_api, "MONITORING_TOKEN", None)
+
+    assert client.get("/monitoring/pool", headers=HEADERS).status_code == 404
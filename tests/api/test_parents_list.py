@@ -0,0 +1,91 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.auth.token import UserWithInformations, get_current_user_with_informations
+from app.main import app
+from tests.factories import (
+    get_list_link_factory,
+    get_parents_list_factory,
+    get_school_factory,
+    get_user_factory,
+)
+
+
+def login_as(
+    user_id: int, parents_list_ids: list[int], admin_list_ids: list[int]
+) -> None:
+    app.dependency_overrides[get_current_user_with_informations] = lambda: (
+        UserWithInformations(
+            id=user_id,
+            username="admin",
+            is_email_confirmed=True,
+            parents_list_ids=parents_list_ids,
+            school_ids=[],
+            admin_list_ids=admin_list_ids,
+        )
+    )
+
+
+def test_get_parents_lists_by_school_code_is_paginated(
+    client: TestClient, session: Session
+):
+    school = get_school_factory(session, code="PAGE0001")
+    other_school = get_school_factory(session, code="PAGE0002")
+    for index in range(3):
+        get_parents_list_factory(
+            session, school_id=school.id, creator_id=1, list_name=f"Liste {index}"
+        )
+    get_parents_list_factory(session, school_id=other_school.id, creator_id=1)
+
+    first_page = client.get("/parents-lists/PAGE0001", params={"limit": 2}).json()
+    last_page = client.get(
+        "/parents-lists/PAGE0001",
+        params={"limit": 2, "cursor": first_page["next_cursor"]},
+    ).json()
+
+    assert [parents_list["list_name"] for parents_list in first_page["items"]] == [
+        "Liste 0",
+        "Liste 1",
+    ]
+    assert [parents_list["list_name"] for parents_list in last_page["items"]] == [
+        "Liste 2"
+    ]
+    assert last_page["next_cursor"] is None
+
+
+def test_get_parents_lists_with_invalid_cursor(client: TestClient, session: Session):
+    get_school_factory(session, code="PAGE0003")
+
+    response = client.get("/parents-lists/PAGE0003", params={"cursor": "invalid"})
+
+    assert response.status_code == 400
+
+
+def test_get_parents_lists_limit_above_maximum(client: TestClient):
+    response = client.get("/parents-lists/PAGE0004", params={"limit": 1000})
+
+    assert response.status_code == 422
+
+
+def test_accept_parents_list(client: TestClient, session: Session):
+    parents_list = get_parents_list_factory(session, creator_id=4000, school_id=1)
+    list_id = parents_list.id
+    get_list_link_factory(
+        session,
+        list_id=list_id,
+        user_id=4000,
+        status="accepted",
+        position_in_list=1,
+        is_admin=True,
+    )
+    get_user_factory(session, id=4001, username="waiting parent")
+    get_list_link_factory(
+        session, list_id=list_id, user_id=4001, status="waiting", position_in_list=0
+    )
+    login_as(user_id=4000, parents_list_ids=[list_id], admin_list_ids=[list_id])
+
+    response = client.patch(f"/parents-lists/accept/4001/{list_id}")
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "accepted"
+    assert response.json()["position_in_list"] == 2
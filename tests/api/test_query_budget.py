@@ -0,0 +1,335 @@
+import re
+from collections.abc import Callable
+
+import pytest
+from fastapi.testclient import TestClient
+from httpx import Response
+from sqlmodel import Session
+
+from app.api import parents_list, user_information
+from app.api.links.models import SchoolLink, SchoolRelation
+from app.auth.token import create_access_token
+from app.commun.crypto import generate_password_reset_token
+from app.emailmanager import api as emailmanager_api
+from app.emailmanager.models import EmailConfirmationToken
+from app.main import app
+from app.monitoring import api as monitoring_api
+from tests.factories import (
+    TEST_PASSWORD,
+    get_list_link_factory,
+    get_parents_list_factory,
+    get_school_factory,
+    get_user_factory,
+    get_user_information_factory,
+)
+
+# Most statements a route may run on its happy path, authentication included.
+# Raise a budget only with a reason: a growing count is usually an N+1.
+# Routes changing the lists, schools, admin flags or email of a user pay one
+# UPDATE to make their claims tokens stale (abump_token_versions).
+QUERY_BUDGETS: dict[tuple[str, str], int] = {
+    ("POST", "/token"): 1,
+    ("POST", "/token/refresh"): 1,
+    ("POST", "/register"): 3,
+    ("GET", "/users/me/"): 1,
+    ("DELETE", "/users/me/"): 3,
+    ("GET", "/users/me/details/"): 1,
+    ("POST", "/confirmation-email/"): 8,
+    ("GET", "/confirmation-email/{token}"): 4,
+    ("POST", "/confirmation-email/contact-user/{user_id}"): 2,
+    ("POST", "/confirmation-email/request-password-reset"): 2,
+    ("POST", "/confirmation-email/reset-password"): 3,
+    ("GET", "/user-informations/"): 2,
+    ("POST", "/user-informations/"): 4,
+    ("GET", "/schools/me"): 3,
+    ("GET", "/schools/{school_code}"): 1,
+    ("POST", "/schools/"): 6,
+    ("GET", "/schools/join/{school_code}"): 6,
+    ("GET", "/parents-lists/{school_code}"): 2,
+    ("POST", "/parents-lists/"): 8,
+    ("POST", "/parents-lists/join/{list_id}"): 7,
+    ("DELETE", "/parents-lists/leave/{list_id}"): 5,
+    ("PATCH", "/parents-lists/accept/{user_id}/{list_id}"): 7,
+    ("GET", "/links/confirmed/{list_id}"): 1,
+    ("GET", "/links/waiting/{list_id}"): 1,
+    ("PATCH", "/links/up/{list_id}/{user_id}"): 4,
+    ("PATCH", "/links/down/{list_id}/{user_id}"): 4,
+    ("PATCH", "/links/reorder/{list_id}"): 4,
+    ("PATCH", "/links/make-admin/{list_id}/{user_id}"): 5,
+    ("PATCH", "/links/transfer/{list_id}/{user_id}"): 7,
+    ("GET", "/monitoring/pool"): 0,
+    ("GET", "/monitoring/caches"): 0,
+    ("GET", "/monitoring/hashing"): 0,
+    ("GET", "/monitoring/decryption"): 0,
+}
+
+SERVER_TIMING_DB = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+
+
+def query_count(response: Response) -> int:
+    """Statements run by the request, from its `Server-Timing` header."""
+    match = SERVER_TIMING_DB.search(response.headers["Server-Timing"])
+    assert match is not None, response.headers["Server-Timing"]
+
+    return int(match.group(1))
+
+
+def assert_within_query_budget(response: Response, route: tuple[str, str]) -> None:
+    count = query_count(response)
+    budget = QUERY_BUDGETS[route]
+
+    assert count <= budget, (
+        f"{route[0]} {route[1]} ran {count} queries, over its budget of {budget}"
+    )
+
+
+def api_routes() -> set[tuple[str, str]]:
+    return {
+        (method.upper(), path)
+        for path, operations in app.openapi()["paths"].items()
+        for method in operations
+    }
+
+
+def test_every_route_has_a_query_budget():
+    assert api_routes() == set(QUERY_BUDGETS)
+
+
+@pytest.fixture
+def world(session: Session, monkeypatch) -> dict:
+    """
+    A school with a list: the admin (1), a member (2) and a parent waiting to
+    join (3). A parent of the school who isn't on the list, a user without
+    informations, and a second school.
+    """
+    for module in (emailmanager_api, parents_list.api, user_information.api):
+        monkeypatch.setattr(module, "send_contact_message", lambda *a, **k: None)
+    monkeypatch.setattr(monitoring_api, "MONITORING_TOKEN", MONITORING_TOKEN)
+
+    school = get_school_factory(session, id=100, code="BUDGET01")
+    get_school_factory(session, id=101, code="BUDGET02")
+    parents_list_id = get_parents_list_factory(
+        session, id=100, school_id=school.id, creator_id=100
+    ).id
+
+    users = {}
+    for user_id, username in [
+        (100, "admin"),
+        (101, "member"),
+        (102, "waiting"),
+        (103, "newcomer"),
+        (104, "fresh"),
+    ]:
+        get_user_factory(session, id=user_id, username=username)
+        users[username] = user_id
+
+        if username == "fresh":
+            continue
+
+        get_user_information_factory(
+            session,
+            id=user_id,
+            user_id=user_id,
+            email=f"{username}@example.com",
+            is_email_confirmed=True,
+        )
+        session.add(
+            SchoolLink(
+                school_id=school.id,
+                user_id=user_id,
+                school_relation=SchoolRelation.PARENT,
+            )
+        )
+
+    for user_id, status, position, is_admin in [
+        (100, "accepted", 1, True),
+        (101, "accepted", 2, False),
+        (102, "waiting", 0, False),
+    ]:
+        get_list_link_factory(
+            session,
+            list_id=parents_list_id,
+            user_id=user_id,
+            status=status,
+            position_in_list=position,
+            is_admin=is_admin,
+        )
+
+    session.add(EmailConfirmationToken(token="budget", user_id=users["member"]))
+    session.commit()
+
+    return {
+        "list_id": parents_list_id,
+        "users": users,
+    }
+
+
+MONITORING_TOKEN = "monitoring-token"
+MONITORING_HEADERS = {"Authorization": f"Bearer {MONITORING_TOKEN}"}
+
+
+def auth(username: str) -> dict[str, str]:
+    token = create_access_token({"sub": username}).access_token
+
+    return {"Authorization": f"Bearer {token}"}
+
+
+SCHOOL = {
+    "school_name": "Ecole",
+    "city": "Paris",
+    "zip_code": "75000",
+    "country": "France",
+    "adress": "1 rue de Paris",
+    "school_relation": "parent",
+    "code": "BUDGET03",
+}
+
+Scenario = Callable[[TestClient, dict], Response]
+
+SCENARIOS: dict[tuple[str, str], Scenario] = {
+    ("POST", "/token"): lambda client, world: client.post(
+        "/token", data={"username": "admin", "password": TEST_PASSWORD}
+    ),
+    ("POST", "/token/refresh"): lambda client, world: client.post(
+        "/token/refresh", headers=auth("admin")
+    ),
+    ("POST", "/register"): lambda client, world: client.post(
+        "/register", data={"username": "newuser", "password": TEST_PASSWORD}
+    ),
+    ("GET", "/users/me/"): lambda client, world: client.get(
+        "/users/me/", headers=auth("admin")
+    ),
+    ("DELETE", "/users/me/"): lambda client, world: client.delete(
+        "/users/me/", headers=auth("fresh")
+    ),
+    ("GET", "/users/me/details/"): lambda client, world: client.get(
+        "/users/me/details/", headers=auth("admin")
+    ),
+    ("POST", "/confirmation-email/"): lambda client, world: client.post(
+        "/confirmation-email/",
+        json={"email": "other@example.com"},
+        headers=auth("member"),
+    ),
+    ("GET", "/confirmation-email/{token}"): lambda client, world: client.get(
+        "/confirmation-email/budget"
+    ),
+    (
+        "POST",
+        "/confirmation-email/contact-user/{user_id}",
+    ): lambda client, world: client.post(
+        f"/confirmation-email/contact-user/{world['users']['member']}",
+        json={"message": "Bonjour"},
+        headers=auth("admin"),
+    ),
+    (
+        "POST",
+        "/confirmation-email/request-password-reset",
+    ): lambda client, world: client.post(
+        "/confirmation-email/request-password-reset", json={"username": "member"}
+    ),
+    ("POST", "/confirmation-email/reset-password"): lambda client, world: client.post(
+        "/confirmation-email/reset-password",
+        json={
+            "token": generate_password_reset_token(world["users"]["member"]),
+            "new_password": TEST_PASSWORD,
+        },
+    ),
+    ("GET", "/user-informations/"): lambda client, world: client.get(
+        "/user-informations/", headers=auth("admin")
+    ),
+    ("POST", "/user-informations/"): lambda client, world: client.post(
+        "/user-informations/",
+        json={"name": "Fresh", "first_name": "Parent", "email": None},
+        headers=auth("fresh"),
+    ),
+    ("GET", "/schools/me"): lambda client, world: client.get(
+        "/schools/me", headers=auth("admin")
+    ),
+    ("GET", "/schools/{school_code}"): lambda client, world: client.get(
+        "/schools/BUDGET01"
+    ),
+    ("POST", "/schools/"): lambda client, world: client.post(
+        "/schools/", json=SCHOOL, headers=auth("admin")
+    ),
+    ("GET", "/schools/join/{school_code}"): lambda client, world: client.get(
+        "/schools/join/BUDGET02", headers=auth("admin")
+    ),
+    ("GET", "/parents-lists/{school_code}"): lambda client, world: client.get(
+        "/parents-lists/BUDGET01"
+    ),
+    ("POST", "/parents-lists/"): lambda client, world: client.post(
+        "/parents-lists/",
+        json={"list_name": "Liste", "holder_length": 5, "school_code": "BUDGET01"},
+        headers=auth("admin"),
+    ),
+    ("POST", "/parents-lists/join/{list_id}"): lambda client, world: client.post(
+        f"/parents-lists/join/{world['list_id']}",
+        json={"message": "Bonjour"},
+        headers=auth("newcomer"),
+    ),
+    ("DELETE", "/parents-lists/leave/{list_id}"): lambda client, world: client.delete(
+        f"/parents-lists/leave/{world['list_id']}", headers=auth("member")
+    ),
+    (
+        "PATCH",
+        "/parents-lists/accept/{user_id}/{list_id}",
+    ): lambda client, world: client.patch(
+        f"/parents-lists/accept/{world['users']['waiting']}/{world['list_id']}",
+        headers=auth("admin"),
+    ),
+    ("GET", "/links/confirmed/{list_id}"): lambda client, world: client.get(
+        f"/links/confirmed/{world['list_id']}"
+    ),
+    ("GET", "/links/waiting/{list_id}"): lambda client, world: client.get(
+        f"/links/waiting/{world['list_id']}"
+    ),
+    ("PATCH", "/links/up/{list_id}/{user_id}"): lambda client, world: client.patch(
+        f"/links/up/{world['list_id']}/{world['users']['member']}",
+        headers=auth("admin"),
+    ),
+    ("PATCH", "/links/down/{list_id}/{user_id}"): lambda client, world: client.patch(
+        f"/links/down/{world['list_id']}/{world['users']['admin']}",
+        headers=auth("admin"),
+    ),
+    ("PATCH", "/links/reorder/{list_id}"): lambda client, world: client.patch(
+        f"/links/reorder/{world['list_id']}",
+        json={"user_ids": [world["users"]["member"], world["users"]["admin"]]},
+        headers=auth("admin"),
+    ),
+    (
+        "PATCH",
+        "/links/make-admin/{list_id}/{user_id}",
+    ): lambda client, world: client.patch(
+        f"/links/make-admin/{world['list_id']}/{world['users']['member']}",
+        headers=auth("admin"),
+    ),
+    (
+        "PATCH",
+        "/links/transfer/{list_id}/{user_id}",
+    ): lambda client, world: client.patch(
+        f"/links/transfer/{world['list_id']}/{world['users']['member']}",
+        headers=auth("admin"),
+    ),
+    ("GET", "/monitoring/pool"): lambda client, world: client.get(
+        "/monitoring/pool", headers=MONITORING_HEADERS
+    ),
+    ("GET", "/monitoring/caches"): lambda client, world: client.get(
+        "/monitoring/caches", headers=MONITORING_HEADERS
+    ),
+    ("GET", "/monitoring/hashing"): lambda client, world: client.get(
+        "/monitoring/hashing", headers=MONITORING_HEADERS
+    ),
+    ("GET", "/monitoring/decryption"): lambda client, world: client.get(
+        "/monitoring/decryption", headers=MONITORING_HEADERS
+    ),
+}
+
+
+@pytest.mark.parametrize("route", sorted(QUERY_BUDGETS), ids=" ".join)
+def test_route_stays_within_its_query_budget(
+    client: TestClient, world: dict, route: tuple[str, str]
+):
+    response = SCENARIOS[route](client, world)
+
+    assert response.is_success, response.text
+    assert_within_query_budget(response, route)
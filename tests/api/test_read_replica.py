@@ -0,0 +1,110 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import NullPool
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.api.school import models as school_models
+from app.commun.cache import TTLCache
+from app.database import unit_of_work
+from app.database.replica import LAST_WRITE_COOKIE
+from app.main import app
+from tests.api.test_auth import register
+from tests.factories import get_school_factory
+
+SCHOOL = {
+    "school_name": "Ecole",
+    "city": "Paris",
+    "zip_code": "75000",
+    "country": "France",
+    "adress": "1 rue de Paris",
+    "school_relation": "parent",
+    "code": "PRIMARY1",
+}
+
+
+@pytest.fixture
+def replica_session(client: TestClient, tmp_path, monkeypatch):
+    # A replica which never catches up with the primary
+    replica_engine = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    SQLModel.metadata.create_all(replica_engine)
+    monkeypatch.setattr(unit_of_work, "read_engine", replica_engine)
+    monkeypatch.setattr(
+        unit_of_work,
+        "async_read_engine",
+        create_async_engine(
+            replica_engine.url.set(drivername="sqlite+aiosqlite"),
+            poolclass=NullPool,
+        ),
+    )
+    # The tests tell the databases apart by the schools they see
+    monkeypatch.setattr(school_models, "SCHOOL_CACHE", TTLCache(0, 0))
+
+    with Session(replica_engine) as session:
+        yield session
+
+
+def test_readonly_routes_read_from_the_replica(
+    client: TestClient, replica_session: Session
+):
+    get_school_factory(replica_session, code="REPLICA1")
+
+    response = client.get("/schools/REPLICA1")
+
+    assert response.status_code == 200
+
+
+def test_writer_reads_own_writes_from_the_primary(
+    client: TestClient, replica_session: Session
+):
+    get_school_factory(replica_session, code="REPLICA1")
+    headers = {"Authorization": f"Bearer {register(client, 'writer')}"}
+
+    # Without the cookie of the registration, the new user reads from the replica
+    client.cookies.clear()
+    assert client.get("/schools/REPLICA1", headers=headers).status_code == 200
+
+    assert client.post("/schools/", json=SCHOOL, headers=headers).status_code == 201
+
+    assert client.get("/schools/PRIMARY1", headers=headers).status_code == 200
+    assert client.get("/schools/REPLICA1", headers=headers).status_code == 404
+    # Other clients keep reading from the lagging replica
+    assert TestClient(app).get("/schools/PRIMARY1").status_code == 404
+
+
+def test_last_write_cookie_is_set_by_writes_only(
+    client: TestClient, replica_session: Session
+):
+    headers = {"Authorization": f"Bearer {register(client, 'writer')}"}
+    client.cookies.clear()
+
+    response = client.get("/schools/PRIMARY1", headers=headers)
+    assert LAST_WRITE_COOKIE not in response.cookies
+
+    response = client.post("/schools/", json=SCHOOL, headers=headers)
+    assert LAST_WRITE_COOKIE in response.cookies
+
+
+def test_last_write_cookie_is_read_by_any_worker(
+    client: TestClient, replica_session: Session
+):
+    headers = {"Authorization": f"Bearer {register(client, 'writer')}"}
+    response = client.post("/schools/", json=SCHOOL, headers=headers)
+    last_write = response.cookies[LAST_WRITE_COOKIE]
+
+    # Another worker only has the cookie to go by
+    other_worker = TestClient(app, cookies={LAST_WRITE_COOKIE: last_write})
+    assert other_worker.get("/schools/PRIMARY1").status_code == 200
+
+
+@pytest.mark.parametrize("last_write", ["1", "not a time", str(time.time() + 3600)])
+def test_expired_or_forged_last_write_reads_from_the_replica(
+    client: TestClient, replica_session: Session, last_write: str
+):
+    get_school_factory(replica_session, code="REPLICA1")
+
+    client.cookies.set(LAST_WRITE_COOKIE, last_write)
+
+    assert client.get("/schools/REPLICA1").status_code == 200
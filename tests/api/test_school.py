@@ -0,0 +1,95 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.api.links.models import SchoolLink, SchoolRelation
+from app.api.school.models import SCHOOL_CACHE, SCHOOL_SERVICE
+from app.auth.token import UserWithInformations, get_current_user_with_informations
+from app.main import app
+from tests.factories import get_school_factory
+
+
+def login_as_member_of_schools(session: Session, nb_schools: int) -> None:
+    user_id = 1000 + nb_schools
+    school_ids = []
+    for index in range(nb_schools):
+        school = get_school_factory(session, code=f"S{nb_schools}{index:06d}")
+        session.add(
+            SchoolLink(
+                school_id=school.id,
+                user_id=user_id,
+                school_relation=SchoolRelation.PARENT,
+            )
+        )
+        school_ids.append(school.id)
+    session.commit()
+
+    app.dependency_overrides[get_current_user_with_informations] = lambda: (
+        UserWithInformations(
+            id=user_id,
+            username="parent",
+            is_email_confirmed=False,
+            parents_list_ids=[],
+            school_ids=school_ids,
+        )
+    )
+
+
+def test_get_school_of_user_query_count_does_not_grow_with_schools(
+    client: TestClient, session: Session, count_queries
+):
+    login_as_member_of_schools(session, 1)
+    with count_queries() as one_school_queries:
+        response = client.get("/schools/me")
+        assert response.status_code == 200
+        assert len(response.json()) == 1
+
+    login_as_member_of_schools(session, 5)
+    with count_queries() as five_schools_queries:
+        response = client.get("/schools/me")
+        assert response.status_code == 200
+        assert len(response.json()) == 5
+
+    assert len(one_school_queries) == len(five_schools_queries)
+
+
+def test_get_school_by_code_is_cached(
+    client: TestClient, session: Session, count_queries
+):
+    get_school_factory(session, code="CACHE001", school_name="Ecole Jaures")
+    before = SCHOOL_CACHE.statistics()
+    assert client.get("/schools/CACHE001").status_code == 200
+
+    with count_queries() as queries:
+        response = client.get("/schools/CACHE001")
+
+    assert len(queries) == 0
+    assert response.json()["school_name"] == "Ecole Jaures"
+    after = SCHOOL_CACHE.statistics()
+    assert after["hits"] - before["hits"] == 1
+    assert after["misses"] - before["misses"] == 1
+    assert after["hit_rate"] is not None
+
+
+def test_school_update_invalidates_the_cache(client: TestClient, session: Session):
+    school = get_school_factory(session, code="CACHE002", school_name="Ecole Jaures")
+    assert client.get("/schools/CACHE002").json()["school_name"] == "Ecole Jaures"
+
+    SCHOOL_SERVICE.update(session, school.id, encrypted_school_name="Ecole Zola")
+    session.commit()
+
+    assert client.get("/schools/CACHE002").json()["school_name"] == "Ecole Zola"
+
+
+def test_school_cache_is_cleared_once_the_update_is_committed(session: Session):
+    school = get_school_factory(session, code="CACHE003", school_name="Ecole Jaures")
+    SCHOOL_SERVICE.get_decrypted_by_id(session, school.id)
+
+    SCHOOL_SERVICE.update(session, school.id, encrypted_school_name="Ecole Zola")
+    assert SCHOOL_CACHE.get(("id", school.id)) is not None
+
+    session.rollback()
+    assert SCHOOL_CACHE.get(("id", school.id)) is not None
+
+    SCHOOL_SERVICE.update(session, school.id, encrypted_school_name="Ecole Zola")
+    session.commit()
+    assert SCHOOL_CACHE.get(("id", school.id)) is None
@@ -0,0 +1,45 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from tests.factories import TEST_PASSWORD, get_user_information_factory
+
+
+def register(client: TestClient) -> tuple[int, dict[str, str]]:
+    token = client.post(
+        "/register", data={"username": "parent", "password": TEST_PASSWORD}
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    return client.get("/users/me/", headers=headers).json()["id"], headers
+
+
+def test_read_user_informations(client: TestClient, session: Session):
+    user_id, headers = register(client)
+    get_user_information_factory(
+        session, user_id=user_id, name="Dupont", first_name="Jean", email=None
+    )
+
+    response = client.get("/user-informations/", headers=headers)
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "name": "Dupont",
+        "first_name": "Jean",
+        "is_email": False,
+    }
+
+
+def test_read_missing_user_informations(client: TestClient):
+    _, headers = register(client)
+
+    response = client.get("/user-informations/", headers=headers)
+
+    assert response.status_code == 404
+
+
+def test_user_informations_response_model_is_documented(client: TestClient):
+    openapi = client.get("/openapi.json").json()
+
+    responses = openapi["paths"]["/user-informations/"]["get"]["responses"]
+    schema = responses["200"]["content"]["application/json"]["schema"]
+    assert schema["$ref"].endswith("/UserInformationSchemaOut")
@@ -0,0 +1,55 @@
+import time
+
+from app.commun.cache import TTLCache
+
+
+def test_cache_hit_and_miss():
+    cache = TTLCache(maxsize=10, ttl_seconds=60)
+
+    assert cache.get("parent") is None
+    cache.set("parent", 1)
+
+    assert cache.get("parent") == 1
+    assert cache.statistics()["hits"] == 1
+    assert cache.statistics()["misses"] == 1
+    assert cache.statistics()["hit_rate"] == 0.5
+
+
+def test_cache_entries_expire():
+    cache = TTLCache(maxsize=10, ttl_seconds=0.01)
+    cache.set("parent", 1)
+
+    time.sleep(0.02)
+
+    assert cache.get("parent") is None
+    assert cache.statistics()["size"] == 0
+
+
+def test_cache_evicts_the_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl_seconds=60)
+    cache.set("first", 1)
+    cache.set("second", 2)
+    cache.get("first")
+
+    cache.set("third", 3)
+
+    assert cache.get("second") is None
+    assert cache.get("first") == 1
+    assert cache.get("third") == 3
+
+
+def test_cache_invalidate():
+    cache = TTLCache(maxsize=10, ttl_seconds=60)
+    cache.set("parent", 1)
+
+    cache.invalidate("parent")
+    cache.invalidate("unknown")
+
+    assert cache.get("parent") is None
+
+
+def test_disabled_cache_stores_nothing():
+    cache = TTLCache(maxsize=0, ttl_seconds=60)
+    cache.set("parent", 1)
+
+    assert cache.get("parent") is None
@@ -1,7 +1,27 @@
+import base64
+
 import pytest
+from cryptography.fernet import Fernet
+from passlib.hash import bcrypt
 
-from app.commun.crypto import decrypt, encrypt, generate_password
+from app.api.school.models import School
+from app.commun import crypto
+from app.commun.crypto import (
+    CIPHERTEXT_PREFIX,
+    ciphertext_to_token,
+    compact_ciphertext,
+    decrypt,
+    decrypt_many,
+    encrypt,
+    encrypt_many,
+    generate_password,
+    get_password_hash,
+    needs_rotation,
+    rotate,
+    verify_and_update_password,
+)
 from app.commun.validator import validate_password
+from app.settings import BCRYPT_ROUNDS
 
 
 def test_encryt_and_decrypt_email(key: bytes):
@@ -12,8 +32,121 @@ def test_encryt_and_decrypt_email(key: bytes):
     assert email == decrypt(encrypted_email, key)
 
 
+def test_decrypt_reads_the_legacy_format(key: bytes):
+    encrypted_email = encrypt("parent@example.com", key)
+    legacy_email = base64.urlsafe_b64encode(
+        ciphertext_to_token(encrypted_email)
+    ).decode()
+
+    assert encrypted_email.startswith(CIPHERTEXT_PREFIX)
+    assert len(encrypted_email) < len(legacy_email)
+    assert decrypt(legacy_email, key) == "parent@example.com"
+    assert compact_ciphertext(legacy_email) == encrypted_email
+
+
+def test_encrypt_many_and_decrypt_many(key: bytes):
+    values = ["Jean", None, "Marie"]
+
+    encrypted_values = encrypt_many(values, key)
+
+    assert encrypted_values[1] is None
+    assert decrypt(encrypted_values[0], key) == "Jean"
+    assert decrypt_many(encrypted_values, key) == values
+
+
+def test_key_ring_decrypts_with_the_former_keys(key: bytes):
+    new_key = Fernet.generate_key()
+    key_ring = (new_key, key)
+    encrypted_with_former_key = encrypt("Jean", key)
+
+    encrypted_with_key_ring = encrypt("Marie", key_ring)
+
+    assert decrypt(encrypted_with_former_key, key_ring) == "Jean"
+    assert decrypt_many([encrypted_with_former_key], key_ring) == ["Jean"]
+    assert decrypt(encrypted_with_key_ring, new_key) == "Marie"
+
+
+def test_rotate_encrypts_with_the_primary_key(key: bytes):
+    new_key = Fernet.generate_key()
+    key_ring = (new_key, key)
+    encrypted_with_former_key = encrypt("Jean", key)
+    legacy_with_new_key = base64.urlsafe_b64encode(
+        ciphertext_to_token(encrypt("Marie", new_key))
+    ).decode()
+
+    rotated = rotate(encrypted_with_former_key, key_ring)
+
+    assert needs_rotation(encrypted_with_former_key, key_ring)
+    assert needs_rotation(legacy_with_new_key, key_ring)
+    assert not needs_rotation(rotated, key_ring)
+    assert decrypt(rotated, new_key) == "Jean"
+    assert rotate(legacy_with_new_key, key_ring).startswith(CIPHERTEXT_PREFIX)
+
+
+@pytest.fixture
+def fernet_constructions(monkeypatch) -> list[bytes]:
+    constructions = []
+
+    class CountingFernet(Fernet):
+        def __init__(self, key: bytes) -> None:
+            constructions.append(key)
+            super().__init__(key)
+
+    monkeypatch.setattr(crypto, "Fernet", CountingFernet)
+    crypto.get_cipher.cache_clear()
+    yield constructions
+    crypto.get_cipher.cache_clear()
+
+
+def test_cipher_is_built_once_per_key(key: bytes, fernet_constructions):
+    encrypted_values = [encrypt(f"Parent {index}", key) for index in range(40)]
+
+    decrypt_many(encrypted_values, key)
+    decrypt(encrypted_values[0], key)
+
+    assert fernet_constructions == [key]
+
+
+def test_schools_are_decrypted_with_one_cipher(fernet_constructions):
+    schools = [
+        School(
+            id=index,
+            school_name=f"Ecole {index}",
+            city="Paris",
+            zip_code="75000",
+            country="France",
+            adress="1 rue de Paris",
+            code=f"CODE{index:04d}",
+        )
+        for index in range(10)
+    ]
+
+    decrypted_schools = School.to_decrypted_many(schools)
+
+    assert len(fernet_constructions) == 1
+    assert decrypted_schools == [school.to_decrypted() for school in schools]
+
+
 @pytest.mark.parametrize("_", range(50))
 def test_generate_password(_):
     password = generate_password()
 
     assert validate_password(password) == password
+
+
+def test_verify_and_update_password_keeps_a_current_hash():
+    hashed_password = get_password_hash("Password123*")
+
+    assert verify_and_update_password("Password123*", hashed_password) == (True, None)
+    assert verify_and_update_password("Wrong123*", hashed_password) == (False, None)
+
+
+def test_verify_and_update_password_rehashes_another_cost():
+    hashed_password = bcrypt.using(rounds=4).hash("Password123*")
+
+    is_valid, new_hashed_password = verify_and_update_password(
+        "Password123*", hashed_password
+    )
+
+    assert is_valid is True
+    assert new_hashed_password.startswith(f"$2b${BCRYPT_ROUNDS:02d}$")
@@ -0,0 +1,49 @@
+import pytest
+
+from app.commun.crypto import encrypt_many
+from app.commun.decryption import DecryptionEngine
+
+
+@pytest.fixture
+def values() -> list[str | None]:
+    return [f"Parent {index}" if index % 3 else None for index in range(10)]
+
+
+def test_small_batches_are_decrypted_in_thread(key: bytes, values):
+    engine = DecryptionEngine(process_threshold=100, processes=2)
+
+    assert engine.decrypt_many(encrypt_many(values, key), key) == values
+    assert engine.statistics()["in_thread_batches"] == 1
+    assert engine.statistics()["pool_started"] is False
+
+
+def test_threshold_zero_never_uses_processes(key: bytes, values):
+    engine = DecryptionEngine(process_threshold=0, processes=2)
+
+    assert engine.decrypt_many(encrypt_many(values, key), key) == values
+    assert engine.statistics()["pool_started"] is False
+
+
+def test_large_batches_are_split_across_processes(key: bytes, values):
+    engine = DecryptionEngine(process_threshold=5, processes=3)
+    try:
+        assert engine.decrypt_many(encrypt_many(values, key), key) == values
+        assert engine.statistics()["process_batches"] == 1
+        assert engine.statistics()["pool_started"] is True
+    finally:
+        engine.shutdown()
+
+
+@pytest.mark.anyio
+async def test_adecrypt_many_with_processes(key: bytes, values):
+    engine = DecryptionEngine(process_threshold=5, processes=2)
+    try:
+        assert await engine.adecrypt_many(encrypt_many(values, key), key) == values
+        assert (
+            await engine.adecrypt_many(encrypt_many(values[:2], key), key)
+            == (values[:2])
+        )
+        assert engine.statistics()["process_batches"] == 1
+        assert engine.statistics()["in_thread_batches"] == 1
+    finally:
+        engine.shutdown()
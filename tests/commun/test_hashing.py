@@ -0,0 +1,79 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.commun.hashing import HashingExecutor
+from app.exceptions import ServiceUnavailableException
+
+
+def test_run_returns_the_result():
+    executor = HashingExecutor(max_workers=1, max_queue=0)
+
+    assert asyncio.run(executor.run(pow, 2, 10)) == 1024
+    assert executor.statistics()["completed"] == 1
+    assert executor.statistics()["pending"] == 0
+
+
+def test_run_raises_the_exception():
+    executor = HashingExecutor(max_workers=1, max_queue=0)
+
+    with pytest.raises(ZeroDivisionError):
+        asyncio.run(executor.run(divmod, 1, 0))
+
+    statistics = executor.statistics()
+    assert statistics["pending"] == 0
+    assert statistics["failed"] == 1
+    assert statistics["completed"] == 0
+
+
+def test_run_refuses_work_beyond_the_queue():
+    executor = HashingExecutor(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def burst():
+        running = asyncio.ensure_future(executor.run(release.wait))
+        waiting = asyncio.ensure_future(executor.run(pow, 2, 2))
+        await asyncio.sleep(0)
+
+        with pytest.raises(ServiceUnavailableException):
+            await executor.run(pow, 2, 3)
+
+        release.set()
+        return await running, await waiting
+
+    assert asyncio.run(burst()) == (True, 4)
+    statistics = executor.statistics()
+    assert statistics["rejected"] == 1
+    assert statistics["completed"] == 2
+    assert statistics["max_wait_ms"] >= 0
+
+
+def test_cancelled_run_stays_pending_until_its_job_is_done():
+    executor = HashingExecutor(max_workers=1, max_queue=1)
+    started, release = threading.Event(), threading.Event()
+
+    def hash_slowly():
+        started.set()
+        return release.wait()
+
+    async def cancel():
+        running = asyncio.ensure_future(executor.run(hash_slowly))
+        waiting = asyncio.ensure_future(executor.run(pow, 2, 2))
+        await asyncio.to_thread(started.wait)
+
+        running.cancel()
+        waiting.cancel()
+        await asyncio.gather(running, waiting, return_exceptions=True)
+
+        # The running job can't be interrupted: its thread is still taken
+        assert executor.statistics()["pending"] == 1
+
+    asyncio.run(cancel())
+    release.set()
+    executor._executor.shutdown(wait=True)
+
+    statistics = executor.statistics()
+    assert statistics["pending"] == 0
+    assert statistics["cancelled"] == 1
+    assert statistics["completed"] == 1
@@ -1,21 +1,61 @@
+import contextlib
+import os
+
 import pytest
 from cryptography.fernet import Fernet
 from fastapi.testclient import TestClient
+from sqlalchemy import NullPool, event
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import Session, SQLModel, create_engine
-from sqlmodel.pool import StaticPool
 
-from app.main import app
+# First: app.main registers every table before unit_of_work creates them
+from app.main import app  # isort: skip
+from app.api.school.models import SCHOOL_CACHE
+from app.auth.token import TOKEN_VERSIONS, USER_CACHE
+from app.database import unit_of_work
+from app.database.query_statistics import instrument_engine
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
 
 
 @pytest.fixture(name="engine")
-def engine_fixture():
-    engine = create_engine(
-        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
-    )
+def engine_fixture(tmp_path):
+    # A file database, so that the async engine used by the API sees the rows
+    # created through the sync session of the tests
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
     SQLModel.metadata.create_all(engine)
+    instrument_engine(engine)
     return engine
 
 
+@pytest.fixture(name="postgres_engine")
+def postgres_engine_fixture():
+    # For the tests of row locks, which SQLite doesn't take: TEST_POSTGRES_URL
+    # is an empty database, its tables are dropped afterwards
+    url = os.getenv("TEST_POSTGRES_URL")
+    if url is None:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+
+    engine = create_engine(url)
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    SQLModel.metadata.drop_all(engine)
+    engine.dispose()
+
+
+@pytest.fixture(name="async_engine")
+def async_engine_fixture(engine):
+    # Every TestClient request runs on its own event loop: don't pool
+    async_engine = create_async_engine(
+        engine.url.set(drivername="sqlite+aiosqlite"), poolclass=NullPool
+    )
+    instrument_engine(async_engine.sync_engine)
+    return async_engine
+
+
 @pytest.fixture(name="session")
 def session_fixture(engine):
     with Session(engine) as session:
@@ -28,5 +68,39 @@ def key():
 
 
 @pytest.fixture
-def client():
-    return TestClient(app)
+def client(engine, async_engine, monkeypatch):
+    monkeypatch.setattr(unit_of_work, "engine", engine)
+    monkeypatch.setattr(unit_of_work, "async_engine", async_engine)
+    monkeypatch.setattr(unit_of_work, "read_engine", engine)
+    monkeypatch.setattr(unit_of_work, "async_read_engine", async_engine)
+    # Every test has its own database: don't reuse the users of another one
+    USER_CACHE.clear()
+    TOKEN_VERSIONS.clear()
+    SCHOOL_CACHE.clear()
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def count_queries(engine, async_engine):
+    @contextlib.contextmanager
+    def counter():
+        statements: list[str] = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        engines = [engine, async_engine.sync_engine]
+        for listened_engine in engines:
+            event.listen(
+                listened_engine, "before_cursor_execute", before_cursor_execute
+            )
+        try:
+            yield statements
+        finally:
+            for listened_engine in engines:
+                event.remove(
+                    listened_engine, "before_cursor_execute", before_cursor_execute
+                )
+
+    return counter
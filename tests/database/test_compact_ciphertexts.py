@@ -0,0 +1,48 @@
+import base64
+
+from sqlmodel import Session
+
+from app.api.school.models import SCHOOL_SERVICE
+from app.api.user_information.models import USER_INFORMATION_SERVICE
+from app.commun.crypto import CIPHERTEXT_PREFIX, ciphertext_to_token, decrypt
+from app.database.compact_ciphertexts import compact_ciphertexts
+from tests.factories import get_school_factory, get_user_information_factory
+
+
+def to_legacy(stored: str) -> str:
+    return base64.urlsafe_b64encode(ciphertext_to_token(stored)).decode()
+
+
+def test_compact_ciphertexts_rewrites_legacy_values(engine, session: Session):
+    school = get_school_factory(session, city="Paris", code="LEGACY01")
+    legacy_city = to_legacy(school.encrypted_city)
+    SCHOOL_SERVICE.update_where(
+        session, {"id": school.id}, {"encrypted_city": legacy_city}
+    )
+    for user_id in (1, 2):
+        user_information = get_user_information_factory(
+            session, user_id=user_id, first_name="Jean", email=None
+        )
+        USER_INFORMATION_SERVICE.update_where(
+            session,
+            {"id": user_information.id},
+            {"encrypted_first_name": to_legacy(user_information.encrypted_first_name)},
+        )
+    session.commit()
+
+    assert compact_ciphertexts(engine, batch_size=1) == 3
+
+    session.expire_all()
+    school = SCHOOL_SERVICE.get_or_raise(session, id=school.id)
+    assert school.encrypted_city.startswith(CIPHERTEXT_PREFIX)
+    assert len(school.encrypted_city) < len(legacy_city)
+    assert decrypt(school.encrypted_city) == "Paris"
+    for user_information in USER_INFORMATION_SERVICE.get_all(session):
+        assert decrypt(user_information.encrypted_first_name) == "Jean"
+        assert user_information.encrypted_email is None
+
+
+def test_compact_ciphertexts_is_idempotent(engine, session: Session):
+    get_school_factory(session, code="LEGACY02")
+
+    assert compact_ciphertexts(engine) == 0
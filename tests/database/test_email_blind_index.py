@@ -0,0 +1,73 @@
+import pytest
+from sqlmodel import Session
+
+from app.api.user_information.models import (
+    USER_INFORMATION_SERVICE,
+    UserInformation,
+    email_blind_index,
+)
+from app.database.backfill_email_hashes import backfill_email_hashes
+from app.exceptions import DatabaseException
+from tests.factories import get_user_information_factory
+
+
+def test_email_hash_follows_the_email(session: Session):
+    user_information = get_user_information_factory(
+        session, user_id=1, email="parent@example.com"
+    )
+    assert user_information.email_hash == email_blind_index("parent@example.com")
+
+    USER_INFORMATION_SERVICE.update(
+        session, user_information.id, encrypted_email="other@example.com"
+    )
+    session.commit()
+    session.expire_all()
+    user_information = USER_INFORMATION_SERVICE.get_or_raise(session, user_id=1)
+    assert user_information.email_hash == email_blind_index("other@example.com")
+
+    USER_INFORMATION_SERVICE.update(session, user_information.id, encrypted_email=None)
+    session.commit()
+    session.expire_all()
+    user_information = USER_INFORMATION_SERVICE.get_or_raise(session, user_id=1)
+    assert user_information.email_hash is None
+
+
+def test_get_by_email(session: Session):
+    get_user_information_factory(session, user_id=1, email="Parent@Example.com")
+    get_user_information_factory(session, user_id=2, email=None)
+
+    assert (
+        USER_INFORMATION_SERVICE.get_by_email(session, " parent@example.com").user_id
+        == 1
+    )
+    assert USER_INFORMATION_SERVICE.get_by_email(session, "nobody@example.com") is None
+
+
+def test_email_is_unique(session: Session):
+    get_user_information_factory(session, user_id=1, email="parent@example.com")
+
+    with pytest.raises(DatabaseException):
+        USER_INFORMATION_SERVICE.create(
+            session,
+            UserInformation(
+                name="Parent", first_name="Jean", email="PARENT@example.com", user_id=2
+            ),
+        )
+
+
+def test_backfill_email_hashes(engine, session: Session):
+    for user_id in (1, 2):
+        get_user_information_factory(
+            session, user_id=user_id, email=f"parent{user_id}@example.com"
+        )
+    get_user_information_factory(session, user_id=3, email=None)
+    USER_INFORMATION_SERVICE.update_where(session, {}, {"email_hash": None})
+    session.commit()
+
+    assert backfill_email_hashes(engine, batch_size=1) == 2
+
+    assert (
+        USER_INFORMATION_SERVICE.get_by_email(session, "parent2@example.com").user_id
+        == 2
+    )
+    assert backfill_email_hashes(engine) == 0
@@ -0,0 +1,73 @@
+from sqlalchemy import create_engine, create_mock_engine, inspect
+from sqlmodel import SQLModel
+
+from app.database.migrations import (
+    create_index,
+    create_missing_columns,
+    create_missing_indexes,
+)
+
+
+def test_create_missing_indexes_on_existing_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    SQLModel.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.exec_driver_sql("DROP INDEX ix_list_links_list_id_user_id")
+        connection.exec_driver_sql("DROP INDEX ix_user_informations_user_id")
+
+    created = create_missing_indexes(engine)
+
+    assert sorted(created) == [
+        "ix_list_links_list_id_user_id",
+        "ix_user_informations_user_id",
+    ]
+    index_names = {index["name"] for index in inspect(engine).get_indexes("list_links")}
+    assert "ix_list_links_list_id_user_id" in index_names
+
+
+def test_create_missing_indexes_is_idempotent(engine):
+    assert create_missing_indexes(engine) == []
+
+
+def test_create_index_concurrently_on_postgresql():
+    statements = []
+    connection = create_mock_engine(
+        "postgresql+psycopg2://",
+        lambda sql, *args, **kwargs: statements.append(
+            str(sql.compile(dialect=connection.dialect))
+        ),
+    )
+    index = next(
+        index
+        for index in SQLModel.metadata.tables["list_links"].indexes
+        if index.name == "ix_list_links_list_id_user_id"
+    )
+
+    create_index(connection, index, concurrently=True)
+    create_index(connection, index, concurrently=False)
+
+    assert statements[0].startswith(f"CREATE INDEX CONCURRENTLY {index.name}")
+    assert statements[1].startswith(f"CREATE INDEX {index.name}")
+
+
+def test_create_missing_columns_on_existing_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    SQLModel.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.exec_driver_sql("ALTER TABLE users DROP COLUMN token_version")
+        connection.exec_driver_sql(
+            "INSERT INTO users (username, hashed_password) VALUES ('legacy', 'hash')"
+        )
+
+    created = create_missing_columns(engine)
+
+    assert created == ["users.token_version"]
+    with engine.connect() as connection:
+        assert (
+            connection.exec_driver_sql("SELECT token_version FROM users").scalar_one()
+            == 0
+        )
+
+
+def test_create_missing_columns_is_idempotent(engine):
+    assert create_missing_columns(engine) == []
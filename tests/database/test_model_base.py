@@ -0,0 +1,126 @@
+import pytest
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.api.links.models import ListLink, UserOnListStatus
+from app.api.school.models import SCHOOL_CACHE, SCHOOL_SERVICE
+from app.api.user_information.models import (
+    USER_INFORMATION_SERVICE,
+    UserInformation,
+)
+from app.auth.models import USER_SERVICE, User
+from app.commun.crypto import encrypt, get_password_hash, verify_password
+from tests.factories import (
+    TEST_PASSWORD,
+    get_school_factory,
+    get_user_factory,
+    get_user_information_factory,
+)
+
+
+def test_trusted_keeps_the_values_as_they_are(session: Session):
+    hashed_password = get_password_hash(TEST_PASSWORD)
+
+    user = User.trusted(username="parent", hashed_password=hashed_password)
+    user = USER_SERVICE.create(session, user)
+
+    assert user.hashed_password == hashed_password
+    assert user.token_version == 0
+    assert verify_password(TEST_PASSWORD, user.hashed_password)
+
+
+def test_trusted_sets_the_defaults(session: Session):
+    list_link = ListLink.trusted(
+        status=UserOnListStatus.WAITING,
+        position_in_list=0,
+        is_admin=False,
+        list_id=1,
+        user_id=1,
+    )
+
+    assert list_link.id is None
+    assert list_link.model_fields_set == {
+        "status",
+        "position_in_list",
+        "is_admin",
+        "list_id",
+        "user_id",
+    }
+
+
+def test_trusted_update_rejects_unknown_fields():
+    user = User.trusted(username="parent", hashed_password="hash")
+
+    with pytest.raises(AttributeError):
+        user.trusted_update(password="Password123*")
+
+
+def test_trusted_update_skips_the_validators(session: Session):
+    user = get_user_factory(session)
+    hashed_password = get_password_hash("NewPassword123*")
+
+    user = USER_SERVICE.trusted_update(
+        session, user.id, hashed_password=hashed_password
+    )
+
+    assert user.hashed_password == hashed_password
+
+
+def test_trusted_update_of_a_school_clears_the_cache(session: Session):
+    school = get_school_factory(session, city="Paris", code="TRUSTED1")
+    SCHOOL_SERVICE.get_decrypted_by_id(session, school.id)
+
+    school = SCHOOL_SERVICE.trusted_update(
+        session, school.id, encrypted_city=encrypt("Lyon")
+    )
+    session.commit()
+
+    assert SCHOOL_CACHE.get(("id", school.id)) is None
+    assert SCHOOL_SERVICE.get_decrypted_by_id(session, school.id).city == "Lyon"
+
+
+def test_trusted_email_keeps_its_blind_index(session: Session):
+    user_information = UserInformation.trusted(
+        encrypted_name=encrypt("Dupont"),
+        encrypted_first_name=encrypt("Jean"),
+        encrypted_email=encrypt("a@example.com"),
+        user_id=1,
+    )
+    user_information = USER_INFORMATION_SERVICE.create(session, user_information)
+    user_information_id = user_information.id
+
+    assert USER_INFORMATION_SERVICE.get_by_email(session, "a@example.com").id == (
+        user_information_id
+    )
+
+    USER_INFORMATION_SERVICE.trusted_update(
+        session, user_information_id, encrypted_email=encrypt("b@example.com")
+    )
+
+    assert USER_INFORMATION_SERVICE.get_by_email(session, "a@example.com") is None
+    assert USER_INFORMATION_SERVICE.get_by_email(session, "B@example.com").id == (
+        user_information_id
+    )
+
+    USER_INFORMATION_SERVICE.trusted_update(
+        session, user_information_id, encrypted_email=None
+    )
+
+    user_information = USER_INFORMATION_SERVICE.get_or_raise(
+        session, id=user_information_id
+    )
+    assert user_information.email_hash is None
+
+
+@pytest.mark.anyio
+async def test_atrusted_update(session: Session, async_engine):
+    user_information = get_user_information_factory(session, user_id=1, email=None)
+    user_information_id = user_information.id
+
+    async with AsyncSession(async_engine, expire_on_commit=False) as async_session:
+        user_information = await USER_INFORMATION_SERVICE.atrusted_update(
+            async_session, user_information_id, is_email_confirmed=True
+        )
+        await async_session.commit()
+
+    assert user_information.is_email_confirmed is True
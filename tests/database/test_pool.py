@@ -0,0 +1,83 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import QueuePool
+
+from app.database.pool import (
+    PoolStatistics,
+    engine_options,
+    instrumented_pool_class,
+    pool_statistics,
+)
+
+
+@pytest.fixture
+def instrumented_engine(tmp_path):
+    return create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=instrumented_pool_class(QueuePool),
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.01,
+    )
+
+
+def test_engine_options_keep_default_pool_for_in_memory_sqlite():
+    assert engine_options("sqlite://") == {}
+    assert engine_options("sqlite:///:memory:") == {}
+
+
+def test_engine_options_for_file_database():
+    options = engine_options("sqlite:////tmp/db.sqlite")
+
+    assert issubclass(options["poolclass"], QueuePool)
+    assert options["pool_pre_ping"] is True
+
+
+def test_each_instrumented_pool_class_has_its_own_statistics():
+    assert (
+        instrumented_pool_class(QueuePool).statistics
+        is not instrumented_pool_class(QueuePool).statistics
+    )
+
+
+def test_checkouts_are_counted(instrumented_engine):
+    with instrumented_engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+        statistics = pool_statistics(instrumented_engine.pool)
+        assert statistics["checked_out"] == 1
+
+    with instrumented_engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+    statistics = pool_statistics(instrumented_engine.pool)
+    assert statistics["checked_out"] == 0
+    assert statistics["checkouts"] == 2
+    assert sum(statistics["checkout_latency_histogram"].values()) == 2
+
+
+def test_timeouts_are_counted(instrumented_engine):
+    with instrumented_engine.connect(), pytest.raises(TimeoutError):
+        instrumented_engine.connect()
+
+    assert pool_statistics(instrumented_engine.pool)["timeouts"] == 1
+
+
+def test_histogram_buckets():
+    statistics = PoolStatistics()
+
+    statistics.observe_checkout(0.0005)
+    statistics.observe_checkout(0.2)
+    statistics.observe_checkout(60)
+
+    histogram = statistics.snapshot(QueuePool(lambda: None))[
+        "checkout_latency_histogram"
+    ]
+    assert histogram["le_1ms"] == 1
+    assert histogram["le_250ms"] == 1
+    assert histogram["le_inf"] == 1
+
+
+def test_uninstrumented_pool_has_no_statistics():
+    assert pool_statistics(create_engine("sqlite://").pool) is None
@@ -0,0 +1,60 @@
+import time
+
+from sqlalchemy import select, update
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.api.links.models import ListLink, UserOnListStatus
+from app.database import replica
+from app.database.replica import RecentWrite, current_recent_write, has_written
+
+
+def test_recent_write_window():
+    recent_write = RecentWrite()
+    assert recent_write.is_recent(60) is False
+
+    recent_write.mark()
+
+    assert recent_write.has_written is True
+    assert recent_write.is_recent(60) is True
+    assert recent_write.is_recent(0) is False
+
+
+def test_recent_write_from_the_future_is_not_recent():
+    assert RecentWrite(time.time() + 3600).is_recent(60) is False
+
+
+def test_use_replica_unless_the_current_client_just_wrote():
+    assert replica.use_replica() is True
+
+    reset_token = current_recent_write.set(RecentWrite())
+    assert replica.use_replica() is True
+    current_recent_write.reset(reset_token)
+
+    reset_token = current_recent_write.set(RecentWrite(time.time()))
+    assert replica.use_replica() is False
+    current_recent_write.reset(reset_token)
+
+
+def test_has_written_after_flush_or_dml():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        session.exec(select(ListLink))
+        assert has_written(session) is False
+
+    with Session(engine) as session:
+        session.add(
+            ListLink(
+                status=UserOnListStatus.WAITING,
+                position_in_list=0,
+                list_id=1,
+                user_id=1,
+            )
+        )
+        session.flush()
+        assert has_written(session) is True
+
+    with Session(engine) as session:
+        session.exec(update(ListLink).values(position_in_list=1))
+        assert has_written(session) is True
@@ -4,9 +4,11 @@ import factory
 import pytest
 from factory.alchemy import SQLAlchemyModelFactory
 from sqlmodel import Field, Session, SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.database.pagination import MAX_PAGE_SIZE
 from app.database.repository import Repository
-from app.exceptions import NotFoundException
+from app.exceptions import InvalidCursorException, NotFoundException
 
 
 class TestModel(SQLModel, table=True):
@@ -144,3 +146,232 @@ def test_get_or_raise_with_different_model(
 
     assert item.name == "test"
     assert item2.other_field == "test"
+
+
+def test_get_many(repositorytest: Repository[TestModel], session: Session):
+    get_test_model_factory(session, name="first")
+    get_test_model_factory(session, name="second")
+    get_test_model_factory(session, name="third")
+
+    items = repositorytest.get_many(session, "name", ["first", "third", "unknown"])
+
+    assert sorted(item.name for item in items) == ["first", "third"]
+
+
+def test_get_many_with_empty_values(
+    repositorytest: Repository[TestModel], session: Session
+):
+    get_test_model_factory(session)
+
+    assert repositorytest.get_many(session, "name", []) == []
+
+
+def test_get_many_with_extra_filters(
+    repositorytest: Repository[TestModel], session: Session
+):
+    get_test_model_factory(session, name="first", age=20)
+    get_test_model_factory(session, name="second", age=30)
+
+    items = repositorytest.get_many(session, "name", ["first", "second"], age=30)
+
+    assert [item.name for item in items] == ["second"]
+
+
+def test_get_map(repositorytest: Repository[TestModel], session: Session):
+    first = get_test_model_factory(session, name="first")
+    second = get_test_model_factory(session, name="second")
+
+    items = repositorytest.get_map(session, "id", [first.id, second.id])
+
+    assert items == {first.id: first, second.id: second}
+
+
+@pytest.fixture
+async def async_session(async_engine):
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+
+@pytest.mark.anyio
+async def test_aget_or_none(
+    repositorytest: Repository[TestModel], session: Session, async_session
+):
+    get_test_model_factory(session, name="test")
+
+    item = await repositorytest.aget_or_none(async_session, name="test")
+
+    assert item.name == "test"
+    assert await repositorytest.aget_or_none(async_session, name="other") is None
+
+
+@pytest.mark.anyio
+async def test_aget_map(
+    repositorytest: Repository[TestModel], session: Session, async_session
+):
+    first = get_test_model_factory(session, name="first")
+    second = get_test_model_factory(session, name="second")
+    first_id, second_id = first.id, second.id
+
+    items = await repositorytest.aget_map(async_session, "id", [first_id, second_id])
+
+    assert {key: item.name for key, item in items.items()} == {
+        first_id: "first",
+        second_id: "second",
+    }
+
+
+@pytest.mark.anyio
+async def test_aupdate(
+    repositorytest: Repository[TestModel], session: Session, async_session
+):
+    item = get_test_model_factory(session, name="test")
+
+    item = await repositorytest.aupdate(async_session, item.id, name="test2")
+
+    assert item.name == "test2"
+
+
+@pytest.mark.anyio
+async def test_acreate_and_adelete(
+    repositorytest: Repository[TestModel], async_session
+):
+    item = await repositorytest.acreate(async_session, TestModel(name="test", age=1))
+
+    assert await repositorytest.adelete(async_session, item.id) is True
+    assert await repositorytest.aget_or_none(async_session, name="test") is None
+
+
+def test_get_page(repositorytest: Repository[TestModel], session: Session):
+    for index in range(5):
+        get_test_model_factory(session, name=f"item{index}")
+
+    first_page = repositorytest.get_page(session, limit=2)
+    second_page = repositorytest.get_page(session, first_page.next_cursor, limit=2)
+    last_page = repositorytest.get_page(session, second_page.next_cursor, limit=2)
+
+    pages = [first_page, second_page, last_page]
+    assert [[item.name for item in page.items] for page in pages] == [
+        ["item0", "item1"],
+        ["item2", "item3"],
+        ["item4"],
+    ]
+    assert last_page.next_cursor is None
+
+
+def test_get_page_when_the_last_page_is_full(
+    repositorytest: Repository[TestModel], session: Session
+):
+    get_test_model_factory(session)
+    get_test_model_factory(session)
+
+    page = repositorytest.get_page(session, limit=2)
+
+    assert len(page.items) == 2
+    assert page.next_cursor is None
+
+
+def test_get_page_with_filters(repositorytest: Repository[TestModel], session: Session):
+    get_test_model_factory(session, age=20)
+    get_test_model_factory(session, age=30)
+    get_test_model_factory(session, age=20)
+
+    page = repositorytest.get_page(session, age=20)
+
+    assert [item.age for item in page.items] == [20, 20]
+
+
+def test_get_page_limit_is_capped(
+    repositorytest: Repository[TestModel], session: Session
+):
+    for _ in range(MAX_PAGE_SIZE + 1):
+        session.add(TestModel(name="test", age=1))
+    session.commit()
+
+    page = repositorytest.get_page(session, limit=MAX_PAGE_SIZE + 50)
+
+    assert len(page.items) == MAX_PAGE_SIZE
+    assert page.next_cursor is not None
+
+
+def test_get_batch_is_not_capped(
+    repositorytest: Repository[TestModel], session: Session
+):
+    for _ in range(MAX_PAGE_SIZE + 1):
+        session.add(TestModel(name="test", age=1))
+    session.commit()
+
+    batch = repositorytest.get_batch(session, limit=MAX_PAGE_SIZE + 50)
+
+    assert len(batch.items) == MAX_PAGE_SIZE + 1
+    assert batch.next_cursor is None
+    with pytest.raises(ValueError):
+        repositorytest.get_batch(session, limit=0)
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor", "eyJpZCI6ICJ4In0=", "e30="])
+def test_get_page_with_invalid_cursor(
+    repositorytest: Repository[TestModel], session: Session, cursor: str
+):
+    with pytest.raises(InvalidCursorException):
+        repositorytest.get_page(session, cursor)
+
+
+def test_update_where(repositorytest: Repository[TestModel], session: Session):
+    get_test_model_factory(session, name="first", age=20)
+    get_test_model_factory(session, name="second", age=20)
+    get_test_model_factory(session, name="third", age=30)
+
+    updated = repositorytest.update_where(session, {"age": 20}, {"name": "twenty"})
+
+    assert updated == 2
+    names = sorted(item.name for item in session.exec(select(TestModel)).all())
+    assert names == ["third", "twenty", "twenty"]
+
+
+def test_update_where_returning(
+    repositorytest: Repository[TestModel], session: Session
+):
+    first = get_test_model_factory(session, name="first", age=20)
+    second = get_test_model_factory(session, name="second", age=20)
+    get_test_model_factory(session, name="third", age=20)
+
+    items = repositorytest.update_where(
+        session, {"id": [first.id, second.id]}, {"age": 21}, returning=True
+    )
+
+    assert sorted(item.name for item in items) == ["first", "second"]
+    assert all(item.age == 21 for item in items)
+
+
+def test_update_where_no_match(repositorytest: Repository[TestModel], session: Session):
+    assert repositorytest.update_where(session, {"name": "x"}, {"age": 1}) == 0
+    assert (
+        repositorytest.update_where(session, {"name": "x"}, {"age": 1}, returning=True)
+        == []
+    )
+
+
+def test_bulk_update(repositorytest: Repository[TestModel], session: Session):
+    first = get_test_model_factory(session, name="first", age=20)
+    second = get_test_model_factory(session, name="second", age=20)
+
+    repositorytest.bulk_update(
+        session, [{"id": first.id, "age": 1}, {"id": second.id, "age": 2}]
+    )
+    session.commit()
+
+    assert repositorytest.get_or_raise(session, name="first").age == 1
+    assert repositorytest.get_or_raise(session, name="second").age == 2
+
+
+@pytest.mark.anyio
+async def test_aupdate_where(
+    repositorytest: Repository[TestModel], session: Session, async_session
+):
+    get_test_model_factory(session, name="test", age=20)
+
+    items = await repositorytest.aupdate_where(
+        async_session, {"name": "test"}, {"age": 21}, returning=True
+    )
+
+    assert [item.age for item in items] == [21]
@@ -0,0 +1,107 @@
+import json
+
+from cryptography.fernet import Fernet
+from sqlmodel import Session
+
+from app.api.school.models import SCHOOL_SERVICE
+from app.api.user_information.models import USER_INFORMATION_SERVICE
+from app.commun.crypto import decrypt, encrypt
+from app.database.rotate_encryption_key import rotate_encryption_key, rotate_page
+from app.settings import AES_KEY
+from tests.factories import get_school_factory, get_user_information_factory
+
+FORMER_KEY = Fernet.generate_key()
+KEY_RING = (AES_KEY, FORMER_KEY)
+
+
+def encrypted_with_former_key(session: Session) -> tuple[int, list[int]]:
+    school_id = get_school_factory(session, city="Paris", code="ROTATE01").id
+    SCHOOL_SERVICE.update_where(
+        session,
+        {"id": school_id},
+        {"encrypted_city": encrypt("Paris", FORMER_KEY)},
+    )
+    user_information_ids = []
+    for user_id in (1, 2, 3):
+        user_information_id = get_user_information_factory(
+            session, user_id=user_id, first_name="Jean", email=None
+        ).id
+        USER_INFORMATION_SERVICE.update_where(
+            session,
+            {"id": user_information_id},
+            {"encrypted_first_name": encrypt("Jean", FORMER_KEY)},
+        )
+        user_information_ids.append(user_information_id)
+    session.commit()
+
+    return school_id, user_information_ids
+
+
+def test_rotate_encryption_key_encrypts_with_the_primary_key(engine, session: Session):
+    school_id, _ = encrypted_with_former_key(session)
+
+    assert rotate_encryption_key(engine, batch_size=1, key=KEY_RING) == 4
+
+    session.expire_all()
+    school = SCHOOL_SERVICE.get_or_raise(session, id=school_id)
+    assert decrypt(school.encrypted_city, AES_KEY) == "Paris"
+    for user_information in USER_INFORMATION_SERVICE.get_all(session):
+        assert decrypt(user_information.encrypted_first_name, AES_KEY) == "Jean"
+        assert user_information.encrypted_email is None
+    assert rotate_encryption_key(engine, key=KEY_RING) == 0
+
+
+def test_rotate_encryption_key_resumes_from_the_checkpoint(
+    engine, session: Session, tmp_path
+):
+    school_id, user_information_ids = encrypted_with_former_key(session)
+    checkpoint_path = tmp_path / "rotation.json"
+    checkpoint_path.write_text(json.dumps({"schools": school_id}))
+
+    rotated = rotate_encryption_key(
+        engine, batch_size=1, checkpoint_path=checkpoint_path, key=KEY_RING
+    )
+
+    assert rotated == 3
+    assert json.loads(checkpoint_path.read_text()) == {
+        "schools": school_id,
+        "user_informations": user_information_ids[-1],
+    }
+    session.expire_all()
+    school = SCHOOL_SERVICE.get_or_raise(session, id=school_id)
+    assert decrypt(school.encrypted_city, FORMER_KEY) == "Paris"
+    assert rotate_encryption_key(engine, checkpoint_path=checkpoint_path) == 0
+
+
+def test_rotate_encryption_key_is_rate_limited(engine, session: Session):
+    encrypted_with_former_key(session)
+    sleeps = []
+
+    rotate_encryption_key(
+        engine, batch_size=1, rows_per_second=2, sleep=sleeps.append, key=KEY_RING
+    )
+
+    # 4 rows at 2 rows per second, the fake sleep doesn't make time pass:
+    # the command waits until 2 seconds after its start, a page at a time
+    assert len(sleeps) == 4
+    assert sleeps == sorted(sleeps)
+    assert 1.5 < sleeps[-1] <= 2
+
+
+def test_rotate_page_only_counts_the_values_it_replaced(engine, session: Session):
+    school_id, _ = encrypted_with_former_key(session)
+    schools = SCHOOL_SERVICE.get_batch(session).items
+
+    # The application changes the city after the page was read
+    with Session(engine) as other_session:
+        SCHOOL_SERVICE.update_where(
+            other_session, {"id": school_id}, {"encrypted_city": encrypt("Lyon")}
+        )
+        other_session.commit()
+
+    assert rotate_page(session, SCHOOL_SERVICE, schools, KEY_RING) == 0
+    session.commit()
+
+    session.expire_all()
+    school = SCHOOL_SERVICE.get_or_raise(session, id=school_id)
+    assert decrypt(school.encrypted_city, AES_KEY) == "Lyon"
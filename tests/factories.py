@@ -5,6 +5,7 @@ from sqlmodel import Session
 from app.api.links.models import ListLink
 from app.api.parents_list.models import ParentsList
 from app.api.school.models import School
+from app.api.user_information.models import UserInformation
 from app.auth.models import User
 
 TEST_PASSWORD = "Password123*"
@@ -80,3 +81,20 @@ def get_list_link_factory(session: Session, **kwargs) -> ListLink:
     ListLinkFactory._meta.sqlalchemy_session = session
 
     return ListLinkFactory(**kwargs)
+
+
+class UserInformationFactory(SQLAlchemyModelFactory):
+    class Meta:
+        model = UserInformation
+        sqlalchemy_session_persistence = "commit"
+
+    id = factory.Sequence(lambda n: n)
+    name: str = factory.Faker("last_name")
+    first_name: str = factory.Faker("first_name")
+    user_id: int = factory.Sequence(lambda n: n)
+
+
+def get_user_information_factory(session: Session, **kwargs) -> UserInformation:
+    UserInformationFactory._meta.sqlalchemy_session = session
+
+    return UserInformationFactory(**kwargs)